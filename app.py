@@ -1,58 +1,91 @@
+import atexit
+from urllib.parse import urlparse
 import streamlit as st
-import joblib
-import re
+import article_fetch
+import detector
+import long_document
+import metrics
+import similarity_index
+from detector import is_gibberish, find_sensitive_terms
+from prediction_cache import PredictionCache
+
+PREDICTION_CACHE_FILE = "models/.prediction_cache.json"
 
 # ---------------------------
 # Load Model & Vectorizer
 # ---------------------------
+@st.cache_resource(max_entries=1)
+def load_scorer(version):
+    # Keyed on the artifact version, so retrained files are picked up without a restart
+    return detector.load_scorer()
+
 @st.cache_resource
-def load_artifacts():
-    model = joblib.load("models/fake_news_model.joblib")
-    vectorizer = joblib.load("models/tfidf_vectorizer.joblib")
-    return model, vectorizer
+def get_prediction_cache():
+    cache = PredictionCache(path=PREDICTION_CACHE_FILE)
+    atexit.register(cache.save)  # persist what the periodic saves missed
+    return cache
 
-model, vectorizer = load_artifacts()
+@st.cache_resource
+def get_article_fetcher():
+    # One per server process, so every session shares the extraction cache and in-flight downloads
+    return article_fetch.ArticleFetcher()
 
-# ---------------------------
-# Text Cleaning (must match training)
-# ---------------------------
-def clean_text(text):
-    text = text.lower()
-    text = re.sub(r'[^a-zA-Z\s]', '', text)   # Remove punctuation/numbers
-    text = re.sub(r'\s+', ' ', text).strip()  # Remove extra spaces
-    return text
+@st.cache_resource(max_entries=1)
+def load_similarity_index(version, index_version, _scorer):
+    # Reloaded when the model or the index file changes; None without a matching index
+    return similarity_index.load_for(_scorer)
 
-# ---------------------------
-# Detect gibberish input
-# ---------------------------
-def is_gibberish(text):
-    if re.match(r'http[s]?://', text):  # Allow URLs
-        return False
-    if len(text.split()) < 3:           # Too short
-        return True
-    if len(set(text)) < 5:              # Too few unique chars
-        return True
-    return False
+artifact_version = detector.scorer_version()
+scorer = load_scorer(artifact_version)
+known_stories = load_similarity_index(artifact_version, similarity_index.index_version(), scorer)
+prediction_cache = get_prediction_cache()
+prediction_cache.bind_version(artifact_version)
+article_fetcher = get_article_fetcher()
 
-# ---------------------------
-# Sensitive Claim Detection
-# ---------------------------
-def contains_sensitive_claim(text):
-    sensitive_keywords = [
-        "dies", "dead", "death", "killed", "murder", "assassinated",
-        "heart attack", "suicide", "bomb", "arrested", "hospitalized", "rape"
-    ]
-
-    public_figures = [
-        "trump", "biden", "modi", "putin", "zelensky", "elon musk", "obama",
-        "kamala", "xi jinping", "pope", "queen", "kardashian", "nadal"
-    ]
-
-    text = text.lower()
-    for word in sensitive_keywords + public_figures:
-        if word in text:
-            return True
-    return False
+def resolve_input(text):
+    """The text to check: the article behind a pasted link, else the input itself.
+
+    Returns (text, article, error); article and error are None for plain text.
+    """
+    if not article_fetch.is_url(text):
+        return text, None, None
+    with metrics.timer("stage_seconds", stage="fetch_url"):
+        try:
+            article = article_fetcher.fetch(text)
+        except article_fetch.FetchError as e:
+            return "", None, str(e)
+    return article_fetch.article_text(article), article, None
+
+def read_input(text):
+    """Cleaned tokens within the token budget: (tokens, chars_read, budget_hit)."""
+    with metrics.timer("stage_seconds", stage="clean"):
+        return long_document.budget_tokens(text)
+
+def predict(tokens, budget_hit):
+    """[real, fake] probabilities, served from the cache for repeated inputs."""
+    chunked = budget_hit and long_document.LONG_DOC_MODE == "chunk"
+    key = PredictionCache.key(" ".join(tokens), artifact_version + (":chunk" if chunked else ""))
+    return prediction_cache.get_or_compute(
+        key, lambda: long_document.score_tokens(scorer, tokens, budget_hit).tolist()
+    )
+
+def find_similar(tokens):
+    """Nearest known stories within the similarity latency budget, most similar first."""
+    if known_stories is None:
+        return []
+    with metrics.timer("stage_seconds", stage="similarity"):
+        matches, complete = known_stories.query(*similarity_index.query_vector(scorer, " ".join(tokens)))
+    if not complete:
+        metrics.inc("similarity_budget_exceeded_total")
+    return [m for m in matches if m["similarity"] >= similarity_index.SHOW_THRESHOLD]
+
+def check_gibberish(text):
+    with metrics.timer("stage_seconds", stage="rule_gibberish"):
+        return is_gibberish(text)
+
+def check_sensitive(text):
+    with metrics.timer("stage_seconds", stage="rule_sensitive"):
+        return find_sensitive_terms(text)
 
 # ---------------------------
 # Streamlit UI
@@ -64,25 +97,76 @@ st.write("Enter a **news headline** or **full article** to check if it's **Real*
 user_input = st.text_area("Paste your news here:")
 
 if st.button("Check News"):
-    if not user_input.strip():
+    news_text, article, fetch_error = resolve_input(user_input)
+    if article:
+        st.caption(f"📄 Checking the article at {urlparse(article['url']).netloc}: **{article['title']}**")
+    # Very long pastes are only read up to the token budget, rule checks included
+    tokens, chars_read, budget_hit = read_input(news_text)
+    checked_input = news_text[:chars_read]
+    if fetch_error:
+        metrics.inc("predictions_total", outcome="url_failed")
+        st.warning(f"⚠️ Could not read an article from this link: {fetch_error}. "
+                   "Please paste the article text instead.")
+    elif not checked_input.strip():
+        metrics.inc("predictions_total", outcome="empty")
         st.warning("⚠️ Please enter some text to check.")
-    elif is_gibberish(user_input):
+    elif check_gibberish(checked_input):
+        metrics.inc("predictions_total", outcome="gibberish")
         st.error("🚨 This news seems **FAKE** due to nonsensical or short input.")
-    elif contains_sensitive_claim(user_input):
-        st.warning("⚠️ This input contains **sensitive content or public figure claims**.\n\nAI predictions may be unreliable. Please verify using trusted news sources.")
+    elif sensitive_terms := check_sensitive(checked_input):
+        metrics.inc("predictions_total", outcome="sensitive")
+        st.warning("⚠️ This input contains **sensitive content or public figure claims** "
+                   f"({', '.join(sensitive_terms)}).\n\nAI predictions may be unreliable. Please verify using trusted news sources.")
     else:
-        # Preprocess and Predict
-        cleaned_input = clean_text(user_input)
-        vectorized_input = vectorizer.transform([cleaned_input])
-        proba = model.predict_proba(vectorized_input)[0]
+        matches = find_similar(tokens)
+        if matches and matches[0]["similarity"] >= similarity_index.MATCH_THRESHOLD:
+            # A story we already have a label for: no need to rely on the model's probability
+            known = matches[0]
+            metrics.inc("predictions_total", outcome=f"known_{known['label']}")
+            message = (f"This story matches a known **{known['label'].upper()}** story from the training data "
+                       f"({known['similarity']:.0%} similar).")
+            if known["label"] == "real":
+                st.success(f"✅ {message}")
+            else:
+                st.error(f"🚨 {message}")
+        else:
+            # Preprocess and Predict
+            proba = predict(tokens, budget_hit)
 
-        fake_score = round(proba[1] * 100, 2)  # % fake
-        real_score = round(proba[0] * 100, 2)  # % real
+            fake_score = round(proba[1] * 100, 2)  # % fake
+            real_score = round(proba[0] * 100, 2)  # % real
 
-        if real_score >= fake_score:
-            st.success(f"✅ This news seems **REAL**.\n\n🧾 Confidence: {real_score}% real, {fake_score}% fake")
-        else:
-            st.error(f"🚨 This news is likely **FAKE**.\n\n🧾 Confidence: {fake_score}% fake, {real_score}% real")
+            metrics.inc("predictions_total", outcome="real" if real_score >= fake_score else "fake")
+            if real_score >= fake_score:
+                st.success(f"✅ This news seems **REAL**.\n\n🧾 Confidence: {real_score}% real, {fake_score}% fake")
+            else:
+                st.error(f"🚨 This news is likely **FAKE**.\n\n🧾 Confidence: {fake_score}% fake, {real_score}% real")
+
+        if matches:
+            with st.expander("Similar stories in the training data"):
+                for m in matches:
+                    st.markdown(f"- **{m['label'].upper()}**, {m['similarity']:.0%} similar: _{m['snippet']}…_")
+
+    if budget_hit:
+        metrics.inc("long_documents_total", mode=long_document.LONG_DOC_MODE)
+        st.info(f"ℹ️ Long article: only the first {len(tokens):,} words were analysed "
+                f"(token budget {long_document.TOKEN_BUDGET:,}, mode: {long_document.LONG_DOC_MODE}).")
+
+# Cache statistics
+stats = prediction_cache.stats()
+st.sidebar.caption(
+    f"Prediction cache: {stats['size']}/{stats['max_size']} entries, "
+    f"{stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), "
+    f"{stats['evictions']} evictions"
+)
+url_stats = article_fetcher.stats()
+st.sidebar.caption(
+    f"Article cache: {url_stats['size']} pages, {url_stats['hits']} hits, "
+    f"{url_stats['fetches']} fetches, {url_stats['deduplicated']} shared downloads"
+)
+if metrics.enabled():
+    with st.sidebar.expander("Metrics"):
+        st.code(metrics.render_prometheus(), language="text")
 
 # Footer Disclaimer
 st.markdown("---")
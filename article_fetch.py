@@ -0,0 +1,243 @@
+# article_fetch.py
+"""Fetch and extract the article behind a URL pasted into the app.
+
+Scoring the URL string itself says nothing about the story, so app.py hands
+pasted links to an ArticleFetcher, which downloads the page and runs the same
+newspaper3k → BeautifulSoup extraction as the scrape scripts (crawler.py).
+
+    fetcher = ArticleFetcher()
+    article = fetcher.fetch("https://example.com/news/story")  # {"title", "text", "url"}
+
+- Every call answers within the fetch budget: connecting, reading the body
+  and extracting all count against it, and a page still loading when it runs
+  out raises FetchError instead of blocking the request.
+- Extracted articles are cached by normalized URL with a TTL (failures for a
+  shorter one), so a link pasted again is answered without the network.
+- Concurrent requests for the same URL share one download: a viral link
+  pasted by many users at once is fetched once.
+- Only public hosts are fetched: the host of the URL and of every redirect
+  (followed by hand, at most MAX_REDIRECTS) must resolve to globally
+  routable addresses, so a pasted link cannot reach loopback, private or
+  link-local services. Tests allow the stub server with `allowed_hosts`
+  (or FNDP_URL_ALLOW_HOSTS for the app).
+
+    FNDP_URL_FETCH_BUDGET_S=5     seconds a fetch may take, extraction included
+    FNDP_URL_CACHE_TTL=3600       seconds an extracted article is reused
+    FNDP_URL_ALLOW_HOSTS=         comma-separated hosts exempt from the address check
+"""
+import os
+import re
+import time
+import socket
+import threading
+import ipaddress
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from crawler import HEADERS, extract_article
+from prediction_cache import PredictionCache
+
+FETCH_BUDGET_S = float(os.environ.get("FNDP_URL_FETCH_BUDGET_S", 5))
+CACHE_TTL = float(os.environ.get("FNDP_URL_CACHE_TTL", 3600))
+FAILURE_TTL = 60  # seconds a failed URL is answered from the cache
+MAX_ENTRIES = 512
+MAX_BYTES = 2 * 1024 * 1024  # pages larger than this are cut off
+WORKERS = 4
+MAX_REDIRECTS = 5
+ALLOWED_HOSTS = frozenset(h.strip().lower() for h in os.environ.get("FNDP_URL_ALLOW_HOSTS", "").split(",") if h.strip())
+CHUNK_BYTES = 64 * 1024
+
+_URL_RE = re.compile(r"https?://\S+$", re.IGNORECASE)
+
+
+class FetchError(Exception):
+    """The URL could not be turned into article text (message is shown to the user)."""
+
+
+def is_url(text):
+    """True when the whole input is a single http(s) link."""
+    return bool(_URL_RE.match(text.strip()))
+
+
+def normalize_url(url):
+    """Cache key form of a URL: no fragment, lower-case scheme and host."""
+    parts = urlsplit(urldefrag(url.strip())[0])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+def article_text(article):
+    """The text to score for an extracted article: headline and body."""
+    return f"{article['title']}\n\n{article['text']}" if article["title"] else article["text"]
+
+
+# ---------------------------
+# Host checks
+# ---------------------------
+def check_host(url, allowed_hosts=()):
+    """Raise FetchError unless `url` is http(s) and its host resolves only to global addresses.
+
+    Hosts in `allowed_hosts` (e.g. the local stub server in tests) skip the
+    address check.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise FetchError("not a web link")
+    host = parts.hostname.lower()
+    if host in allowed_hosts:
+        return
+    try:
+        infos = socket.getaddrinfo(host, parts.port or (443 if parts.scheme == "https" else 80),
+                                   type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        raise FetchError("unknown host")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if not address.is_global:
+            metrics.inc("url_fetch_errors_total", kind="blocked_host")
+            raise FetchError("links to private or local addresses are not fetched")
+
+
+# ---------------------------
+# Download & extraction
+# ---------------------------
+def _decode(body, content_type, encoding):
+    # Without a declared charset requests assumes ISO-8859-1; news sites are UTF-8
+    if "charset" not in content_type.lower() or not encoding:
+        encoding = "utf-8"
+    try:
+        return body.decode(encoding, errors="replace")
+    except LookupError:  # a charset Python does not know
+        return body.decode("utf-8", errors="replace")
+
+
+def fetch_html(url, deadline, session=None, max_bytes=MAX_BYTES, allowed_hosts=()):
+    """(HTML, final URL), read in chunks until `deadline` (time.monotonic()) or `max_bytes`.
+
+    Redirects are followed here rather than by requests, so every hop's host
+    goes through check_host first.
+    """
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            check_host(url, allowed_hosts)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise FetchError("timed out")
+            # The timeout bounds connecting and each socket read; the deadline bounds the whole body
+            with (session or requests).get(url, headers=HEADERS, timeout=remaining, stream=True,
+                                           allow_redirects=False) as response:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers["Location"])
+                    continue
+                return _read_body(response, deadline, max_bytes), url
+        raise FetchError("too many redirects")
+    except requests.Timeout:
+        raise FetchError("timed out")
+    except requests.HTTPError as e:
+        raise FetchError(f"the site answered HTTP {e.response.status_code}")
+    except requests.RequestException as e:
+        raise FetchError(f"could not connect to the site ({type(e).__name__})")
+
+
+def _read_body(response, deadline, max_bytes):
+    """The response body as text, up to `max_bytes`; raises FetchError past `deadline`."""
+    response.raise_for_status()
+    content_type = response.headers.get("Content-Type", "text/html")
+    if "html" not in content_type:
+        raise FetchError(f"not a web page ({content_type.split(';')[0]})")
+    body = bytearray()
+    for chunk in response.iter_content(CHUNK_BYTES):
+        body.extend(chunk)
+        if len(body) >= max_bytes:
+            break
+        if time.monotonic() > deadline:
+            raise FetchError("timed out")
+    return _decode(bytes(body[:max_bytes]), content_type, response.encoding)
+
+
+def fetch_article(url, deadline, session=None, allowed_hosts=()):
+    """Download `url` and extract it with crawler.extract_article; {"title", "text", "url"}.
+
+    "url" is where the article was found, after redirects.
+    """
+    html, url = fetch_html(url, deadline, session, allowed_hosts=allowed_hosts)
+    article = extract_article(url, html)
+    if article is None:
+        raise FetchError("no article text found on the page")
+    return {"title": article["title"], "text": article["text"], "url": url}
+
+
+# ---------------------------
+# Cached, deduplicated fetcher
+# ---------------------------
+class ArticleFetcher:
+    """Thread-safe fetch_article with a TTL cache and one download per URL at a time."""
+
+    def __init__(self, budget=FETCH_BUDGET_S, ttl=CACHE_TTL, failure_ttl=FAILURE_TTL,
+                 max_entries=MAX_ENTRIES, workers=WORKERS, session=None, allowed_hosts=ALLOWED_HOSTS):
+        self.budget = budget
+        self.allowed_hosts = frozenset(h.lower() for h in allowed_hosts)
+        self.articles = PredictionCache(max_size=max_entries, ttl=ttl)
+        self.failures = PredictionCache(max_size=max_entries, ttl=failure_ttl)
+        self.fetches = 0
+        self.deduplicated = 0
+        self._session = session or requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=workers)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="article-fetch")
+        self._in_flight = {}  # normalized URL -> Future of the running download
+        self._lock = threading.Lock()
+
+    def fetch(self, url, budget=None):
+        """The extracted article for `url`; raises FetchError on failure or after `budget` seconds."""
+        budget = self.budget if budget is None else budget
+        url = normalize_url(url)
+        key = PredictionCache.key(url, "url")
+        with self._lock:
+            article = self.articles.get(key)
+            if article is not None:
+                metrics.inc("url_fetch_total", result="cache_hit")
+                return article
+            error = self.failures.get(key)
+            if error is not None:
+                metrics.inc("url_fetch_total", result="cached_failure")
+                raise FetchError(error)
+            future = self._in_flight.get(url)
+            if future is None:
+                future = self._pool.submit(self._download, url, key, time.monotonic() + budget)
+                self._in_flight[url] = future
+                self.fetches += 1
+                metrics.inc("url_fetch_total", result="fetched")
+            else:
+                self.deduplicated += 1
+                metrics.inc("url_fetch_total", result="deduplicated")
+        try:
+            # A download that outlives this wait still finishes and fills the cache for the next request
+            return future.result(timeout=budget)
+        except FutureTimeout:
+            metrics.inc("url_fetch_errors_total", kind="budget")
+            raise FetchError(f"no article within {budget:g}s")
+
+    def _download(self, url, key, deadline):
+        try:
+            with metrics.timer("url_fetch_seconds"):
+                article = fetch_article(url, deadline, self._session, self.allowed_hosts)
+            self.articles.put(key, article)
+            return article
+        except FetchError as e:
+            metrics.inc("url_fetch_errors_total", kind="fetch")
+            self.failures.put(key, str(e))
+            raise
+        finally:
+            # Cached before leaving the in-flight map, so later callers find one or the other
+            with self._lock:
+                self._in_flight.pop(url, None)
+
+    def stats(self):
+        stats = self.articles.stats()
+        return {"size": stats["size"], "hits": stats["hits"], "fetches": self.fetches,
+                "deduplicated": self.deduplicated}
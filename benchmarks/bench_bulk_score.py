@@ -0,0 +1,100 @@
+"""Throughput, peak memory and crash/resume check for bulk_score.py.
+
+Writes synthetic CSV archives of increasing size, scores each one in a fresh
+process and reports rows/s plus the peak RSS of the parent and of the largest
+worker; the peaks should stay flat as the input grows. Then kills a run
+part-way through with SIGKILL, resumes it and checks the output matches an
+uninterrupted run byte for byte.
+
+    python benchmarks/bench_bulk_score.py --rows 2000,20000 --workers 2
+"""
+import argparse
+import csv
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bulk_score import progress_path
+from synthetic import make_articles
+
+RUN = (
+    "import sys, json, resource, warnings; warnings.filterwarnings('ignore')\n"
+    "sys.path.insert(0, {root!r}); import bulk_score\n"
+    "bulk_score.bulk_score({src!r}, {out!r}, workers={workers}, chunk_rows={chunk}, resume={resume})\n"
+    "print(json.dumps([resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,"
+    " resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss]))\n"
+)
+
+
+def write_archive(path, rows):
+    # Repeat a fixed pool of articles so large archives are cheap to generate
+    pool = make_articles(min(rows, 2000), seed=11)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "content"])
+        for i in range(rows):
+            writer.writerow([i, f"headline {i}", pool[i % len(pool)]])
+
+
+def run(src, out, workers, chunk, resume=False, wait=True):
+    code = RUN.format(root=ROOT, src=src, out=out, workers=workers, chunk=chunk, resume=resume)
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    if wait:
+        stdout, _ = proc.communicate()
+        if proc.returncode:
+            raise SystemExit(f"bulk_score failed on {src}")
+        return json.loads(stdout.strip().splitlines()[-1])
+    return proc
+
+
+def rows_done(out):
+    try:
+        with open(progress_path(out), encoding="utf-8") as f:
+            return json.load(f)["rows_done"]
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", default="2000,20000", help="comma-separated archive sizes")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--chunk-rows", type=int, default=500)
+    args = parser.parse_args()
+    sizes = [int(n) for n in args.rows.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>8} {'seconds':>9} {'rows/s':>9} {'parent RSS':>11} {'worker RSS':>11}")
+        for rows in sizes:
+            src = os.path.join(tmp, f"archive_{rows}.csv")
+            write_archive(src, rows)
+            start = time.perf_counter()
+            parent_kb, worker_kb = run(src, os.path.join(tmp, f"scores_{rows}.csv"), args.workers, args.chunk_rows)
+            elapsed = time.perf_counter() - start
+            print(f"{rows:>8} {elapsed:>9.1f} {rows / elapsed:>9,.0f} {parent_kb / 1024:>9.0f}MB {worker_kb / 1024:>9.0f}MB")
+
+        src = os.path.join(tmp, f"archive_{sizes[-1]}.csv")
+        expected = os.path.join(tmp, f"scores_{sizes[-1]}.csv")
+        out = os.path.join(tmp, "resumed.csv")
+        proc = run(src, out, args.workers, args.chunk_rows, wait=False)
+        while rows_done(out) < sizes[-1] // 3 and proc.poll() is None:
+            time.sleep(0.05)
+        proc.send_signal(signal.SIGKILL)
+        proc.wait()
+        killed_at = rows_done(out)
+        run(src, out, args.workers, args.chunk_rows, resume=True)
+        with open(expected, "rb") as a, open(out, "rb") as b:
+            identical = a.read() == b.read()
+        print(f"Killed after {killed_at} rows, resumed: output identical to uninterrupted run: {identical}")
+        assert identical, "resumed output differs"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Load time and backup disk use: CSV snapshots vs the columnar corpus store.
+
+Simulates `--runs` dataset refreshes that each add `--delta` rows.
+
+    python benchmarks/bench_dataset_store.py --rows 200000 --delta 2000 --runs 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset_store import CorpusStore
+from synthetic import make_labeled_corpus
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--delta", type=int, default=2_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    base = pd.DataFrame(make_labeled_corpus(args.rows), columns=["content", "label"])
+    deltas = [pd.DataFrame(make_labeled_corpus(args.delta, seed=100 + i), columns=["content", "label"])
+              for i in range(args.runs)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # CSV: every refresh renames the whole file into a backup and rewrites it
+        csv_file = os.path.join(tmp, "cleaned_news.csv")
+        current = base
+        current.to_csv(csv_file, index=False)
+        for i, delta in enumerate(deltas):
+            os.rename(csv_file, os.path.join(tmp, f"cleaned_news_backup_{i}.csv"))
+            current = pd.concat([current, delta], ignore_index=True)
+            current.to_csv(csv_file, index=False)
+        csv_disk = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp) if f.endswith(".csv"))
+        _, csv_load = timed(lambda: pd.read_csv(csv_file))
+
+        # Store: one base part plus one delta part per refresh
+        store = CorpusStore(os.path.join(tmp, "corpus"))
+        store.replace(base)
+        for delta in deltas:
+            store.append(delta)
+        _, store_load = timed(lambda: store.load(["content", "label"]))
+        _, label_load = timed(lambda: store.load(["label"]))
+        oldest, _ = timed(lambda: store.load(version=1))
+        assert len(oldest) == args.rows
+        store_disk = store.disk_usage()
+
+    print(f"{args.rows} rows + {args.runs} refreshes of {args.delta} rows")
+    print(f"CSV   : load {csv_load:6.2f}s, data + backups on disk {csv_disk / 1024 ** 2:8.1f} MB")
+    print(f"store : load {store_load:6.2f}s, all versions on disk  {store_disk / 1024 ** 2:8.1f} MB")
+    print(f"store : label-only projection load {label_load:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
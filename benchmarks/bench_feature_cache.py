@@ -0,0 +1,45 @@
+"""train_model.py with a cold and a warm feature cache, and evaluation-only runs.
+
+Each run is a fresh process on a synthetic corpus; the similarity index and
+bundle export are skipped so the timings are about vectorizing and fitting.
+
+    python benchmarks/bench_feature_cache.py --rows 40000
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_update_model import timed
+from synthetic import write_labeled_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=40000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data = write_labeled_csv(os.path.join(tmp, "cleaned_news.csv"), args.rows, seed=8)
+        common = ["--data", data, "--model-out", os.path.join(tmp, "model.joblib"),
+                  "--vectorizer-out", os.path.join(tmp, "vectorizer.joblib"),
+                  "--feature-cache-dir", os.path.join(tmp, "features")]
+        train = ["train_model.py"] + common + ["--no-bundle", "--no-similarity-index"]
+        runs = [
+            ("train, no cache", train + ["--no-feature-cache"]),
+            ("train, cold cache", train),
+            ("train, warm cache", train),
+            ("evaluate, no cache", ["train_model.py", "--mode", "evaluate", "--no-feature-cache"] + common),
+            ("evaluate, warm cache", ["train_model.py", "--mode", "evaluate"] + common),
+        ]
+        print(f"{args.rows:,} rows")
+        for label, cmd in runs:
+            seconds, _ = timed(cmd)
+            print(f"{label:<22} {seconds:>7.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Bandwidth and time of repeated RSS polls with and without the feed cache.
+
+Each round polls every feed; only `--changed` feeds publish a new item per
+round, as in production where most polls find nothing new.
+
+    python benchmarks/bench_feed_cache.py --feeds 20 --rounds 10 --changed 2
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import feedparser
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feed_cache import FeedCache, poll_feeds
+from stub_server import start_stub_server
+
+
+class CountingGetter:
+    def __init__(self):
+        self.session = requests.Session()
+        self.bytes = 0
+
+    def __call__(self, url, headers=None):
+        r = self.session.get(url, headers=headers, timeout=15)
+        r.raise_for_status()
+        self.bytes += len(r.content)
+        return r
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--feeds", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--changed", type=int, default=2, help="feeds that publish each round")
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency, feed_items=50)
+    names = [f"feed{i}" for i in range(args.feeds)]
+    urls = [f"{base_url}/rss/{n}" for n in names]
+
+    # Baseline: download and parse every feed serially every round, keep everything
+    get = CountingGetter()
+    start = time.perf_counter()
+    emitted = 0
+    for _ in range(args.rounds):
+        for name in names[:args.changed]:
+            server.state.publish(name)
+        for url in urls:
+            emitted += len(feedparser.parse(get(url).content).entries)
+    baseline = (time.perf_counter() - start, get.bytes, emitted)
+
+    # Cached: conditional requests, concurrent polls, only new entries emitted
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = FeedCache(os.path.join(tmp, "feeds.json"))
+        get = CountingGetter()
+        start = time.perf_counter()
+        emitted = 0
+        for _ in range(args.rounds):
+            for name in names[:args.changed]:
+                server.state.publish(name)
+            emitted += sum(len(r.new) for r in poll_feeds(cache, urls, get, workers=8))
+            cache.save()
+        cached = (time.perf_counter() - start, get.bytes, emitted)
+    server.shutdown()
+
+    print(f"{args.feeds} feeds x {args.rounds} rounds, {args.changed} feed(s) change per round")
+    for label, (elapsed, nbytes, n) in [("no cache", baseline), ("feed cache", cached)]:
+        print(f"{label:<11} {elapsed:6.2f}s  {nbytes / 1024:9.1f} KB downloaded  {n:6d} entries emitted")
+    print(f"bytes saved {1 - cached[1] / baseline[1]:.0%}, time saved {1 - cached[0] / baseline[0]:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Serial vs concurrent fetch_newsapi.py against the offline stub server.
+
+    python benchmarks/bench_fetch.py --latency 0.2 --workers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stub_server import start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub response delay in seconds")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--fail-first", type=int, default=1,
+                        help="make /flaky fail this many times to exercise retries")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency, fail_first=args.fail_first)
+    # Point the fetcher at the stub before it reads its settings
+    os.environ.update(NEWSAPI_URL=f"{base_url}/v2", GNEWS_URL=f"{base_url}/api/v4",
+                      NEWSAPI_KEY="stub", GNEWS_KEY="stub")
+    sys.path.insert(0, os.path.join(ROOT, "scripts"))
+    import fetch_newsapi
+
+    fetch_newsapi.BACKOFF_BASE = 0.05
+    feeds = [f"{base_url}/rss/feed{i}" for i in range(4)]
+
+    retried = fetch_newsapi.http_get("newsapi", f"{base_url}/flaky/retry")
+    print(f"retry check: status {retried.status_code} after {server.state.hits['/flaky/retry']} attempts")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, workers in [("serial", 1), ("concurrent", args.workers)]:
+            start = time.perf_counter()
+            articles = fetch_newsapi.main(workers, os.path.join(tmp, f"{label}.csv"), feeds,
+                                          os.path.join(tmp, f"{label}_feeds.json"))
+            results[label] = (time.perf_counter() - start, len(articles))
+    server.shutdown()
+
+    print()
+    for label, (elapsed, n) in results.items():
+        print(f"{label:<11} {elapsed:6.2f}s  {n} unique articles")
+    print(f"speedup     {results['serial'][0] / results['concurrent'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Folded NumPy scorer (linear_scorer.py) vs the sklearn transform + predict_proba path.
+
+Reports how far apart their probabilities are on the training script's
+held-out split (synthetic articles when data/cleaned_news.csv is only a
+git-lfs pointer), then single-document latency, batch throughput and the
+cold start of a fresh serving process. Parity itself is tested by
+tests/test_linear_scorer.py.
+
+    python benchmarks/bench_linear_scorer.py --docs 2000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import detector
+from linear_scorer import LinearScorer
+from model_bundle import export_bundle
+from synthetic import make_articles
+from text_cleaning import clean_texts
+
+DATA_FILE = os.path.join(ROOT, "data", "cleaned_news.csv")
+
+STARTUP = {
+    "sklearn": "import detector\nmodel, vectorizer = detector.load_artifacts()\n"
+               "detector.predict_proba(model, vectorizer, [SAMPLE])\n",
+    "folded": "import detector\nscorer = detector.load_scorer(BUNDLE)\ndetector.score_texts(scorer, [SAMPLE])\n",
+}
+
+
+def held_out_texts(limit):
+    """The test split train_model.py evaluates on, or synthetic articles without the real data."""
+    with open(DATA_FILE, encoding="utf-8", errors="replace") as f:
+        is_lfs_pointer = f.read(100).startswith("version https://git-lfs")
+    if is_lfs_pointer:
+        print("data/cleaned_news.csv is a git-lfs pointer; using synthetic articles")
+        return clean_texts(make_articles(limit, seed=7))
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from train_model import normalize_labels
+    df = normalize_labels(pd.read_csv(DATA_FILE))
+    _, X_test, _, _ = train_test_split(df["content"], df["label"], test_size=0.2, random_state=42, stratify=df["label"])
+    return X_test.tolist()[:limit]
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def startup_ms(kind, bundle_dir):
+    code = (
+        "import sys, time, warnings; warnings.filterwarnings('ignore'); start = time.perf_counter()\n"
+        f"sys.path.insert(0, {ROOT!r}); SAMPLE = 'the minister said on monday'; BUNDLE = {bundle_dir!r}\n"
+        + STARTUP[kind]
+        + "print((time.perf_counter() - start) * 1000, 'sklearn' in sys.modules)\n"
+    )
+    runs = [subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout.split()
+            for _ in range(3)]
+    return min(float(ms) for ms, _ in runs), runs[0][1] == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=2000)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    model, vectorizer = detector.load_artifacts()
+    texts = held_out_texts(args.docs)
+    with tempfile.TemporaryDirectory() as bundle_dir:
+        export_bundle(model, vectorizer, bundle_dir)
+        scorer = LinearScorer.load(bundle_dir)
+
+        expected = model.predict_proba(vectorizer.transform(texts))
+        got = scorer.predict_proba(texts)
+        diff = np.abs(expected - got).max()
+        same_labels = (expected.argmax(axis=1) == got.argmax(axis=1)).mean()
+        print(f"Parity on {len(texts)} docs: max |p diff| = {diff:.2e}, same label for {same_labels:.2%}")
+
+        single = texts[:200]
+        sk_single = best_of(lambda: [model.predict_proba(vectorizer.transform([t])) for t in single]) / len(single)
+        np_single = best_of(lambda: [scorer.predict_proba([t]) for t in single]) / len(single)
+        sk_batch = best_of(lambda: model.predict_proba(vectorizer.transform(texts)))
+        np_batch = best_of(lambda: scorer.predict_proba(texts))
+
+        print(f"{'':<10} {'single doc':>12} {'batch docs/s':>14} {'cold start':>12} {'imports sklearn':>16}")
+        for name, one, batch in (("sklearn", sk_single, sk_batch), ("folded", np_single, np_batch)):
+            ms, imports_sklearn = startup_ms(name, bundle_dir)
+            print(f"{name:<10} {one * 1e6:>10.0f}us {len(texts) / batch:>14,.0f} {ms:>10.0f}ms {str(imports_sklearn):>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Request latency by input size: whole-text scoring vs the token budget.
+
+Times what app.py does for one "Check News" click (gibberish and sensitive
+rules, cleaning, scoring) on pasted articles from 1 KB to 5 MB, once over the
+whole text as before and once through long_document in each mode. With the
+budget, p99 should stop growing once the input is past the budget.
+
+    python benchmarks/bench_long_document.py --sizes 1k,10k,100k,1m,5m --repeat 20
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import detector
+import long_document
+from synthetic import make_articles
+from text_cleaning import clean_text
+
+UNITS = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(value):
+    value = value.strip().lower()
+    return int(value[:-1]) * UNITS[value[-1]] if value[-1] in UNITS else int(value)
+
+
+def unbounded(scorer, text):
+    detector.is_gibberish(text)
+    detector.find_sensitive_terms(text)
+    return detector.score_cleaned(scorer, [clean_text(text)])[0]
+
+
+def budgeted(scorer, text, mode):
+    tokens, chars_read, budget_hit = long_document.budget_tokens(text)
+    checked = text[:chars_read]
+    detector.is_gibberish(checked)
+    detector.find_sensitive_terms(checked)
+    return long_document.score_tokens(scorer, tokens, budget_hit, mode)
+
+
+def percentiles(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return np.percentile(times, 50) * 1000, np.percentile(times, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1k,10k,100k,1m,5m", help="input sizes in characters")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    scorer = detector.load_scorer()
+    corpus = " ".join(make_articles(2000, seed=5))
+    print(f"token budget {long_document.TOKEN_BUDGET}, chunks of {long_document.CHUNK_TOKENS} tokens")
+    print(f"{'size':>8} {'whole p50':>10} {'whole p99':>10} {'trunc p50':>10} {'trunc p99':>10} "
+          f"{'chunk p50':>10} {'chunk p99':>10}  budget hit")
+    for size in [parse_size(s) for s in args.sizes.split(",")]:
+        text = (corpus * (size // len(corpus) + 1))[:size]
+        # Whole-text scoring of multi-MB inputs takes seconds; fewer repeats keep the run short
+        whole_repeat = max(3, min(args.repeat, 2_000_000 // size))
+        whole = percentiles(lambda: unbounded(scorer, text), whole_repeat)
+        trunc = percentiles(lambda: budgeted(scorer, text, "truncate"), args.repeat)
+        chunk = percentiles(lambda: budgeted(scorer, text, "chunk"), args.repeat)
+        hit = long_document.budget_tokens(text)[2]
+        cells = " ".join(f"{ms:>8.1f}ms" for ms in whole + trunc + chunk)
+        print(f"{size:>8,} {cells}  {hit}")
+
+
+if __name__ == "__main__":
+    main()
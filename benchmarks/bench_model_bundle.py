@@ -0,0 +1,109 @@
+"""Cold start and per-process memory: joblib artifacts vs the mmap'd model bundle.
+
+Starts N worker processes for each loading path, waits until every one has
+loaded the model and scored a document, then reads RSS and PSS (resident
+memory with shared pages split between the processes that map them) from
+/proc/<pid>/smaps_rollup while they are all alive. Also checks that a
+BundleManager picks up a newly activated version.
+
+    python benchmarks/bench_model_bundle.py --processes 4
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SAMPLE = "The government announced a new policy on rural healthcare funding today"
+
+CHILD = {
+    "joblib": (
+        "import detector\n"
+        "model, vectorizer = detector.load_artifacts()\n"
+        "detector.predict_proba(model, vectorizer, [SAMPLE])\n"
+    ),
+    "bundle": (
+        "import detector, model_bundle\n"
+        "bundle = model_bundle.load_bundle(BUNDLE)\n"
+        "detector.predict_proba(bundle, bundle, [SAMPLE])\n"
+    ),
+}
+
+
+def smaps_mb(pid):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0][:-1]] = int(parts[1]) / 1024
+    return values
+
+
+def run_workers(kind, n, bundle_dir):
+    """Start n workers; returns (seconds until each was ready, [smaps per worker])."""
+    code = (
+        "import sys, warnings; warnings.filterwarnings('ignore')\n"
+        f"sys.path.insert(0, {ROOT!r}); SAMPLE = {SAMPLE!r}; BUNDLE = {bundle_dir!r}\n"
+        + CHILD[kind]
+        + "print('ready', flush=True); sys.stdin.read()\n"
+    )
+    procs, ready = [], []
+    for _ in range(n):
+        start = time.perf_counter()
+        p = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT, text=True,
+                             stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        p.stdout.readline()
+        ready.append(time.perf_counter() - start)
+        procs.append(p)
+    memory = [smaps_mb(p.pid) for p in procs]
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+    return ready, memory
+
+
+def check_hot_reload(bundle_dir):
+    import joblib
+    import model_bundle
+    model = joblib.load(os.path.join(ROOT, "models", "fake_news_model.joblib"))
+    vectorizer = joblib.load(os.path.join(ROOT, "models", "tfidf_vectorizer.joblib"))
+    manager = model_bundle.BundleManager(bundle_dir, check_interval=0)
+    before = manager.current().version
+    model.intercept_ = model.intercept_ + 0.5  # any change gives a new version
+    time.sleep(1)  # versions are timestamped to the second
+    after = model_bundle.export_bundle(model, vectorizer, bundle_dir)
+    swapped = manager.current().version
+    print(f"Hot reload: {before} -> {swapped} ({'ok' if swapped == after else 'FAILED'})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    import joblib
+    import model_bundle
+    with tempfile.TemporaryDirectory() as bundle_dir:
+        model_bundle.export_bundle(
+            joblib.load(os.path.join(ROOT, "models", "fake_news_model.joblib")),
+            joblib.load(os.path.join(ROOT, "models", "tfidf_vectorizer.joblib")),
+            bundle_dir,
+        )
+        print(f"{'path':<8} {'cold start':>11} {'RSS/proc':>10} {'PSS/proc':>10} {'PSS total':>10}")
+        for kind in ("joblib", "bundle"):
+            ready, memory = run_workers(kind, args.processes, bundle_dir)
+            rss = sum(m["Rss"] for m in memory) / len(memory)
+            pss = sum(m["Pss"] for m in memory)
+            print(f"{kind:<8} {min(ready) * 1000:>9.0f}ms {rss:>8.1f}MB {pss / len(memory):>8.1f}MB {pss:>8.1f}MB")
+        check_hot_reload(bundle_dir)
+
+
+if __name__ == "__main__":
+    main()
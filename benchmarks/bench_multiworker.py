@@ -0,0 +1,110 @@
+"""Throughput and per-worker memory of `scoring_service.py --workers N`.
+
+Starts the service with 1, 4 and 16 workers sharing one model copy (plus the
+single-process joblib service as a baseline), drives it from `--clients`
+client processes for `--seconds`, and reads RSS and PSS of every serving
+process from /proc/<pid>/smaps_rollup while it is loaded. Throughput can only
+scale up to the number of cores; the CPU count is printed with the results.
+
+    python benchmarks/bench_multiworker.py --workers 1 4 16 --clients 8 --seconds 10
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_model_bundle import smaps_mb
+from synthetic import make_articles
+
+
+def start_service(workers, port):
+    """Start the service; returns (process, serving pids) once it accepts requests."""
+    cmd = [sys.executable, "-W", "ignore", "scoring_service.py", "--port", str(port)]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.PIPE, text=True,
+                            env=dict(os.environ, PYTHONUNBUFFERED="1"))
+    line = proc.stdout.readline()
+    if "listening" not in line:
+        line = proc.stdout.readline()  # single-process mode may print the bundle version first
+    if "listening" not in line:
+        proc.kill()
+        raise SystemExit(f"service did not start: {line!r}")
+    pids = [int(p) for p in line.rsplit("pids", 1)[1].strip(" )\n").split()] if workers else [proc.pid]
+    return proc, pids
+
+
+def client(port, texts, batch, seconds, seed):
+    """Send /predict/batch requests until `seconds` pass; returns (docs scored, latencies)."""
+    rng = random.Random(seed)
+    docs, latencies = 0, []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        body = json.dumps({"texts": rng.sample(texts, batch)})
+        start = time.perf_counter()
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        conn.request("POST", "/predict/batch", body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        latencies.append(time.perf_counter() - start)
+        if response.status == 200:
+            docs += batch
+    return docs, latencies
+
+
+def run(workers, args, texts, port):
+    proc, pids = start_service(workers, port)
+    try:
+        client(port, texts, args.batch, 1.0, seed=0)  # warm up
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(args.clients) as pool:
+            pending = pool.starmap_async(client, [(port, texts, args.batch, args.seconds, seed)
+                                                  for seed in range(1, args.clients + 1)])
+            time.sleep(args.seconds / 2)
+            memory = [smaps_mb(pid) for pid in pids]  # sampled under load
+            results = pending.get()
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=60)
+    docs = sum(d for d, _ in results)
+    latencies = sorted(l for _, ls in results for l in ls)
+    return {
+        "docs_per_s": docs / args.seconds,
+        "p50_ms": 1000 * latencies[len(latencies) // 2],
+        "p99_ms": 1000 * latencies[int(len(latencies) * 0.99)],
+        "rss_mb": sum(m["Rss"] for m in memory) / len(memory),
+        "pss_mb": sum(m["Pss"] for m in memory) / len(memory),
+        "total_pss_mb": sum(m["Pss"] for m in memory),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--clients", type=int, default=8, help="load-generating processes")
+    parser.add_argument("--batch", type=int, default=16, help="documents per request")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    texts = make_articles(2000, seed=5, min_words=80, max_words=400)
+    print(f"{os.cpu_count()} CPUs, {args.clients} clients x {args.batch} docs per request, {args.seconds:.0f}s each")
+    print(f"{'mode':<16} {'docs/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'RSS/proc':>9} {'PSS/proc':>9} {'PSS total':>10}")
+    for label, workers in [("single (joblib)", 0)] + [(f"{n} workers", n) for n in args.workers]:
+        r = run(workers, args, texts, args.port)
+        print(f"{label:<16} {r['docs_per_s']:>8.0f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+              f"{r['rss_mb']:>7.1f}MB {r['pss_mb']:>7.1f}MB {r['total_pss_mb']:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Scaling of the MinHash/LSH near-duplicate index.
+
+Inserts N synthetic articles plus 1% lightly edited copies at each size and
+reports throughput (should stay roughly flat, i.e. near-linear total time),
+recall on the edited copies, false positives, and save/load cost.
+
+    python benchmarks/bench_near_dup.py --sizes 10000,100000,1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_dup import NearDuplicateIndex
+from synthetic import make_articles
+from text_cleaning import clean_texts
+
+
+def edit(text, rng, fraction=0.02):
+    words = text.split()
+    for _ in range(max(1, int(len(words) * fraction))):
+        words[rng.randrange(len(words))] = "edited"
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    print(f"{'docs':>9} {'docs/s':>9} {'total s':>8} {'recall':>7} {'false +':>8} {'index MB':>9} {'load s':>7}")
+    for n in map(int, args.sizes.split(",")):
+        rng = random.Random(n)
+        docs = clean_texts(make_articles(n, seed=n, min_words=60, max_words=300))
+        copies = [edit(docs[rng.randrange(n)], rng) for _ in range(max(1, n // 100))]
+
+        index = NearDuplicateIndex(args.threshold)
+        start = time.perf_counter()
+        unique_kept = index.filter_new(docs).sum()
+        copies_kept = index.filter_new(copies).sum()
+        elapsed = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.npz")
+            index.save(path)
+            size_mb = os.path.getsize(path) / 1024 ** 2
+            start = time.perf_counter()
+            NearDuplicateIndex.load(path)
+            load = time.perf_counter() - start
+
+        total = n + len(copies)
+        print(f"{n:>9} {total / elapsed:>9.0f} {elapsed:>8.1f} {1 - copies_kept / len(copies):>7.1%} "
+              f"{n - unique_kept:>8} {size_mb:>9.1f} {load:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
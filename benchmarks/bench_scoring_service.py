@@ -0,0 +1,51 @@
+"""Compare one-at-a-time scoring with micro-batched scoring.
+
+    python benchmarks/bench_scoring_service.py --docs 5000 --clients 32
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import detector
+from scoring_service import MicroBatcher, make_predict_fn
+from synthetic import make_articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    model, vectorizer = detector.load_artifacts()
+    predict_fn = make_predict_fn(model, vectorizer)
+    texts = make_articles(args.docs, min_words=10, max_words=60)
+
+    # One document per sklearn call, as app.py does per click
+    start = time.perf_counter()
+    for text in texts:
+        predict_fn([text])
+    single = time.perf_counter() - start
+
+    # Same documents from concurrent clients through the micro-batcher
+    batcher = MicroBatcher(predict_fn, args.max_batch_size, args.max_wait_ms)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        list(pool.map(batcher.predict, texts))
+    batched = time.perf_counter() - start
+    batcher.close()
+
+    print(f"one-at-a-time : {args.docs / single:10.1f} docs/s ({single:.2f}s)")
+    print(f"micro-batched : {args.docs / batched:10.1f} docs/s ({batched:.2f}s, "
+          f"{args.clients} clients, mean batch {batcher.items / max(batcher.batches, 1):.1f})")
+    print(f"speedup       : {single / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
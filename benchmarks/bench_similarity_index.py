@@ -0,0 +1,91 @@
+"""Similarity index: build time, size, query latency and recall against brute force.
+
+Fits a TF-IDF vectorizer on a synthetic corpus, builds the index, then queries
+it with exact copies and with paraphrases (a share of the words dropped and a
+few swapped) of corpus documents. Recall@1 is the share of queries whose source
+document comes back first; "top-k captured" is the exact cosine similarity
+(full TF-IDF vectors) of the index's top k as a share of the best possible
+top k from a brute-force search. On synthetic text ranks 2..k are near-ties,
+so comparing the sets themselves says little.
+
+    python benchmarks/bench_similarity_index.py --docs 50000 --queries 500
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import similarity_index
+from similarity_index import SimilarityIndex, query_vector
+from synthetic import make_labeled_corpus
+from text_cleaning import clean_texts
+
+
+def paraphrase(text, rng, drop=0.15, swaps=3):
+    words = [w for w in text.split() if rng.random() > drop]
+    for _ in range(swaps):
+        i, j = rng.randrange(len(words)), rng.randrange(len(words))
+        words[i], words[j] = words[j], words[i]
+    return " ".join(words)
+
+
+def percentile(values, q):
+    return 1000 * float(np.percentile(values, q))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_labeled_corpus(args.docs, seed=17)
+    texts = clean_texts([content for content, _ in rows])
+    labels = [label for _, label in rows]
+    vectorizer = TfidfVectorizer(max_features=20000, ngram_range=(1, 2))
+    matrix = vectorizer.fit_transform(texts)
+
+    start = time.perf_counter()
+    index = SimilarityIndex(similarity_index.scorer_fingerprint(vectorizer), matrix.shape[1])
+    index.add(matrix, labels, texts)
+    build_s = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, similarity_index.INDEX_NAME)
+        index.save(path)
+        size_mb = os.path.getsize(path) / 1024 ** 2
+        start = time.perf_counter()
+        index = SimilarityIndex.load(path)
+        load_s = time.perf_counter() - start
+    print(f"{args.docs:,} docs: build {build_s:.1f}s, {size_mb:.1f} MB on disk, load {load_s * 1000:.0f} ms")
+
+    rng = random.Random(3)
+    sources = rng.sample(range(args.docs), args.queries)
+    for kind, make_query in (("exact copy", lambda t: t), ("paraphrase", lambda t: paraphrase(t, rng))):
+        queries = [make_query(texts[i]) for i in sources]
+        latencies, hits, agreement, truncated = [], 0, 0.0, 0
+        for source, query in zip(sources, queries):
+            start = time.perf_counter()
+            matches, complete = index.query(*query_vector(vectorizer, query), k=args.k)
+            latencies.append(time.perf_counter() - start)
+            truncated += not complete
+            found = [m["row"] for m in matches]
+            hits += bool(found) and found[0] == source
+            cosine = (matrix @ vectorizer.transform([query]).T).toarray().ravel()
+            agreement += cosine[found].sum() / np.sort(cosine)[-args.k:].sum()
+        print(f"{kind:<11} recall@1 {hits / len(queries):.3f}  top-{args.k} captured {agreement / len(queries):.3f}  "
+              f"p50 {percentile(latencies, 50):.2f} ms  p99 {percentile(latencies, 99):.2f} ms  "
+              f"budget hit {truncated}/{len(queries)} (budget {similarity_index.QUERY_BUDGET_MS:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Latency of sensitive-term matching as the term list grows from 25 to 50k.
+
+Compares the old per-keyword substring scan with term_matcher.TermMatcher.
+
+    python benchmarks/bench_term_matcher.py --sizes 25,1000,10000,50000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import make_articles
+from term_matcher import TermMatcher
+
+SYLLABLES = "ka ri to me lan sha vo ne du pe zi mor tan bel ash qui ron".split()
+
+
+def substring_scan(terms, text):
+    """What contains_sensitive_claim() did before: `word in text` for every term."""
+    text = text.lower()
+    for word in terms:
+        if word in text:
+            return True
+    return False
+
+
+def make_terms(n, base, seed=0):
+    rng = random.Random(seed)
+    terms = list(base)
+    while len(terms) < n:
+        name = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+        terms.append(name if rng.random() < 0.6 else f"{name} {''.join(rng.choices(SYLLABLES, k=3))}")
+    return terms[:n]
+
+
+def per_call_us(fn, texts, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="25,1000,10000,50000")
+    parser.add_argument("--texts", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT, "config", "sensitive_terms.json"), encoding="utf-8") as f:
+        config = json.load(f)
+    base = config["sensitive_keywords"] + config["public_figures"]
+    texts = make_articles(args.texts, min_words=30, max_words=300)
+
+    print(f"{'terms':>7} {'substring scan (us)':>20} {'TermMatcher (us)':>17} {'build (ms)':>11}")
+    for n in map(int, args.sizes.split(",")):
+        terms = make_terms(n, base)
+        start = time.perf_counter()
+        matcher = TermMatcher(terms)
+        build = (time.perf_counter() - start) * 1000
+        scan = per_call_us(lambda t: substring_scan(terms, t), texts, repeat=1)
+        fast = per_call_us(matcher.find, texts)
+        print(f"{n:>7} {scan:>20.1f} {fast:>17.1f} {build:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Throughput of text normalization against the old three-pass regex version.
+
+Serving/training parity is checked by tests/test_text_cleaning.py.
+
+    python benchmarks/bench_text_cleaning.py --docs 1000000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_cleaning import clean_series, clean_text, clean_texts
+from synthetic import make_articles
+
+
+def legacy_clean_text(text):
+    """The three-pass regex version training used before text_cleaning.py."""
+    text = str(text).lower()
+    text = re.sub(r'http\S+', ' ', text)
+    text = re.sub(r'[^a-z\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def timed(label, fn, n):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {n / elapsed:12.0f} docs/s ({elapsed:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"Generating {args.docs} synthetic articles...")
+    docs = make_articles(args.docs)
+    series = pd.Series(docs)
+
+    timed("legacy regex (.map)", lambda: series.map(legacy_clean_text), args.docs)
+    timed("clean_series", lambda: clean_series(series), args.docs)
+    timed("clean_texts (batch)", lambda: clean_texts(docs), args.docs)
+    timed("clean_text (loop)", lambda: [clean_text(d) for d in docs], args.docs)
+
+
+if __name__ == "__main__":
+    main()
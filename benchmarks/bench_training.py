@@ -0,0 +1,51 @@
+"""Peak RSS and wall time of train_model.py in memory vs streaming mode.
+
+Both modes run as separate processes on the same synthetic corpus so their
+peak RSS figures are comparable.
+
+    python benchmarks/bench_training.py --rows 200000
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import write_labeled_csv
+
+RESULT_RE = re.compile(r"\[(\w+)\] wall time: ([\d.]+)s, peak RSS: (\S+)")
+
+
+def run_mode(mode, data_file, out_dir, extra):
+    cmd = [sys.executable, os.path.join(ROOT, "train_model.py"), "--mode", mode, "--data", data_file,
+           "--model-out", os.path.join(out_dir, f"{mode}_model.joblib"),
+           "--vectorizer-out", os.path.join(out_dir, f"{mode}_vectorizer.joblib")] + extra
+    env = dict(os.environ, MPLBACKEND="Agg")  # plt.show() becomes a no-op
+    out = subprocess.run(cmd, capture_output=True, text=True, env=env, check=True).stdout
+    match = RESULT_RE.search(out)
+    accuracy = re.search(r"accuracy\s+([\d.]+)", out)
+    return match.group(2), match.group(3), accuracy.group(1) if accuracy else "n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunksize", type=int, default=5_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = write_labeled_csv(os.path.join(tmp, "corpus.csv"), args.rows)
+        size_mb = os.path.getsize(data_file) / 1024 ** 2
+        print(f"Synthetic corpus: {args.rows} rows, {size_mb:.1f} MB")
+        print(f"{'mode':<10} {'wall (s)':>10} {'peak RSS':>12} {'accuracy':>10}")
+        for mode, extra in [("memory", []), ("streaming", ["--chunksize", str(args.chunksize)])]:
+            wall, rss, acc = run_mode(mode, data_file, tmp, extra)
+            print(f"{mode:<10} {wall:>10} {rss + ' MB':>12} {acc:>10}")
+
+
+if __name__ == "__main__":
+    main()
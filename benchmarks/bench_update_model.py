@@ -0,0 +1,81 @@
+"""Refresh-to-deploy time: full retrain vs update_model.py after a small dataset refresh.
+
+Trains on a synthetic corpus, appends `--delta` rows the way
+`update_dataset.py --incremental` does, then times both ways of deploying a
+model that has seen them: rerunning train_model.py on everything, and
+update_model.py on just the new rows. Both run as fresh processes and include
+the joblib save and bundle export.
+
+    python benchmarks/bench_update_model.py --rows 20000 --delta 300
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import make_labeled_corpus
+
+
+def timed(cmd):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable] + cmd, cwd=ROOT, capture_output=True, text=True,
+                          env=dict(os.environ, MPLBACKEND="Agg"))
+    elapsed = time.perf_counter() - start
+    if proc.returncode:
+        raise SystemExit(f"{cmd[0]} failed:\n{proc.stdout}\n{proc.stderr}")
+    return elapsed, proc.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000, help="corpus size before the refresh")
+    parser.add_argument("--delta", type=int, default=300, help="rows added by the refresh")
+    args = parser.parse_args()
+
+    rows = make_labeled_corpus(args.rows + args.delta, seed=31)
+    with tempfile.TemporaryDirectory() as tmp:
+        data = os.path.join(tmp, "cleaned_news.csv")
+        with open(data, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["content", "label"])
+            writer.writerows(rows[:args.rows])
+
+        def paths(name):
+            model_dir = os.path.join(tmp, name)
+            os.makedirs(model_dir, exist_ok=True)
+            return (os.path.join(model_dir, "fake_news_model.joblib"), os.path.join(model_dir, "tfidf_vectorizer.joblib"),
+                    os.path.join(model_dir, "bundle"))
+
+        model, vectorizer, bundle = paths("incremental")
+        timed(["train_model.py", "--data", data, "--model-out", model, "--vectorizer-out", vectorizer, "--bundle-dir", bundle])
+        with open(data, "a", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerows(rows[args.rows:])
+
+        update_s, output = timed(["update_model.py", "--data", data, "--model", model, "--vectorizer", vectorizer,
+                                  "--bundle-dir", bundle])
+        with open(os.path.join(os.path.dirname(model), "model_meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        print(output.strip())
+
+        full_model, full_vectorizer, full_bundle = paths("full")
+        full_s, _ = timed(["train_model.py", "--data", data, "--model-out", full_model,
+                           "--vectorizer-out", full_vectorizer, "--bundle-dir", full_bundle])
+        with open(os.path.join(os.path.dirname(full_model), "model_meta.json"), encoding="utf-8") as f:
+            full_meta = json.load(f)
+
+    print(f"\n{args.rows:,} rows + {args.delta} new")
+    print(f"{'':<14} {'seconds':>8} {'holdout acc':>12}")
+    print(f"{'full retrain':<14} {full_s:>8.1f} {full_meta['holdout_accuracy']:>12.4f}")
+    print(f"{'update_model':<14} {update_s:>8.1f} {meta['holdout_accuracy']:>12.4f}   ({meta['kind']})")
+    print("Holdouts differ: the full retrain draws a new one from the grown corpus")
+
+
+if __name__ == "__main__":
+    main()
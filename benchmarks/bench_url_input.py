@@ -0,0 +1,77 @@
+"""URL input: cold fetch vs cache hit, concurrent identical links, fetch budget.
+
+Runs article_fetch.ArticleFetcher against the local stub server:
+- one cold fetch + extraction of an article page, then repeated cache hits
+- `--clients` threads pasting the same link at once (downloads counted by the stub)
+- a server slower than the budget, and a page whose body trickles in, each
+  of which must be given up on within the budget
+- the same stub link without the allowlist, which must be refused as a local address
+
+    python benchmarks/bench_url_input.py --clients 50 --latency 0.3 --budget 1
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from article_fetch import ArticleFetcher, FetchError
+from stub_server import start_stub_server
+
+STUB_HOSTS = {"127.0.0.1"}  # the stub is local, so it has to be allowed explicitly
+
+
+def timed_fetch(fetcher, url):
+    """(seconds, article or the FetchError message)."""
+    start = time.perf_counter()
+    try:
+        result = fetcher.fetch(url)
+    except FetchError as e:
+        result = str(e)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--budget", type=float, default=1.0)
+    parser.add_argument("--hits", type=int, default=1000)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    fetcher = ArticleFetcher(budget=args.budget, allowed_hosts=STUB_HOSTS)
+
+    url = f"{base_url}/site/host0/article/1"
+    cold, article = timed_fetch(fetcher, url)
+    hits = [timed_fetch(fetcher, url)[0] for _ in range(args.hits)]
+    print(f"cold fetch + extract {cold * 1000:.0f} ms ({len(article['text'])} chars), "
+          f"cache hit p50 {np.percentile(hits, 50) * 1e6:.0f} µs, p99 {np.percentile(hits, 99) * 1e6:.0f} µs")
+
+    server.state.hits.clear()
+    viral = f"{base_url}/site/host0/article/2"
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        results = list(pool.map(lambda _: timed_fetch(fetcher, viral), range(args.clients)))
+    ok = sum(isinstance(r, dict) for _, r in results)
+    print(f"{args.clients} concurrent requests for one link: {server.state.hits.get('/site/host0/article/2', 0)} "
+          f"download(s), {ok}/{args.clients} answered, slowest {max(s for s, _ in results) * 1000:.0f} ms")
+    server.shutdown()
+
+    slow_server, slow_url = start_stub_server(latency=args.budget * 3)
+    drip_server, drip_url = start_stub_server(drip=args.budget / 2)
+    for label, target in (("slow server", f"{slow_url}/site/host0/article/3"), ("trickling body", f"{drip_url}/drip/1")):
+        seconds, result = timed_fetch(ArticleFetcher(budget=args.budget, allowed_hosts=STUB_HOSTS), target)
+        print(f"{label:<15} gave up after {seconds:.2f}s (budget {args.budget:g}s): {result}")
+    slow_server.shutdown()
+    drip_server.shutdown()
+
+    _, result = timed_fetch(ArticleFetcher(budget=args.budget), url)
+    print(f"{'no allowlist':<15} {result}")
+
+
+if __name__ == "__main__":
+    main()
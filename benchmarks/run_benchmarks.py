@@ -0,0 +1,347 @@
+"""Reproducible benchmark suite for the cleaning → vectorizing → scoring → ingest → training pipeline.
+
+Every benchmark runs on deterministic synthetic corpora (benchmarks/synthetic.py,
+no network) at each requested size and records the best of `--repeat` runs.
+Results go to a JSON file; `compare` flags cases that got slower.
+
+    python benchmarks/run_benchmarks.py run --sizes 1k,100k,1M
+    python benchmarks/run_benchmarks.py run --sizes 1k --only clean_text,app_request
+    python benchmarks/run_benchmarks.py compare benchmarks/results/a.json benchmarks/results/b.json
+
+Benchmarks: clean_text (regex reference, clean_text, clean_texts,
+clean_series), vectorizer_transform, predict_proba (sklearn and the folded
+NumPy scorer), app_request (gibberish check, sensitive-term check, full
+uncached request as app.py serves it), update_dataset (full rebuild, then an
+incremental run with 10% new rows) and training (in-memory up to
+--train-memory-max rows, streaming at every size).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+import numpy as np
+import pandas as pd
+
+import detector
+from synthetic import make_articles, make_labeled_corpus
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_SIZES = "1k,100k,1M"
+DEFAULT_THRESHOLD = 0.10  # a case more than 10% slower than the baseline is a regression
+MIN_SECONDS = 0.05  # timings this short are too noisy to call regressions
+MAX_REQUESTS = 2000  # single-request benchmarks time at most this many requests per size
+TRAIN_MEMORY_MAX = 100_000
+SEED = 42
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+
+def size_label(n):
+    for unit, div in (("M", 1_000_000), ("k", 1_000)):
+        if n >= div and n % div == 0:
+            return f"{n // div}{unit}"
+    return str(n)
+
+
+class Context:
+    """Lazily built, shared inputs for one corpus size."""
+
+    def __init__(self, size, tmp_dir, args):
+        self.size = size
+        self.tmp_dir = tmp_dir
+        self.args = args
+        self.repeat = args.repeat if size <= 100_000 else 1
+        self._cache = {}
+
+    def _get(self, key, build):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    @property
+    def articles(self):
+        return self._get("articles", lambda: make_articles(self.size, SEED, self.args.min_words, self.args.max_words))
+
+    @property
+    def cleaned(self):
+        return self._get("cleaned", lambda: detector.clean_texts(self.articles))
+
+    @property
+    def requests(self):
+        return self.articles[:MAX_REQUESTS]
+
+    @property
+    def labeled_csv(self):
+        def build():
+            path = os.path.join(self.tmp_dir, f"labeled_{self.size}.csv")
+            rows = make_labeled_corpus(self.size, SEED, self.args.min_words, self.args.max_words)
+            pd.DataFrame(rows, columns=["content", "label"]).to_csv(path, index=False)
+            return path
+        return self._get("labeled_csv", build)
+
+
+def measure(fn, repeat, setup=None):
+    """Best and all wall times of `repeat` calls; `setup` runs untimed before each."""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return min(runs), runs
+
+
+@contextlib.contextmanager
+def quiet():
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        yield
+
+
+# ---------------------------
+# Benchmarks: each yields (case, items, fn) or (case, items, fn, setup)
+# ---------------------------
+@benchmark("clean_text")
+def bench_clean_text(ctx):
+    from bench_text_cleaning import legacy_clean_text
+    from text_cleaning import clean_series, clean_text, clean_texts
+    articles = ctx.articles
+    series = pd.Series(articles)
+    yield "legacy_regex", len(articles), lambda: [legacy_clean_text(a) for a in articles]
+    yield "clean_text", len(articles), lambda: [clean_text(a) for a in articles]
+    yield "clean_texts", len(articles), lambda: clean_texts(articles)
+    yield "clean_series", len(articles), lambda: clean_series(series)
+
+
+@benchmark("vectorizer_transform")
+def bench_vectorizer_transform(ctx):
+    _, vectorizer = ctx._get("artifacts", detector.load_artifacts)
+    cleaned = ctx.cleaned
+    yield "tfidf_transform", len(cleaned), lambda: vectorizer.transform(cleaned)
+
+
+@benchmark("predict_proba")
+def bench_predict_proba(ctx):
+    from linear_scorer import LinearScorer
+    from model_bundle import export_bundle
+    model, vectorizer = ctx._get("artifacts", detector.load_artifacts)
+    cleaned = ctx.cleaned
+    X = vectorizer.transform(cleaned)
+    bundle_dir = os.path.join(ctx.tmp_dir, "bundle")
+    if not os.path.exists(bundle_dir):
+        export_bundle(model, vectorizer, bundle_dir)
+    scorer = LinearScorer.load(bundle_dir)
+    yield "sklearn_predict_proba", len(cleaned), lambda: model.predict_proba(X)
+    yield "sklearn_transform_predict", len(cleaned), lambda: model.predict_proba(vectorizer.transform(cleaned))
+    yield "folded_scorer", len(cleaned), lambda: scorer.predict_proba(cleaned)
+
+
+@benchmark("app_request")
+def bench_app_request(ctx):
+    scorer = ctx._get("scorer", detector.load_scorer)
+    requests = ctx.requests
+
+    def request(text):
+        # Same order of checks as the app.py button handler, without the prediction cache
+        if not text.strip() or detector.is_gibberish(text) or detector.find_sensitive_terms(text):
+            return None
+        return scorer.predict_proba([detector.clean_text(text)])[0]
+
+    yield "is_gibberish", len(requests), lambda: [detector.is_gibberish(t) for t in requests]
+    yield "contains_sensitive_claim", len(requests), lambda: [detector.contains_sensitive_claim(t) for t in requests]
+    yield "full_request", len(requests), lambda: [request(t) for t in requests]
+
+
+@benchmark("update_dataset")
+def bench_update_dataset(ctx):
+    import update_dataset
+    work = os.path.join(ctx.tmp_dir, "update_dataset")
+    articles = ctx.articles
+    n_new = max(1, len(articles) // 10)
+
+    def setup():
+        # Fresh data/ with real and fake sources; the last 10% arrive in a later file
+        data = os.path.join(work, "data")
+        shutil.rmtree(work, ignore_errors=True)
+        os.makedirs(data)
+        base = articles[:-n_new]
+        half = len(base) // 2
+        pd.DataFrame({"title": "", "text": base[:half]}).to_csv(os.path.join(data, "real_news.csv"), index=False)
+        pd.DataFrame({"title": "", "text": base[half:]}).to_csv(os.path.join(data, "fake_news.csv"), index=False)
+
+    def run(fn):
+        cwd = os.getcwd()
+        os.chdir(work)
+        try:
+            with quiet():
+                fn()
+        finally:
+            os.chdir(cwd)
+
+    def setup_incremental():
+        setup()
+        run(update_dataset.full_update)
+        pd.DataFrame({"title": "", "text": articles[-n_new:]}).to_csv(
+            os.path.join(work, "data", "new_real_rss.csv"), index=False)
+
+    yield "full_update", len(articles) - n_new, lambda: run(update_dataset.full_update), setup
+    yield "incremental_update", n_new, lambda: run(update_dataset.incremental_update), setup_incremental
+
+
+@benchmark("training")
+def bench_training(ctx):
+    with quiet():
+        import train_model
+    data_file = ctx.labeled_csv
+
+    def fit(train):
+        with quiet():
+            train(data_file)
+
+    if ctx.size <= ctx.args.train_memory_max:
+        yield "in_memory", ctx.size, lambda: fit(train_model.train_in_memory)
+    yield "streaming", ctx.size, lambda: fit(train_model.train_streaming)
+
+
+# ---------------------------
+# Run & compare
+# ---------------------------
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    import sklearn
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "seed": SEED,
+    }
+
+
+def run(args):
+    warnings.filterwarnings("ignore")  # e.g. sklearn version mismatch when unpickling the shipped model
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise SystemExit(f"Unknown benchmarks: {', '.join(sorted(unknown))} (available: {', '.join(BENCHMARKS)})")
+    sizes = [parse_size(s) for s in args.sizes.split(",")]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            ctx = Context(size, tmp_dir, args)
+            print(f"\n== {size_label(size)} articles ==")
+            for name in names:
+                for case, items, fn, *setup in BENCHMARKS[name](ctx):
+                    best, runs = measure(fn, ctx.repeat, *setup)
+                    key = f"{name}/{case}@{size_label(size)}"
+                    results[key] = {
+                        "benchmark": name, "case": case, "size": size, "items": items,
+                        "seconds": best, "runs": runs, "items_per_second": items / best if best else None,
+                    }
+                    print(f"{key:<50} {best:10.4f}s {items / best:14,.0f} items/s")
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{environment()['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"\nResults written to {out}")
+
+
+def compare(args):
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+    base, new = baseline["results"], candidate["results"]
+    print(f"baseline:  {args.baseline} (commit {baseline['environment'].get('commit')})")
+    print(f"candidate: {args.candidate} (commit {candidate['environment'].get('commit')})\n")
+
+    regressions = 0
+    print(f"{'case':<50} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    for key in sorted(set(base) | set(new)):
+        if key not in base or key not in new:
+            print(f"{key:<50} {'only in ' + ('candidate' if key in new else 'baseline'):>30}")
+            continue
+        before, after = base[key]["seconds"], new[key]["seconds"]
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if max(before, after) < args.min_seconds:
+            flag = "  (below noise floor)"
+        elif change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(f"{key:<50} {before:9.4f}s {after:9.4f}s {change:+7.1%}{flag}")
+
+    print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline benchmark suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("run", help="run benchmarks and write a results JSON")
+    p.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated corpus sizes, e.g. 1k,100k,1M")
+    p.add_argument("--only", help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    p.add_argument("--repeat", type=int, default=3, help="runs per case (sizes above 100k run once)")
+    p.add_argument("--min-words", type=int, default=20)
+    p.add_argument("--max-words", type=int, default=200)
+    p.add_argument("--train-memory-max", type=int, default=TRAIN_MEMORY_MAX,
+                   help="largest size trained in memory; bigger corpora only run the streaming trainer")
+    p.add_argument("--out", help=f"results file (default: {os.path.relpath(RESULTS_DIR, ROOT)}/<time>-<commit>.json)")
+    p = sub.add_parser("compare", help="flag cases that got slower between two result files")
+    p.add_argument("baseline")
+    p.add_argument("candidate")
+    p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                   help="relative slowdown that counts as a regression")
+    p.add_argument("--min-seconds", type=float, default=MIN_SECONDS,
+                   help="cases faster than this in both runs are never flagged")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Local stand-in for NewsAPI, GNews, RSS feeds and news sites.
+
+Lets the fetchers and scrapers be exercised offline with controllable latency
+and failures:
+
+    from stub_server import start_stub_server
+    server, base_url = start_stub_server(latency=0.2)
+    ...
+    server.shutdown()
+
+or standalone: python benchmarks/stub_server.py --port 8800 --latency 0.2
+
+Routes
+    /v2/top-headlines?page=&pageSize=      NewsAPI-shaped JSON
+    /api/v4/search?page=&max=              GNews-shaped JSON
+    /rss/<name>                            RSS 2.0 with ETag / Last-Modified
+    /site/<host>/section                   section page linking to articles
+    /site/<host>/article/<n>               article HTML page
+    /flaky/<key>                           503 for the first `fail_first` hits
+    /drip/<n>                              article HTML sent one paragraph every `drip` seconds
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from synthetic import make_article
+
+TOTAL_RESULTS = 250
+ARTICLES_PER_SECTION = 20
+
+
+def _article(seed):
+    rng = random.Random(seed)
+    return make_article(rng, 30, 120)
+
+
+class StubState:
+    def __init__(self, latency=0.0, fail_first=0, feed_items=20, drip=0.2):
+        self.latency = latency
+        self.drip = drip
+        self.fail_first = fail_first
+        self.feed_items = feed_items
+        self.feed_version = {}  # feed name -> bump to publish new items
+        self.hits = {}
+        self.lock = threading.Lock()
+
+    def hit(self, key):
+        with self.lock:
+            self.hits[key] = self.hits.get(key, 0) + 1
+            return self.hits[key]
+
+    def publish(self, feed, n=1):
+        """Add `n` new items to a feed (changes its ETag)."""
+        with self.lock:
+            self.feed_version[feed] = self.feed_version.get(feed, 0) + n
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+    state = None  # set by start_stub_server()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+        self.state.hit(url.path)
+        if self.state.latency:
+            time.sleep(self.state.latency)
+
+        if url.path == "/v2/top-headlines":
+            self._paged_json(query, "pageSize", "totalResults", lambda i, a: {
+                "title": a.split(".")[0], "description": a[:80], "content": a,
+                "url": f"http://stub/newsapi/{query.get('category') or query.get('sources')}/{i}",
+                "source": {"name": "Stub NewsAPI"},
+            })
+        elif url.path == "/api/v4/search":
+            self._paged_json(query, "max", "totalArticles", lambda i, a: {
+                "title": a.split(".")[0], "description": a[:80], "content": a,
+                "url": f"http://stub/gnews/{i}", "source": {"name": "Stub GNews"},
+            })
+        elif parts[0] == "rss" and len(parts) == 2:
+            self._feed(parts[1])
+        elif parts[0] == "site" and len(parts) == 3 and parts[2] == "section":
+            links = "".join(f'<li><a href="/site/{parts[1]}/article/{i}">Story {i}</a></li>'
+                            for i in range(ARTICLES_PER_SECTION))
+            self._send(200, f"<html><head><title>{parts[1]}</title></head><body><ul>{links}</ul>"
+                            f'<a href="https://elsewhere.example/x">offsite</a></body></html>', "text/html")
+        elif parts[0] == "site" and len(parts) == 4 and parts[2] == "article":
+            text = _article(f"{parts[1]}-{parts[3]}")
+            paragraphs = "".join(f"<p>{s.strip()}.</p>" for s in text.split(".") if s.strip())
+            self._send(200, f"<html><head><title>{text.split('.')[0]}</title></head>"
+                            f"<body><article>{paragraphs}</article></body></html>", "text/html")
+        elif parts[0] == "drip" and len(parts) == 2:
+            self._drip(_article(f"drip-{parts[1]}"))
+        elif parts[0] == "flaky":
+            if self.state.hits[url.path] <= self.state.fail_first:
+                self._send(503, json.dumps({"error": "try again"}))
+            else:
+                self._send(200, json.dumps({"status": "ok", "articles": []}))
+        else:
+            self._send(404, json.dumps({"error": "not found"}))
+
+    def _drip(self, text):
+        # Headers arrive at once, the body trickles in: per-read timeouts never fire
+        chunks = [f"<html><head><title>{text.split('.')[0]}</title></head><body>".encode("utf-8")]
+        chunks += [f"<p>{s.strip()}.</p>".encode("utf-8") for s in text.split(".") if s.strip()]
+        chunks.append(b"</body></html>")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(sum(len(c) for c in chunks)))
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                self.wfile.write(chunk)
+                self.wfile.flush()
+                time.sleep(self.state.drip)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up
+
+    def _paged_json(self, query, size_key, total_key, make):
+        page = int(query.get("page", 1))
+        size = int(query.get(size_key, 10))
+        start = (page - 1) * size
+        ids = range(start, min(start + size, TOTAL_RESULTS))
+        seed = query.get("category") or query.get("sources") or query.get("q") or ""
+        articles = [make(i, _article(f"{seed}-{i}")) for i in ids]
+        self._send(200, json.dumps({"status": "ok", total_key: TOTAL_RESULTS, "articles": articles}))
+
+    def _feed(self, name):
+        version = self.state.feed_version.get(name, 0)
+        etag = '"' + hashlib.md5(f"{name}-{version}".encode()).hexdigest() + '"'
+        last_modified = formatdate(1_700_000_000 + version * 60, usegmt=True)
+        if self.headers.get("If-None-Match") == etag or self.headers.get("If-Modified-Since") == last_modified:
+            self._send(304, b"", headers={"ETag": etag, "Last-Modified": last_modified})
+            return
+        first = version  # newest items first, like real feeds
+        items = "".join(
+            f"<item><title>{name} story {i}</title><link>http://stub/{name}/{i}</link>"
+            f"<guid>{name}-{i}</guid><description>{_article(f'{name}-{i}')[:300]}</description></item>"
+            for i in range(first + self.state.feed_items - 1, first - 1, -1)
+        )
+        body = (f'<?xml version="1.0"?><rss version="2.0"><channel><title>{name}</title>'
+                f"{items}</channel></rss>")
+        self._send(200, body, "application/rss+xml", {"ETag": etag, "Last-Modified": last_modified})
+
+
+def start_stub_server(host="127.0.0.1", port=0, **state_kwargs):
+    """Start the stub in a daemon thread; returns (server, base_url).
+
+    `server.state` controls latency/failures and `server.state.hits` counts requests.
+    """
+    state = StubState(**state_kwargs)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the offline news stub server")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-first", type=int, default=0)
+    args = parser.parse_args()
+    server, base_url = start_stub_server(port=args.port, latency=args.latency, fail_first=args.fail_first)
+    print(f"Stub server at {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
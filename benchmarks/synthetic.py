@@ -0,0 +1,73 @@
+"""Deterministic synthetic news corpus for benchmarks (no network needed)."""
+import random
+
+REAL_WORDS = (
+    "government minister election court police report says according to officials "
+    "india delhi mumbai president prime state national world market economy stock "
+    "shares company billion million growth inflation bank rate policy budget tax "
+    "health hospital vaccine study research scientists climate weather flood rain "
+    "sports cricket match team player win final league film actor movie award"
+).split()
+FAKE_WORDS = (
+    "shocking secret revealed truth exposed hoax miracle cure they dont want you "
+    "to know breaking viral video share before deleted insider leaked claims "
+    "sources confirm anonymous celebrity aliens conspiracy banned censored elite"
+).split()
+WORDS = (
+    "government minister election court police report says according to officials "
+    "india delhi mumbai president prime state national world market economy stock "
+    "shares company billion million growth inflation bank rate policy budget tax "
+    "health hospital vaccine covid virus doctors study research scientists climate "
+    "weather flood rain storm sports cricket match team player win final league "
+    "film actor movie music star award show police arrested case investigation "
+    "shocking secret revealed truth exposed hoax miracle cure they dont want you "
+    "to know breaking viral video share before deleted insider leaked claims "
+    "sources confirm anonymous celebrity aliens conspiracy banned censored elite"
+).split()
+
+
+def make_article(rng, min_words=40, max_words=400):
+    n = rng.randint(min_words, max_words)
+    words = rng.choices(WORDS, k=n)
+    title = " ".join(rng.choices(WORDS, k=rng.randint(6, 14))).capitalize()
+    # Sprinkle in the noise real scraped text carries: punctuation, digits, URLs
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words)), f"https://example.com/{rng.randint(1, 10**6)}")
+    if rng.random() < 0.5:
+        words.insert(rng.randrange(len(words)), f"{rng.randint(1, 2025)}!")
+    return f"{title}. " + " ".join(words) + "."
+
+
+def make_articles(n, seed=42, min_words=40, max_words=400):
+    rng = random.Random(seed)
+    return [make_article(rng, min_words, max_words) for _ in range(n)]
+
+
+def make_labels(n, seed=42):
+    rng = random.Random(seed + 1)
+    return [rng.randint(0, 1) for _ in range(n)]
+
+
+def make_labeled_corpus(n, seed=42, min_words=40, max_words=400):
+    """Cleaned (content, label) rows in the data/cleaned_news.csv schema.
+
+    Fake rows lean on sensational vocabulary so models have something to learn.
+    """
+    from text_cleaning import clean_text
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        label = rng.randint(0, 1)
+        pool = REAL_WORDS + FAKE_WORDS if label else REAL_WORDS * 3 + FAKE_WORDS
+        words = rng.choices(pool, k=rng.randint(min_words, max_words))
+        rows.append((clean_text(" ".join(words)), label))
+    return rows
+
+
+def write_labeled_csv(path, n, seed=42, min_words=40, max_words=400):
+    import csv
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["content", "label"])
+        writer.writerows(make_labeled_corpus(n, seed, min_words, max_words))
+    return path
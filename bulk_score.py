@@ -0,0 +1,241 @@
+# bulk_score.py
+"""Re-score large CSV / JSONL archives with the current model.
+
+The input is streamed in chunks of rows; chunks are scored by a process pool
+whose workers load the model once (detector.load_scorer, i.e. the mmap'd
+bundle when one is exported) and clean text exactly like app.py. Results are
+written in input order as soon as the chunks ahead of them are done, and at
+most `2 * workers` chunks are in flight, so memory does not grow with the
+input.
+
+After every written chunk a small progress file records the input byte
+offset, rows done and output size. `--resume` truncates the output to the
+last recorded size and continues from that input offset.
+
+    python bulk_score.py archive.csv scores.csv --text-column content --workers 8
+    python bulk_score.py archive.jsonl scores.jsonl --resume
+"""
+import io
+import os
+import csv
+import json
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import detector
+import metrics
+
+CHUNK_ROWS = 5_000
+TEXT_COLUMNS = ("content", "text", "title")  # first one present is scored by default
+OUTPUT_FIELDS = ["row", "id", "label", "real", "fake", "gibberish", "sensitive"]
+
+csv.field_size_limit(2 ** 31 - 1)  # scraped articles can exceed the 128 KB default
+
+_scorer = None
+
+
+# ---------------------------
+# Input
+# ---------------------------
+def _is_jsonl(path):
+    return path.endswith((".jsonl", ".ndjson"))
+
+
+def iter_chunks(path, text_column=None, id_column=None, chunk_rows=CHUNK_ROWS, offset=0, first_row=0):
+    """Yield (first_row, texts, ids, end_offset); end_offset is where the next chunk starts in bytes."""
+    with open(path, "rb") as f:
+        if _is_jsonl(path):
+            f.seek(offset)
+            records = _jsonl_records(f)
+        else:
+            header_line = f.readline()
+            header = next(csv.reader([header_line.decode("utf-8-sig")]))
+            f.seek(max(offset, len(header_line)))
+            records = _csv_records(f, header)
+
+        texts, ids, row, end = [], [], first_row, offset
+        for record, end in records:
+            if text_column is None:
+                text_column = next((c for c in TEXT_COLUMNS if c in record), None)
+                if text_column is None:
+                    raise SystemExit(f"No text column found in {path}; pass --text-column")
+            texts.append(str(record.get(text_column) or ""))
+            ids.append(record.get(id_column) if id_column else None)
+            if len(texts) >= chunk_rows:
+                yield row, texts, ids, end
+                row += len(texts)
+                texts, ids = [], []
+        if texts:
+            yield row, texts, ids, end
+
+
+def _jsonl_records(f):
+    for line in iter(f.readline, b""):
+        if line.strip():
+            yield json.loads(line), f.tell()
+
+
+def _csv_records(f, header):
+    # csv.reader pulls one physical line at a time, so after each record the
+    # bytes consumed so far end exactly at that record, even for quoted newlines
+    consumed = [f.tell()]
+
+    def lines():
+        for line in iter(f.readline, b""):
+            consumed[0] += len(line)
+            yield line.decode("utf-8", errors="replace")
+
+    for values in csv.reader(lines()):
+        if values:
+            yield dict(zip(header, values)), consumed[0]
+
+
+# ---------------------------
+# Scoring
+# ---------------------------
+def _init_worker(collect_metrics=False):
+    global _scorer
+    if collect_metrics:
+        metrics.enable()
+    _scorer = detector.load_scorer()
+
+
+def score_chunk(first_row, texts, ids):
+    if _scorer is None:
+        _init_worker()
+    probas = detector.score_texts(_scorer, texts)
+    results = []
+    for i, (text, proba, id_) in enumerate(zip(texts, probas, ids)):
+        result = detector.score_result(text, proba)
+        results.append(dict(row=first_row + i, id=id_, **result))
+    return results
+
+
+def _score_chunk_in_worker(first_row, texts, ids):
+    """score_chunk in a pool process, with the metrics it recorded for the parent to merge."""
+    return score_chunk(first_row, texts, ids), metrics.drain()
+
+
+class _InlineFuture:
+    def __init__(self, value):
+        self._value = value
+
+    def result(self):
+        return self._value
+
+
+# ---------------------------
+# Output & progress
+# ---------------------------
+def progress_path(out):
+    return out + ".progress.json"
+
+
+def load_progress(out):
+    try:
+        with open(progress_path(out), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_progress(out, state):
+    tmp = progress_path(out) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, progress_path(out))
+
+
+def write_results(f, results, jsonl):
+    """Append `results` to the binary output file `f` as UTF-8 JSON lines or CSV rows."""
+    if jsonl:
+        text = "".join(json.dumps(r) + "\n" for r in results)
+    else:
+        buf = io.StringIO()
+        csv.DictWriter(buf, OUTPUT_FIELDS, extrasaction="ignore").writerows(results)
+        text = buf.getvalue()
+    f.write(text.encode("utf-8"))
+
+
+def bulk_score(input_path, out, text_column=None, id_column=None, workers=None,
+               chunk_rows=CHUNK_ROWS, resume=False):
+    """Score every row of `input_path` into `out`; returns the number of rows scored by this run."""
+    version = detector.scorer_version()
+    state = {"input": os.path.abspath(input_path), "model_version": version,
+             "input_offset": 0, "rows_done": 0, "output_bytes": 0}
+    previous = load_progress(out) if resume else None
+    if previous:
+        if previous["input"] != state["input"]:
+            raise SystemExit(f"{progress_path(out)} belongs to {previous['input']}, not {state['input']}")
+        if previous["model_version"] != version:
+            raise SystemExit(f"Model changed since the interrupted run ({previous['model_version']} -> {version}); "
+                             f"start over without --resume")
+        state = previous
+        print(f"Resuming at row {state['rows_done']} (input byte {state['input_offset']})")
+
+    jsonl = _is_jsonl(out)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    # Binary, so f.tell() is a real byte offset to truncate back to on --resume
+    mode = "r+b" if previous and os.path.exists(out) else "wb"
+    with open(out, mode) as f:
+        f.seek(state["output_bytes"])
+        f.truncate()  # drop anything written after the last recorded chunk
+        if not jsonl and state["output_bytes"] == 0:
+            f.write((",".join(OUTPUT_FIELDS) + "\r\n").encode("utf-8"))
+
+        chunks = iter_chunks(input_path, text_column, id_column, chunk_rows,
+                             state["input_offset"], state["rows_done"])
+        pool = (ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(metrics.enabled(),))
+                if workers != 0 else None)
+        in_flight = deque()
+        scored = 0
+        try:
+            for first_row, texts, ids, end_offset in chunks:
+                if pool:
+                    in_flight.append((pool.submit(_score_chunk_in_worker, first_row, texts, ids), len(texts), end_offset))
+                else:
+                    in_flight.append((_InlineFuture((score_chunk(first_row, texts, ids), None)), len(texts), end_offset))
+                # Window of 2 chunks per worker: enough to keep the pool busy, bounded memory
+                while len(in_flight) > workers * 2:
+                    scored += _write_next(f, in_flight, state, out, jsonl)
+            while in_flight:
+                scored += _write_next(f, in_flight, state, out, jsonl)
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+    print(f"Scored {scored} rows ({state['rows_done']} total) into {out}")
+    return scored
+
+
+def _write_next(f, in_flight, state, out, jsonl):
+    future, n_rows, end_offset = in_flight.popleft()
+    results, worker_metrics = future.result()
+    if worker_metrics:
+        metrics.merge(worker_metrics)
+    write_results(f, results, jsonl)
+    f.flush()
+    state.update(input_offset=end_offset, rows_done=state["rows_done"] + n_rows, output_bytes=f.tell())
+    save_progress(out, state)
+    return n_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV or JSONL archive with the current model")
+    parser.add_argument("input", help=".csv or .jsonl/.ndjson file")
+    parser.add_argument("out", help="results file; .jsonl writes JSON lines, anything else CSV")
+    parser.add_argument("--text-column", help=f"column/field to score (default: first of {', '.join(TEXT_COLUMNS)})")
+    parser.add_argument("--id-column", help="column/field copied to the output 'id' field")
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes (default: CPU count, 0: in-process)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run from its progress file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        raise SystemExit(f"Input not found: {args.input}")
+    bulk_score(args.input, args.out, args.text_column, args.id_column, args.workers, args.chunk_rows, args.resume)
+
+
+if __name__ == "__main__":
+    main()
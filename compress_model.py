@@ -0,0 +1,214 @@
+# compress_model.py
+"""Shrink the trained vectorizer + model pair after training.
+
+Most of the 20,000 TF-IDF features carry weights close to zero. This keeps
+the `--keep` most useful ones, ranked by |coef| or by chi2 on the training
+split, optionally refits the logistic regression on just those features
+(`--refit l2`, or `--refit l1` which zeroes out and drops more of them), and
+stores the bundle weights as float64, float16 or int8.
+
+Every combination of `--keep` and `--dtype` is scored on the same held-out
+split train_model.py uses and reported next to the original model: accuracy
+delta, joblib and bundle size, load time and throughput. With a single
+combination the result is saved as a new joblib pair plus a bundle version.
+
+    python compress_model.py --keep 2000,5000,10000 --dtype float64,int8   # report only
+    python compress_model.py --keep 5000 --refit l1 --dtype float16 --activate
+"""
+import os
+import time
+import argparse
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.base import clone
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_selection import chi2
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+from linear_scorer import LinearScorer
+from model_bundle import BUNDLE_DIR, WEIGHT_DTYPES, export_bundle
+from similarity_index import INDEX_NAME, build_index
+from train_model import DATA_FILE, MODEL_FILE, VECTORIZER_FILE, normalize_labels, read_dataset
+
+COMPRESSED_DIR = "models/compressed"
+METHODS = ("coef", "chi2")
+REFITS = ("none", "l2", "l1")
+
+
+def load_split(data_file):
+    """The same train/test split train_model.py trains and evaluates on."""
+    df = normalize_labels(read_dataset(data_file))
+    return train_test_split(df["content"], df["label"], test_size=0.2, random_state=42, stratify=df["label"])
+
+
+# ---------------------------
+# Pruning
+# ---------------------------
+def rank_features(method, model, vectorizer, X_train, y_train):
+    """Feature columns ordered from most to least useful."""
+    if method == "coef":
+        score = np.abs(model.coef_[0])
+    elif method == "chi2":
+        score = np.nan_to_num(chi2(vectorizer.transform(X_train), y_train)[0])
+    else:
+        raise ValueError(f"Unknown method {method!r}; expected one of {METHODS}")
+    return np.argsort(-score, kind="stable")
+
+
+def prune_vectorizer(vectorizer, columns):
+    """Copy of a fitted TfidfVectorizer restricted to `columns` (IDF weights kept as fitted)."""
+    terms = vectorizer.get_feature_names_out()[columns]
+    params = dict(vectorizer.get_params(), vocabulary={t: i for i, t in enumerate(terms)}, max_features=None)
+    pruned = TfidfVectorizer(**params)
+    pruned.idf_ = vectorizer.idf_[columns]
+    return pruned
+
+
+def prune_model(model, columns):
+    pruned = clone(model)
+    pruned.classes_ = model.classes_
+    pruned.coef_ = model.coef_[:, columns]
+    pruned.intercept_ = model.intercept_.copy()
+    return pruned
+
+
+def compress(model, vectorizer, ranking, keep, X_train, y_train, refit="none", l1_c=1.0):
+    """(model, vectorizer) using the `keep` top-ranked features, refit if asked."""
+    columns = np.sort(ranking[:keep])
+    small_vectorizer = prune_vectorizer(vectorizer, columns)
+    if refit == "none":
+        # Fewer terms change each document's L2 norm; a refit compensates for that
+        return prune_model(model, columns), small_vectorizer
+    if refit == "l2":
+        small_model = clone(model)
+    elif refit == "l1":
+        # scikit-learn >= 1.8 deprecates `penalty` and picks L1 through l1_ratio
+        l1 = {"l1_ratio": 1.0} if LogisticRegression().get_params()["penalty"] == "deprecated" else {"penalty": "l1"}
+        small_model = LogisticRegression(C=l1_c, solver="liblinear", class_weight=model.class_weight,
+                                         max_iter=model.max_iter, **l1)
+    else:
+        raise ValueError(f"Unknown refit {refit!r}; expected one of {REFITS}")
+    small_model.fit(small_vectorizer.transform(X_train), y_train)
+    nonzero = np.flatnonzero(small_model.coef_[0])
+    if refit == "l1" and 0 < len(nonzero) < len(columns):
+        return prune_model(small_model, nonzero), prune_vectorizer(small_vectorizer, nonzero)
+    return small_model, small_vectorizer
+
+
+# ---------------------------
+# Report
+# ---------------------------
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def measure(name, model, vectorizer, dtype, X_test, y_test, workdir):
+    """Accuracy of the exported bundle (what serving uses) plus size, load time and throughput."""
+    pair_dir = os.path.join(workdir, name)
+    os.makedirs(pair_dir)
+    joblib.dump(model, os.path.join(pair_dir, "model.joblib"))
+    joblib.dump(vectorizer, os.path.join(pair_dir, "vectorizer.joblib"))
+    bundle_root = os.path.join(workdir, name + "-bundle")
+    version = export_bundle(model, vectorizer, bundle_root, dtype=dtype)
+
+    texts = list(X_test)
+    scorer = LinearScorer.load(bundle_root)
+    pred = (scorer.predict_proba(texts)[:, 1] >= 0.5).astype(int)
+    return {
+        "name": name,
+        "dtype": dtype,
+        "features": len(vectorizer.vocabulary_),
+        "nonzero": int(np.count_nonzero(model.coef_)),
+        "accuracy": accuracy_score(y_test, pred),
+        "joblib_kb": dir_size(pair_dir) / 1024,
+        "bundle_kb": dir_size(os.path.join(bundle_root, version)) / 1024,
+        "joblib_load_ms": best_of(lambda: (joblib.load(os.path.join(pair_dir, "model.joblib")),
+                                           joblib.load(os.path.join(pair_dir, "vectorizer.joblib")))) * 1000,
+        "bundle_load_ms": best_of(lambda: LinearScorer.load(bundle_root)) * 1000,
+        "transform_docs_s": len(texts) / best_of(lambda: vectorizer.transform(texts)),
+        "scorer_docs_s": len(texts) / best_of(lambda: scorer.predict_proba(texts)),
+    }
+
+
+def print_report(rows):
+    report = pd.DataFrame(rows)
+    report.insert(report.columns.get_loc("accuracy") + 1, "acc_delta", report["accuracy"] - report["accuracy"].iloc[0])
+    with pd.option_context("display.width", 200, "display.float_format", "{:,.4g}".format):
+        print(report.to_string(index=False))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune, refit and quantize the trained model")
+    parser.add_argument("--data", default=DATA_FILE, help="cleaned CSV or corpus store the model was trained on")
+    parser.add_argument("--model", default=MODEL_FILE)
+    parser.add_argument("--vectorizer", default=VECTORIZER_FILE)
+    parser.add_argument("--method", choices=METHODS, default="coef", help="rank features by |coef| or chi2")
+    parser.add_argument("--keep", default="5000", help="comma-separated feature counts to try")
+    parser.add_argument("--refit", choices=REFITS, default="none")
+    parser.add_argument("--l1-c", type=float, default=1.0, help="inverse regularization strength for --refit l1")
+    parser.add_argument("--dtype", default="float64", help=f"comma-separated bundle weight types ({', '.join(WEIGHT_DTYPES)})")
+    parser.add_argument("--out-dir", default=COMPRESSED_DIR, help="where the compressed joblib pair is saved")
+    parser.add_argument("--bundle-dir", default=BUNDLE_DIR)
+    parser.add_argument("--activate", action="store_true", help="make the compressed bundle the served one")
+    parser.add_argument("--report", help="also write the report rows to this JSON file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        raise SystemExit(f"Dataset not found: {args.data}. Run scripts/update_dataset.py first.")
+    keeps = [int(k) for k in args.keep.split(",")]
+    dtypes = args.dtype.split(",")
+    for dtype in dtypes:
+        if dtype not in WEIGHT_DTYPES:
+            raise SystemExit(f"Unknown --dtype {dtype}; expected {', '.join(WEIGHT_DTYPES)}")
+
+    warnings.filterwarnings("ignore", message="Trying to unpickle estimator")
+    model, vectorizer = joblib.load(args.model), joblib.load(args.vectorizer)
+    X_train, X_test, y_train, y_test = load_split(args.data)
+    ranking = rank_features(args.method, model, vectorizer, X_train, y_train)
+
+    rows, compressed = [], {}
+    with tempfile.TemporaryDirectory() as workdir:
+        rows.append(measure("original", model, vectorizer, "float64", X_test, y_test, workdir))
+        for keep in keeps:
+            print(f"Compressing to {keep} features ({args.method}, refit {args.refit})...")
+            compressed[keep] = compress(model, vectorizer, ranking, keep, X_train, y_train, args.refit, args.l1_c)
+            for dtype in dtypes:
+                name = f"{args.method}-{keep}-{args.refit}-{dtype}"
+                rows.append(measure(name, *compressed[keep], dtype, X_test, y_test, workdir))
+    report = print_report(rows)
+    if args.report:
+        report.to_json(args.report, orient="records", indent=2)
+
+    if len(keeps) * len(dtypes) > 1:
+        print("\nReport only: pass a single --keep and --dtype to save the compressed model")
+        return
+    small_model, small_vectorizer = compressed[keeps[0]]
+    os.makedirs(args.out_dir, exist_ok=True)
+    joblib.dump(small_model, os.path.join(args.out_dir, os.path.basename(args.model)))
+    joblib.dump(small_vectorizer, os.path.join(args.out_dir, os.path.basename(args.vectorizer)))
+    print(f"\nCompressed model and vectorizer saved to {args.out_dir}")
+    version = export_bundle(small_model, small_vectorizer, args.bundle_dir, activate=args.activate, dtype=dtypes[0])
+    print(f"Model bundle {version} exported to {args.bundle_dir}" + (" and activated" if args.activate else ""))
+    if args.activate:
+        # The served vocabulary changed; an index of the old one would no longer be used
+        build_index(args.data, small_vectorizer, os.path.join(os.path.dirname(args.model), INDEX_NAME))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+# crawler.py
+"""Shared article crawler for the scrape_real_news / scrape_fake_news scripts.
+
+Section pages are crawled for article links (the frontier), articles are
+downloaded by a bounded worker pool that respects a per-host request interval,
+and each article's HTML is downloaded once and handed to both extractors
+(newspaper3k first, BeautifulSoup as fallback). Article HTML is cached on
+disk, finished URLs and the pending frontier are checkpointed so an
+interrupted crawl resumes where it stopped, and rows are appended to the
+output CSV as they are extracted (title, text, url, published, label), the
+schema update_dataset.py consumes.
+"""
+import os
+import re
+import csv
+import gzip
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from urllib.parse import urljoin, urldefrag, urlparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+import pandas as pd
+from bs4 import BeautifulSoup
+
+import metrics
+
+try:
+    from newspaper import Article
+except ImportError:  # newspaper3k is optional; BeautifulSoup handles extraction alone
+    Article = None
+
+# Headers to bypass 401 / bot blocking
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                  "AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/139.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9"
+}
+
+TIMEOUT = 10
+WORKERS = 8
+PER_HOST_INTERVAL = 1.0  # seconds between requests to the same host
+MAX_ARTICLES_PER_SECTION = 30
+HTML_CACHE_DIR = "data/.html_cache"
+ROW_COLUMNS = ["title", "text", "url", "published", "label"]
+
+# Links that are never articles
+_SKIP_LINK_RE = re.compile(
+    r"/(tag|tags|topic|topics|author|authors|category|search|login|subscribe|video|videos|live)(/|$)"
+    r"|\.(jpg|jpeg|png|gif|pdf|mp4|xml|rss)$",
+    re.IGNORECASE,
+)
+
+
+# ---------------------------
+# Politeness & caching
+# ---------------------------
+class HostRateLimiter:
+    """Space out requests to each host by at least `interval` seconds."""
+
+    def __init__(self, interval=PER_HOST_INTERVAL):
+        self.interval = interval
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class HtmlCache:
+    """Gzipped HTML on disk, keyed by URL."""
+
+    def __init__(self, directory=HTML_CACHE_DIR):
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".html.gz")
+
+    def get(self, url):
+        if not self.directory:
+            return None
+        try:
+            with gzip.open(self._path(url), "rt", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, url, html):
+        if not self.directory:
+            return
+        tmp = self._path(url) + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp, self._path(url))
+
+
+# ---------------------------
+# Download & extraction
+# ---------------------------
+def download(url, session=None, limiter=None, cache=None, timeout=TIMEOUT):
+    """Fetch a page once; cached copies are reused without touching the network."""
+    html = cache.get(url) if cache else None
+    if html is not None:
+        metrics.inc("crawl_cache_hits_total")
+        return html
+    if limiter:
+        limiter.wait(url)
+    host = urlparse(url).netloc
+    try:
+        with metrics.timer("crawl_fetch_seconds", host=host):
+            response = (session or requests).get(url, headers=HEADERS, timeout=timeout)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        status = getattr(e.response, "status_code", None)
+        metrics.inc("crawl_errors_total", host=host, kind=str(status) if status else type(e).__name__)
+        raise
+    html = response.text
+    if cache:
+        cache.put(url, html)
+    return html
+
+
+def extract_with_newspaper(url, html):
+    if Article is None:
+        return None
+    try:
+        article = Article(url)
+        article.download(input_html=html)
+        article.parse()
+        return {
+            "title": article.title.strip(),
+            "text": article.text.strip(),
+            "url": url,
+            "published": article.publish_date if article.publish_date else datetime.now()
+        }
+    except Exception as e:
+        print(f"❌ [newspaper3k] Failed for {url}: {e}")
+        return None
+
+
+def extract_with_bs4(url, html):
+    try:
+        soup = BeautifulSoup(html, "html.parser")
+        title = soup.title.string.strip() if soup.title and soup.title.string else "No Title Found"
+        paragraphs = [p.get_text(strip=True) for p in soup.find_all("p")]
+        text = "\n".join(p for p in paragraphs if p)
+        return {
+            "title": title,
+            "text": text,
+            "url": url,
+            "published": datetime.now()
+        }
+    except Exception as e:
+        print(f"❌ [BeautifulSoup] Failed for {url}: {e}")
+        return None
+
+
+def extract_article(url, html):
+    """newspaper3k first, BeautifulSoup on the same HTML if that yields no text."""
+    article_data = extract_with_newspaper(url, html)
+    if not article_data or not article_data["text"]:
+        article_data = extract_with_bs4(url, html)
+    if article_data and article_data["text"]:
+        return article_data
+    return None
+
+
+def is_permanent_failure(exc):
+    """True for client errors (404, 410, ...) that retrying will not fix; 408 and 429 are retried."""
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status is not None and 400 <= status < 500 and status not in (408, 429)
+
+
+def discover_links(section_url, html, limit=MAX_ARTICLES_PER_SECTION):
+    """Same-host links from a section page that look like articles."""
+    base_host = urlparse(section_url).netloc
+    section_path = urlparse(section_url).path.rstrip("/")
+    soup = BeautifulSoup(html, "html.parser")
+    links = []
+    seen = set()
+    for a in soup.find_all("a", href=True):
+        url = urldefrag(urljoin(section_url, a["href"]))[0]
+        parsed = urlparse(url)
+        path = parsed.path.rstrip("/")
+        if (parsed.scheme not in ("http", "https") or parsed.netloc != base_host
+                or path in ("", section_path) or path.count("/") < 2
+                or _SKIP_LINK_RE.search(path) or url in seen):
+            continue
+        seen.add(url)
+        links.append(url)
+        if len(links) >= limit:
+            break
+    return links
+
+
+# ---------------------------
+# Crawl loop
+# ---------------------------
+class Checkpoint:
+    """Finished article URLs (kept across runs) and the pending frontier of the current run."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.pending = []
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.done = set(state.get("done", []))
+            self.pending = state.get("pending", [])
+
+    def save(self, pending):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"done": sorted(self.done), "pending": pending}, f)
+        os.replace(tmp, self.path)
+
+
+def append_rows(rows, out):
+    """Append rows to `out`, in the column layout of its existing header if it has one."""
+    if not rows:
+        return
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    df = pd.DataFrame(rows, columns=ROW_COLUMNS)
+    header = None
+    if os.path.exists(out) and os.path.getsize(out):
+        with open(out, encoding="utf-8", newline="") as f:
+            header = next(csv.reader(f), None)
+    if header:
+        # Files written by the older scrape scripts have no label column (update_dataset.py
+        # labels them by file name); rows written in another layout would be skipped as bad lines
+        df = df.reindex(columns=header)
+    df.to_csv(out, mode="a", header=not header, index=False, encoding="utf-8")
+
+
+def crawl(section_urls, label, out, checkpoint_file=None, cache_dir=HTML_CACHE_DIR,
+          workers=WORKERS, per_host_interval=PER_HOST_INTERVAL,
+          max_articles_per_section=MAX_ARTICLES_PER_SECTION, checkpoint_every=10):
+    """Crawl sections → articles and append extracted rows to `out`.
+
+    Returns the number of articles written by this run.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    limiter = HostRateLimiter(per_host_interval)
+    cache = HtmlCache(cache_dir)
+    checkpoint = Checkpoint(checkpoint_file)
+
+    if checkpoint.pending:
+        print(f"↩ Resuming crawl with {len(checkpoint.pending)} pending URLs")
+        frontier = [tuple(item) for item in checkpoint.pending]
+    else:
+        frontier = [("section", url) for url in section_urls]
+
+    def work(kind, url):
+        if kind == "section":
+            # Section pages change constantly, so they bypass the HTML cache
+            html = download(url, session, limiter, None)
+            return discover_links(url, html, max_articles_per_section)
+        return extract_article(url, download(url, session, limiter, cache))
+
+    written = 0
+    rows = []
+    in_flight = {}
+    queued = set(url for _, url in frontier)
+    since_checkpoint = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while frontier or in_flight:
+            while frontier and len(in_flight) < workers * 2:
+                kind, url = frontier.pop(0)
+                if kind == "article" and url in checkpoint.done:
+                    continue
+                if kind == "section":
+                    print(f"🔍 Scraping: {url}")
+                in_flight[pool.submit(work, kind, url)] = (kind, url)
+            if not in_flight:
+                break
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                kind, url = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"❌ Failed for {url}: {e}")
+                    result = None
+                    if kind == "article" and not is_permanent_failure(e):
+                        continue  # timeouts, 5xx, ...: not marked done, retried by the next run
+                if kind == "section":
+                    for link in result or []:
+                        if link not in queued and link not in checkpoint.done:
+                            queued.add(link)
+                            frontier.append(("article", link))
+                    continue
+                checkpoint.done.add(url)
+                if result:
+                    rows.append(dict(result, label=label))
+                else:
+                    print(f"⚠ No content found for {url}")
+                since_checkpoint += 1
+
+            if since_checkpoint >= checkpoint_every:
+                # Rows first, then the checkpoint: a crash can repeat work but never lose rows
+                append_rows(rows, out)
+                written += len(rows)
+                rows = []
+                checkpoint.save(frontier + list(in_flight.values()))
+                since_checkpoint = 0
+
+    append_rows(rows, out)
+    written += len(rows)
+    checkpoint.save([])
+    return written
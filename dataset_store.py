@@ -0,0 +1,194 @@
+# dataset_store.py
+"""Columnar, versioned storage for the cleaned news corpus.
+
+The corpus is kept as compressed Parquet parts under data/corpus/parts/ and a
+versions.json log. Every version is just the list of parts that make it up:
+
+  * append(delta)  -> new version = previous parts + one small delta part
+  * replace(df)    -> new version = one fresh base part (e.g. after a full
+                      rebuild that dropped duplicates)
+
+Old versions stay reconstructable for as long as their parts are kept, so a
+"backup" costs only the rows that changed instead of a full CSV copy per run.
+
+    python dataset_store.py import-csv data/cleaned_news.csv
+    python dataset_store.py versions
+    python dataset_store.py export-csv out.csv --version 3
+    python dataset_store.py prune --keep 5
+"""
+import os
+import json
+import argparse
+from datetime import datetime
+
+import pandas as pd
+
+STORE_DIR = "data/corpus"
+COLUMNS = ["content", "label"]
+COMPRESSION = "zstd"
+ROW_GROUP_ROWS = 50_000  # lets readers (e.g. replay sampling) read part of a large part
+
+
+class CorpusStore:
+    def __init__(self, path=STORE_DIR):
+        self.path = path
+        self.parts_dir = os.path.join(path, "parts")
+        self.log_file = os.path.join(path, "versions.json")
+
+    # ---------------------------
+    # Version log
+    # ---------------------------
+    def exists(self):
+        return os.path.exists(self.log_file)
+
+    def versions(self):
+        if not self.exists():
+            return []
+        with open(self.log_file, encoding="utf-8") as f:
+            return json.load(f)["versions"]
+
+    def _write_versions(self, versions):
+        os.makedirs(self.path, exist_ok=True)
+        tmp = self.log_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"versions": versions}, f, indent=2)
+        os.replace(tmp, self.log_file)  # readers never see a half-written log
+
+    def get_version(self, version=None):
+        versions = self.versions()
+        if not versions:
+            raise FileNotFoundError(f"No corpus versions in {self.path}")
+        if version is None:
+            return versions[-1]
+        for v in versions:
+            if v["version"] == version:
+                return v
+        raise KeyError(f"Corpus version {version} not found in {self.path}")
+
+    def _part_paths(self, version=None):
+        return [os.path.join(self.parts_dir, p) for p in self.get_version(version)["parts"]]
+
+    # ---------------------------
+    # Writes
+    # ---------------------------
+    def _write_part(self, df, next_version):
+        os.makedirs(self.parts_dir, exist_ok=True)
+        name = f"part-{next_version:06d}.parquet"
+        df[COLUMNS].reset_index(drop=True).to_parquet(
+            os.path.join(self.parts_dir, name), compression=COMPRESSION, index=False, row_group_size=ROW_GROUP_ROWS
+        )
+        return name
+
+    def _commit(self, parts, rows, note):
+        versions = self.versions()
+        entry = {
+            "version": versions[-1]["version"] + 1 if versions else 1,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "parts": parts,
+            "rows": rows,
+            "note": note,
+        }
+        self._write_versions(versions + [entry])
+        return entry
+
+    def append(self, df, note="append"):
+        """Add rows as a delta part on top of the latest version."""
+        versions = self.versions()
+        if not versions:
+            return self.replace(df, note)
+        latest = versions[-1]
+        if df.empty:
+            return latest
+        part = self._write_part(df, latest["version"] + 1)
+        return self._commit(latest["parts"] + [part], latest["rows"] + len(df), note)
+
+    def replace(self, df, note="replace"):
+        """Start a new base snapshot; earlier versions remain readable."""
+        versions = self.versions()
+        next_version = versions[-1]["version"] + 1 if versions else 1
+        part = self._write_part(df, next_version)
+        return self._commit([part], len(df), note)
+
+    def prune(self, keep=5):
+        """Drop all but the last `keep` versions and delete parts nothing references."""
+        versions = self.versions()[-keep:]
+        self._write_versions(versions)
+        live = {p for v in versions for p in v["parts"]}
+        removed = 0
+        for name in os.listdir(self.parts_dir):
+            if name not in live:
+                os.remove(os.path.join(self.parts_dir, name))
+                removed += 1
+        return removed
+
+    # ---------------------------
+    # Reads
+    # ---------------------------
+    def load(self, columns=None, version=None):
+        """Load a version (latest by default), reading only `columns`."""
+        frames = [pd.read_parquet(p, columns=columns) for p in self._part_paths(version)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns or COLUMNS)
+
+    def iter_batches(self, columns=None, batch_size=10_000, version=None):
+        """Stream a version as DataFrames of at most `batch_size` rows."""
+        import pyarrow.parquet as pq
+        for path in self._part_paths(version):
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns):
+                yield batch.to_pandas()
+
+    def disk_usage(self):
+        if not os.path.isdir(self.parts_dir):
+            return 0
+        return sum(os.path.getsize(os.path.join(self.parts_dir, p)) for p in os.listdir(self.parts_dir))
+
+    # ---------------------------
+    # CSV compatibility
+    # ---------------------------
+    def import_csv(self, csv_file, note=None):
+        df = pd.read_csv(csv_file, on_bad_lines="skip", usecols=COLUMNS)
+        return self.replace(df, note or f"import {os.path.basename(csv_file)}")
+
+    def export_csv(self, csv_file, version=None):
+        df = self.load(COLUMNS, version)
+        df.to_csv(csv_file, index=False, encoding="utf-8")
+        return len(df)
+
+
+def is_store(path):
+    """True if `path` is a corpus store directory rather than a CSV file."""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "versions.json"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the columnar corpus store")
+    parser.add_argument("--store", default=STORE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("import-csv", help="snapshot a cleaned CSV as a new version")
+    p.add_argument("csv_file")
+    p = sub.add_parser("export-csv", help="write a version back out as CSV")
+    p.add_argument("csv_file")
+    p.add_argument("--version", type=int)
+    sub.add_parser("versions", help="list versions")
+    p = sub.add_parser("prune", help="keep only the latest versions")
+    p.add_argument("--keep", type=int, default=5)
+    args = parser.parse_args()
+
+    store = CorpusStore(args.store)
+    if args.command == "import-csv":
+        entry = store.import_csv(args.csv_file)
+        print(f"Imported {entry['rows']} rows as version {entry['version']}")
+    elif args.command == "export-csv":
+        rows = store.export_csv(args.csv_file, args.version)
+        print(f"Exported {rows} rows to {args.csv_file}")
+    elif args.command == "versions":
+        for v in store.versions():
+            print(f"v{v['version']:<4} {v['created']}  {v['rows']:>9} rows  "
+                  f"{len(v['parts'])} part(s)  {v['note']}")
+        print(f"Disk usage: {store.disk_usage() / 1024 ** 2:.1f} MB")
+    elif args.command == "prune":
+        removed = store.prune(args.keep)
+        print(f"Kept {len(store.versions())} versions, removed {removed} part file(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import os
+import re
+import hashlib
+
+# Text cleaning is shared with training so serving sees identical tokens
+from text_cleaning import clean_text, clean_texts
+from term_matcher import TermMatcher
+import metrics
+from model_bundle import BUNDLE_DIR, current_version
+
+# ==== Artifact paths ====
+MODEL_FILE = "models/fake_news_model.joblib"
+VECTORIZER_FILE = "models/tfidf_vectorizer.joblib"
+SENSITIVE_TERMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "sensitive_terms.json")
+
+
+# ---------------------------
+# Load Model & Vectorizer
+# ---------------------------
+def load_artifacts(model_file=MODEL_FILE, vectorizer_file=VECTORIZER_FILE):
+    import joblib  # only the joblib path needs it (and sklearn, when unpickling)
+    model = joblib.load(model_file)
+    vectorizer = joblib.load(vectorizer_file)
+    return model, vectorizer
+
+
+def artifact_version(model_file=MODEL_FILE, vectorizer_file=VECTORIZER_FILE):
+    """Cheap fingerprint of the artifact files; changes whenever either is rewritten.
+
+    Size and mtime only: the same files named by a relative or an absolute
+    path must give the same version.
+    """
+    h = hashlib.sha1()
+    for path in (model_file, vectorizer_file):
+        st = os.stat(path)
+        h.update(f"{st.st_size}:{st.st_mtime_ns};".encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+def load_scorer(bundle_dir=BUNDLE_DIR):
+    """Folded NumPy scorer from the active model bundle, without importing sklearn.
+
+    Falls back to the joblib vectorizer + model as one pipeline when no bundle
+    has been exported. Either way `scorer.predict_proba(cleaned_texts)` works.
+    """
+    if current_version(bundle_dir):
+        from linear_scorer import LinearScorer
+        return LinearScorer.load(bundle_dir)
+    from sklearn.pipeline import make_pipeline
+    model, vectorizer = load_artifacts()
+    return make_pipeline(vectorizer, model)
+
+
+def scorer_version(bundle_dir=BUNDLE_DIR):
+    """Version of whatever load_scorer() would serve."""
+    return current_version(bundle_dir) or artifact_version()
+
+
+# ---------------------------
+# Detect gibberish input
+# ---------------------------
+_URL_PREFIX_RE = re.compile(r'http[s]?://')
+
+def is_gibberish(text):
+    if _URL_PREFIX_RE.match(text):      # Allow URLs
+        return False
+    if len(text.split(None, 3)) < 3:    # Too short (stops splitting after 3 words)
+        return True
+    if len(set(text[:256])) < 5 and len(set(text)) < 5:  # Too few unique chars
+        return True
+    return False
+
+
+# ---------------------------
+# Sensitive Claim Detection
+# ---------------------------
+# Built once at import; edit config/sensitive_terms.json to change the lists
+_sensitive_matcher = TermMatcher.from_file(SENSITIVE_TERMS_FILE)
+
+def find_sensitive_terms(text):
+    """Sensitive keywords / public figures mentioned in `text` as whole words."""
+    return _sensitive_matcher.find(text)
+
+def contains_sensitive_claim(text):
+    return _sensitive_matcher.matches(text)
+
+
+# ---------------------------
+# Batch scoring
+# ---------------------------
+def predict_proba(model, vectorizer, texts):
+    """Score many documents with one transform + predict_proba call.
+
+    Returns an (n, 2) array of [real, fake] probabilities.
+    """
+    with metrics.timer("stage_seconds", stage="clean"):
+        cleaned = clean_texts(texts)
+    return _predict_cleaned(model, vectorizer, cleaned)
+
+
+def _predict_cleaned(model, vectorizer, cleaned):
+    with metrics.timer("stage_seconds", stage="vectorize"):
+        vectorized = vectorizer.transform(cleaned)
+    with metrics.timer("stage_seconds", stage="linear"):
+        return model.predict_proba(vectorized)
+
+
+def score_texts(scorer, texts):
+    """predict_proba() for a load_scorer() scorer: (n, 2) [real, fake] probabilities."""
+    with metrics.timer("stage_seconds", stage="clean"):
+        cleaned = clean_texts(texts)
+    return score_cleaned(scorer, cleaned)
+
+
+def score_cleaned(scorer, cleaned):
+    """score_texts() for texts that already went through clean_text()."""
+    if hasattr(scorer, "steps"):  # sklearn fallback pipeline: time its two steps separately
+        return _predict_cleaned(scorer.steps[-1][1], scorer.steps[0][1], cleaned)
+    return scorer.predict_proba(cleaned)
+
+
+def score_result(text, proba):
+    """Turn one row of predict_proba output into the JSON shape served by the API."""
+    fake_score = round(float(proba[1]) * 100, 2)  # % fake
+    real_score = round(float(proba[0]) * 100, 2)  # % real
+    return {
+        "label": "real" if real_score >= fake_score else "fake",
+        "real": real_score,
+        "fake": fake_score,
+        "gibberish": is_gibberish(text),
+        "sensitive": contains_sensitive_claim(text),
+    }
@@ -0,0 +1,184 @@
+# feature_cache.py
+"""On-disk cache of the train/test TF-IDF matrices used by train_model.py.
+
+Vectorizing the corpus is most of a training run and all of an evaluation
+run, yet it only depends on the dataset, the cleaning code that produced it,
+the vectorizer parameters and the split. Those four are hashed into a key;
+an entry is a directory of .npy files (CSR arrays of both splits and the
+split's row positions) plus the fitted vectorizer, loaded memory-mapped so a
+hit costs milliseconds instead of a tokenizing pass.
+
+    data/.feature_cache/<key>/X_train.data.npy ... test_idx.npy, vectorizer.joblib, entry.json
+
+Entries are written to a temporary directory and renamed into place, and
+only the MAX_ENTRIES most recently used are kept.
+"""
+import os
+import copy
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+
+import numpy as np
+import joblib
+from scipy.sparse import csr_matrix
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+
+from dataset_store import CorpusStore, is_store
+
+CACHE_DIR = "data/.feature_cache"
+MAX_ENTRIES = 4
+CLEANING_CODE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "text_cleaning.py")
+MATRICES = ("X_train", "X_test")
+
+
+# ---------------------------
+# Key
+# ---------------------------
+def dataset_version(data_file):
+    """Content hash of a cleaned CSV, or the version id of a corpus store."""
+    if is_store(data_file):
+        return "store:" + str(CorpusStore(data_file).get_version()["version"])
+    h = hashlib.sha1()
+    with open(data_file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cleaning_version(path=CLEANING_CODE):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def cache_key(data_file, vectorizer, split):
+    params = sorted((k, repr(v)) for k, v in vectorizer.get_params().items())
+    parts = [dataset_version(data_file), cleaning_version(), type(vectorizer).__name__, params, sorted(split.items())]
+    return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()[:20]
+
+
+# ---------------------------
+# Entries
+# ---------------------------
+def save_entry(cache_dir, key, matrices, train_idx, test_idx, vectorizer, info=None):
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=cache_dir, prefix=".tmp-")
+    for name, matrix in matrices.items():
+        matrix.sort_indices()  # canonical order, so loaded entries never need sorting
+        for part in ("data", "indices", "indptr"):
+            np.save(os.path.join(tmp, f"{name}.{part}.npy"), getattr(matrix, part))
+    np.save(os.path.join(tmp, "train_idx.npy"), train_idx)
+    np.save(os.path.join(tmp, "test_idx.npy"), test_idx)
+    # stop_words_ lists every term cut by max_features and is not needed to transform
+    cached = copy.copy(vectorizer)
+    if hasattr(cached, "stop_words_"):
+        cached.stop_words_ = None
+    joblib.dump(cached, os.path.join(tmp, "vectorizer.joblib"))
+    entry = dict(info or {}, key=key, shapes={name: list(m.shape) for name, m in matrices.items()},
+                 created_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    with open(os.path.join(tmp, "entry.json"), "w", encoding="utf-8") as f:
+        json.dump(entry, f, indent=2)
+    os.chmod(tmp, 0o755)  # mkdtemp makes it 0700, unreadable to other users sharing the cache
+    target = os.path.join(cache_dir, key)
+    if os.path.exists(target):
+        shutil.rmtree(tmp)  # written by a concurrent run meanwhile
+    else:
+        os.replace(tmp, target)
+    prune(cache_dir)
+
+
+def load_entry(cache_dir, key):
+    """{"X_train", "X_test", "train_idx", "test_idx", "vectorizer"} memory-mapped, or None.
+
+    Arrays are mapped copy-on-write: pages are read lazily from the cache and
+    anything sklearn changes in place stays private to this process.
+    """
+    path = os.path.join(cache_dir, key)
+    try:
+        with open(os.path.join(path, "entry.json"), encoding="utf-8") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    def load(name):
+        return np.load(os.path.join(path, name + ".npy"), mmap_mode="c")
+
+    result = {name: csr_matrix((load(f"{name}.data"), load(f"{name}.indices"), load(f"{name}.indptr")),
+                               shape=tuple(entry["shapes"][name]), copy=False) for name in MATRICES}
+    result["train_idx"], result["test_idx"] = load("train_idx"), load("test_idx")
+    result["vectorizer"] = joblib.load(os.path.join(path, "vectorizer.joblib"))
+    os.utime(os.path.join(path, "entry.json"))  # most recently used, for prune()
+    return result
+
+
+def prune(cache_dir, keep=MAX_ENTRIES):
+    entries = []
+    for name in os.listdir(cache_dir):
+        marker = os.path.join(cache_dir, name, "entry.json")
+        if os.path.exists(marker):
+            entries.append((os.path.getmtime(marker), name))
+    for _, name in sorted(entries, reverse=True)[keep:]:
+        shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+
+# ---------------------------
+# Train/test features
+# ---------------------------
+def _split(test_size, random_state):
+    return {"test_size": test_size, "random_state": random_state, "stratify": "label"}
+
+
+def split_rows(df, test_size=0.2, random_state=42):
+    """(train_idx, test_idx): row positions of the stratified split train_model.py uses."""
+    return train_test_split(np.arange(len(df)), test_size=test_size, random_state=random_state,
+                            stratify=df["label"])
+
+
+def split_features(df, data_file, vectorizer, test_size=0.2, random_state=42, cache_dir=CACHE_DIR):
+    """Stratified split of `df` (content/label) and its TF-IDF matrices.
+
+    Returns (X_train, X_test, train_idx, test_idx, vectorizer); the vectorizer
+    is fitted on the train rows, or loaded fitted from the cache. Pass
+    cache_dir=None to always vectorize.
+    """
+    key = cache_key(data_file, vectorizer, _split(test_size, random_state)) if cache_dir else None
+    start = time.perf_counter()
+    hit = load_entry(cache_dir, key) if key else None
+    if hit is not None:
+        print(f"Loaded TF-IDF features from {os.path.join(cache_dir, key)} "
+              f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+        return hit["X_train"], hit["X_test"], hit["train_idx"], hit["test_idx"], hit["vectorizer"]
+
+    # Same rows as train_test_split(X, y, ...) on the frame's columns
+    train_idx, test_idx = split_rows(df, test_size, random_state)
+    content = df["content"]
+    X_train = vectorizer.fit_transform(content.iloc[train_idx])
+    X_test = vectorizer.transform(content.iloc[test_idx])
+    seconds = time.perf_counter() - start
+    if key:
+        save_entry(cache_dir, key, {"X_train": X_train, "X_test": X_test}, train_idx, test_idx, vectorizer,
+                   {"data_file": data_file, "rows": len(df), "vectorize_seconds": round(seconds, 2)})
+        print(f"Cached TF-IDF features in {os.path.join(cache_dir, key)} (vectorizing took {seconds:.1f}s)")
+    return X_train, X_test, train_idx, test_idx, vectorizer
+
+
+def test_features(df, data_file, vectorizer, test_size=0.2, random_state=42, cache_dir=CACHE_DIR):
+    """(X_test, test_idx) for an already fitted vectorizer, e.g. to evaluate saved artifacts.
+
+    The cached test matrix is used when the cache entry's vectorizer learned
+    the same vocabulary and IDF weights; otherwise (or for vectorizers without
+    a vocabulary, like the hashed streaming pipeline) only the test rows are
+    transformed.
+    """
+    if cache_dir and hasattr(vectorizer, "vocabulary_"):
+        hit = load_entry(cache_dir, cache_key(data_file, clone(vectorizer), _split(test_size, random_state)))
+        cached = hit["vectorizer"] if hit is not None else None
+        if (cached is not None and cached.vocabulary_ == vectorizer.vocabulary_
+                and np.array_equal(cached.idf_, vectorizer.idf_)):
+            print("Loaded test features from the feature cache")
+            return hit["X_test"], hit["test_idx"]
+    _, test_idx = split_rows(df, test_size, random_state)
+    return vectorizer.transform(df["content"].iloc[test_idx]), test_idx
@@ -0,0 +1,122 @@
+# feed_cache.py
+"""Persistent conditional-GET cache for RSS feeds.
+
+For every feed we remember the ETag / Last-Modified validators, the GUIDs
+already seen and the entries of the last successful download. A poll sends
+If-None-Match / If-Modified-Since; on 304 the feed is neither downloaded nor
+parsed and the cached entries are reused.
+
+    cache = FeedCache()
+    results = poll_feeds(cache, urls, get=session.get)
+    for r in results:
+        r.new       # entries not emitted by an earlier poll
+        r.entries   # everything currently in the feed (from cache on 304)
+    cache.save()
+"""
+import os
+import json
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+import feedparser
+
+import metrics
+
+CACHE_FILE = "data/.feed_cache.json"
+MAX_SEEN = 5000  # GUIDs remembered per feed
+
+
+class FeedResult:
+    def __init__(self, url, status, entries, new, error=None):
+        self.url = url
+        self.status = status
+        self.entries = entries
+        self.new = new
+        self.error = error
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+
+def entry_id(entry):
+    return entry.get("id") or entry.get("link") or entry.get("title") or ""
+
+
+def _entry_record(entry, feed_title):
+    return {
+        "id": entry_id(entry),
+        "title": entry.get("title", "") or "",
+        "summary": entry.get("summary", "") or "",
+        "link": entry.get("link", "") or "",
+        "feed_title": feed_title,
+    }
+
+
+class FeedCache:
+    def __init__(self, path=CACHE_FILE, max_seen=MAX_SEEN):
+        self.path = path
+        self.max_seen = max_seen
+        self._lock = threading.Lock()
+        self._feeds = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._feeds = json.load(f)
+
+    def conditional_headers(self, url):
+        state = self._feeds.get(url, {})
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+        return headers
+
+    def update(self, url, response):
+        """Record a response for `url` and return what changed."""
+        with self._lock:
+            state = self._feeds.setdefault(url, {"seen": [], "entries": []})
+        if response.status_code == 304:
+            return FeedResult(url, 304, state["entries"], [])
+
+        feed = feedparser.parse(response.content)
+        feed_title = feed.feed.get("title", "RSS Feed")
+        entries = [_entry_record(e, feed_title) for e in feed.entries]
+        with self._lock:
+            seen = set(state["seen"])
+            new = [e for e in entries if e["id"] not in seen]
+            state["seen"] = (state["seen"] + [e["id"] for e in new])[-self.max_seen:]
+            state["entries"] = entries
+            state["etag"] = response.headers.get("ETag")
+            state["last_modified"] = response.headers.get("Last-Modified")
+        return FeedResult(url, response.status_code, entries, new)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with self._lock, open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._feeds, f)
+        os.replace(tmp, self.path)
+
+
+def poll_feed(cache, url, get):
+    """Conditionally fetch one feed; `get(url, headers=...)` returns a requests-style response."""
+    feed = urlparse(url).netloc or url
+    try:
+        with metrics.timer("feed_poll_seconds", feed=feed):
+            result = cache.update(url, get(url, headers=cache.conditional_headers(url)))
+    except Exception as e:
+        metrics.inc("feed_poll_total", feed=feed, status="error")
+        return FeedResult(url, None, [], [], error=e)
+    metrics.inc("feed_poll_total", feed=feed, status=str(result.status))
+    metrics.inc("feed_new_entries_total", len(result.new), feed=feed)
+    return result
+
+
+def poll_feeds(cache, urls, get, workers=8):
+    """Poll feeds concurrently; results come back in the order of `urls`."""
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(urls)))) as pool:
+        return list(pool.map(lambda url: poll_feed(cache, url, get), urls))
@@ -1,4 +1,5 @@
 import pandas as pd
+from dataset_store import CorpusStore
 
 # Load CSV files from data folder
 fake_df = pd.read_csv("data/Fake.csv")
@@ -16,3 +17,12 @@ print(fake_df.head(2))
 
 print("\n--- Real news sample ---")
 print(real_df.head(2))
+
+# Cleaned corpus in the columnar store (only the label column is read)
+store = CorpusStore()
+if store.exists():
+    latest = store.get_version()
+    labels = store.load(columns=["label"])
+    print(f"\n--- Cleaned corpus v{latest['version']} ({len(store.versions())} versions, "
+          f"{store.disk_usage() / 1024 ** 2:.1f} MB on disk) ---")
+    print(labels["label"].value_counts())
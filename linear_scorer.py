@@ -0,0 +1,180 @@
+# linear_scorer.py
+"""NumPy-only inference for the TF-IDF + logistic regression model.
+
+With L2-normalized TF-IDF features the logistic regression score of a
+document is
+
+    z = sum_t(tf_t * idf_t * coef_t) / sqrt(sum_t((tf_t * idf_t) ** 2)) + intercept
+
+so the bundle stores idf_t * coef_t pre-multiplied (the "weight" array,
+folded at export time) next to idf_t for the norm. Terms of a whole batch are
+packed into fixed-width byte keys, hashed as uint64 words, looked up in an
+open-addressing table (built once per process from the mmap'd vocabulary)
+with vectorized probing, and confirmed byte-for-byte; the score is then a few
+bincounts. sklearn and scipy are never imported.
+
+    scorer = LinearScorer.load("models/bundle")
+    scorer.predict_proba(cleaned_texts)   # (n, 2) [real, fake]
+"""
+import re
+
+import numpy as np
+
+import metrics
+from model_bundle import BUNDLE_DIR, load_bundle
+
+# Everything a scorer needs besides a few scalars; shared_model.py places these in shared memory
+STATE_ARRAYS = ("vocab", "idf", "weight", "_hash_mult", "_vocab_keys", "_table_hash", "_table_feature")
+
+
+class LinearScorer:
+    def __init__(self, bundle):
+        manifest = bundle.manifest
+        self.version = bundle.version
+        self.vocab = bundle.vocab
+        self.idf = bundle.idf
+        # Bundles exported before weights were folded in still load
+        self.weight = bundle.weight if hasattr(bundle, "weight") else bundle.idf * bundle.coef
+        self.intercept = bundle.intercept
+        self.lowercase = manifest["lowercase"]
+        self.norm = manifest["norm"]
+        self.sublinear_tf = manifest["sublinear_tf"]
+        self.ngram_range = tuple(manifest["ngram_range"])
+        self._token_re = re.compile(manifest["token_pattern"])
+        # At least one byte wider than the longest term, so longer terms are
+        # truncated to a length no vocabulary entry has and never match by
+        # accident; a multiple of 8 so keys can be hashed as uint64 words
+        width = (manifest["term_width"] // 8 + 1) * 8
+        self._key_dtype = np.dtype(f"S{width}")
+        self._hash_mult = np.random.RandomState(0).randint(1, 2 ** 63, size=width // 8, dtype=np.uint64) | np.uint64(1)
+        self._vocab_keys = np.asarray(self.vocab, dtype=self._key_dtype)
+        self._build_table(self._hash(self._vocab_keys))
+
+    @classmethod
+    def load(cls, root=BUNDLE_DIR, version=None):
+        return cls(load_bundle(root, version))
+
+    def export_state(self):
+        """(arrays, params): the arrays named in STATE_ARRAYS and the picklable remainder."""
+        arrays = {name: np.asarray(getattr(self, name)) for name in STATE_ARRAYS}
+        params = {k: v for k, v in vars(self).items() if k not in STATE_ARRAYS}
+        return arrays, params
+
+    @classmethod
+    def from_state(cls, arrays, params):
+        """Rebuild a scorer around existing arrays (e.g. shared memory views) without re-hashing."""
+        scorer = cls.__new__(cls)
+        scorer.__dict__.update(params)
+        scorer.__dict__.update(arrays)
+        return scorer
+
+    def terms(self, text):
+        """Uni/bigrams exactly as TfidfVectorizer's word analyzer builds them."""
+        if self.lowercase:
+            text = text.lower()
+        tokens = self._token_re.findall(text)
+        lo, hi = self.ngram_range
+        terms = tokens if lo == 1 else []
+        for n in range(max(lo, 2), hi + 1):
+            if n == 2:
+                terms = terms + list(map(" ".join, zip(tokens, tokens[1:])))
+            else:
+                terms = terms + [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+        return terms
+
+    def _keys(self, terms):
+        try:
+            return np.array(terms, dtype=self._key_dtype)  # ASCII terms convert directly
+        except UnicodeEncodeError:
+            return np.array([t.encode("utf-8") for t in terms], dtype=self._key_dtype)
+
+    def _hash(self, keys):
+        words = keys.view(np.uint64).reshape(len(keys), -1)
+        h = (words * self._hash_mult).sum(axis=1)  # wraps mod 2**64
+        return (h ^ (h >> np.uint64(29))) | np.uint64(1)  # 0 marks an empty slot
+
+    def _build_table(self, hashes):
+        bits = max(4, int(len(hashes) * 4 - 1).bit_length())  # load factor <= 1/4
+        self._shift = np.uint64(64 - bits)
+        self._mask = (1 << bits) - 1
+        self._table_hash = np.zeros(1 << bits, dtype=np.uint64)
+        self._table_feature = np.full(1 << bits, -1, dtype=np.int64)
+        self._max_probe = 0
+        for feature, h in enumerate(hashes.tolist()):
+            slot, probe = h >> int(self._shift), 0
+            while self._table_hash[slot]:
+                if self._table_hash[slot] == h:
+                    raise ValueError(f"Vocabulary hash collision in bundle {self.version}")
+                slot, probe = (slot + 1) & self._mask, probe + 1
+            self._table_hash[slot] = h
+            self._table_feature[slot] = feature
+            self._max_probe = max(self._max_probe, probe)
+
+    def lookup(self, keys):
+        """(positions in `keys`, feature indices) of the keys found in the vocabulary."""
+        hashes = self._hash(keys)
+        slots = (hashes >> self._shift).astype(np.int64)
+        features = np.full(len(keys), -1, dtype=np.int64)
+        active = np.arange(len(keys))
+        for _ in range(self._max_probe + 1):
+            found = self._table_hash[slots] == hashes[active]
+            features[active[found]] = self._table_feature[slots[found]]
+            more = ~found & (self._table_hash[slots] != 0)  # occupied by another term: probe on
+            active, slots = active[more], (slots[more] + 1) & self._mask
+            if not len(active):
+                break
+        hit = np.flatnonzero(features >= 0)
+        hit = hit[self._vocab_keys[features[hit]] == keys[hit]]  # rule out hash collisions
+        return hit, features[hit]
+
+    def term_counts(self, texts):
+        """(doc, feature, tf) triples for the vocabulary terms of each text."""
+        all_terms, lengths = [], []
+        for text in texts:
+            terms = self.terms(text)
+            all_terms.extend(terms)
+            lengths.append(len(terms))
+        if not all_terms:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0)
+        hit, features = self.lookup(self._keys(all_terms))
+        docs = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)[hit]
+        pairs, tf = np.unique(docs * len(self.vocab) + features, return_counts=True)
+        docs, features = np.divmod(pairs, len(self.vocab))
+        tf = tf.astype(np.float64)
+        if self.sublinear_tf:
+            tf = 1 + np.log(tf)
+        return docs, features, tf
+
+    def tfidf(self, texts):
+        """(doc, feature, value) triples of the TF-IDF vectors TfidfVectorizer.transform would give."""
+        texts = list(texts)
+        docs, features, tf = self.term_counts(texts)
+        values = tf * self.idf[features]
+        if self.norm == "l2":
+            norms = np.sqrt(np.bincount(docs, weights=values ** 2, minlength=len(texts)))
+            values = values / norms[docs]
+        elif self.norm is not None:
+            raise ValueError(f"Unsupported norm {self.norm!r}")
+        return docs, features, values
+
+    def decision_function(self, texts):
+        texts = list(texts)
+        n_docs = len(texts)
+        with metrics.timer("stage_seconds", stage="vectorize"):
+            docs, features, tf = self.term_counts(texts)
+            if not len(docs):
+                return np.full(n_docs, self.intercept)
+
+        with metrics.timer("stage_seconds", stage="linear"):
+            z = np.bincount(docs, weights=tf * self.weight[features], minlength=n_docs)
+            if self.norm == "l2":
+                norms = np.sqrt(np.bincount(docs, weights=(tf * self.idf[features]) ** 2, minlength=n_docs))
+                np.divide(z, norms, out=z, where=norms > 0)
+            elif self.norm is not None:
+                raise ValueError(f"Unsupported norm {self.norm!r}")
+            return z + self.intercept
+
+    def predict_proba(self, texts):
+        fake = 1 / (1 + np.exp(-self.decision_function(texts)))
+        return np.column_stack([1 - fake, fake])
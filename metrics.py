@@ -0,0 +1,294 @@
+# metrics.py
+"""Lightweight stage timings and counters for the app, scoring service and pipeline scripts.
+
+Off unless enabled: every call first checks one module-level flag, and
+`timer()` then hands back a shared no-op context manager, so instrumented
+code pays a function call and nothing else.
+
+    FNDP_METRICS=1                  enable in this process
+    FNDP_METRICS_FILE=metrics.json  enable and write a JSON dump at exit
+    FNDP_METRICS_PORT=9108          enable and serve Prometheus text on :9108/metrics
+
+    with metrics.timer("stage_seconds", stage="clean"):
+        ...
+    metrics.inc("predictions_total", outcome="fake")
+    metrics.render_prometheus()     # text exposition format
+    metrics.dump_json("metrics.json")
+
+Metric names are prefixed with "fndp_" on export.
+
+Process pools (bulk_score.py, train_model.py --mode search) send each task's
+drain() back with its result and the parent merge()s it. Scoring service
+workers are long-lived: each serves its own /metrics, and the supervisor's
+FNDP_METRICS_PORT exporter covers the supervisor only.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import bisect
+import threading
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "fndp_"
+# Seconds; covers sub-millisecond rule checks up to slow fetches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_enabled = False
+_lock = threading.Lock()
+_counters = {}    # name -> {label tuple: value}
+_histograms = {}  # name -> {label tuple: [bucket counts..., +Inf count, sum]}
+_buckets = {}     # name -> bucket bounds, for histograms not using DEFAULT_BUCKETS
+_server = None
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = flag
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def set_buckets(name, buckets):
+    """Use custom bucket bounds for histogram `name` (e.g. batch sizes instead of seconds)."""
+    _buckets[name] = tuple(sorted(buckets))
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    if not _enabled:
+        return
+    key = _key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    if not _enabled:
+        return
+    buckets = _buckets.get(name, DEFAULT_BUCKETS)
+    key = _key(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = [0] * (len(buckets) + 1) + [0.0]
+        hist[bisect.bisect_left(buckets, value)] += 1
+        hist[-1] += value
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def timer(name, **labels):
+    """Context manager observing the elapsed seconds of its block into histogram `name`."""
+    if not _enabled:
+        return _NOOP
+    return _Timer(name, labels)
+
+
+# ---------------------------
+# Worker processes
+# ---------------------------
+def drain():
+    """Everything recorded so far, cleared from this process.
+
+    Pool workers return this with each result and the parent merge()s it,
+    so work done in worker processes shows up in the parent's export.
+    """
+    with _lock:
+        snapshot = (dict(_counters), dict(_histograms))
+        _counters.clear()
+        _histograms.clear()
+    return snapshot
+
+
+def merge(snapshot):
+    """Add a drain() snapshot from another process to this one's metrics."""
+    counters, histograms = snapshot
+    with _lock:
+        for name, series in counters.items():
+            mine = _counters.setdefault(name, {})
+            for key, value in series.items():
+                mine[key] = mine.get(key, 0) + value
+        for name, series in histograms.items():
+            mine = _histograms.setdefault(name, {})
+            for key, hist in series.items():
+                if key in mine:
+                    mine[key] = [a + b for a, b in zip(mine[key], hist)]
+                else:
+                    mine[key] = list(hist)
+
+
+# ---------------------------
+# Export
+# ---------------------------
+def _snapshot():
+    with _lock:
+        counters = {n: dict(s) for n, s in _counters.items()}
+        histograms = {n: {k: list(h) for k, h in s.items()} for n, s in _histograms.items()}
+    return counters, histograms
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def render_prometheus():
+    counters, histograms = _snapshot()
+    lines = []
+    for name in sorted(counters):
+        lines.append(f"# TYPE {PREFIX}{name} counter")
+        for key, value in sorted(counters[name].items()):
+            lines.append(f"{PREFIX}{name}{_format_labels(key)} {value}")
+    for name in sorted(histograms):
+        buckets = _buckets.get(name, DEFAULT_BUCKETS)
+        lines.append(f"# TYPE {PREFIX}{name} histogram")
+        for key, hist in sorted(histograms[name].items()):
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ["+Inf"], hist[:-1]):
+                cumulative += count
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(key)} {hist[-1]}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(key)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _quantile(buckets, counts, q):
+    """Upper bucket bound below which a `q` fraction of the observations fall."""
+    total = sum(counts)
+    if not total:
+        return None
+    seen = 0
+    for bound, count in zip(list(buckets) + [float("inf")], counts):
+        seen += count
+        if seen >= q * total:
+            return bound
+    return float("inf")
+
+
+def to_dict():
+    counters, histograms = _snapshot()
+    out = {"counters": {}, "histograms": {}}
+    for name, series in sorted(counters.items()):
+        out["counters"][PREFIX + name] = [{"labels": dict(k), "value": v} for k, v in sorted(series.items())]
+    for name, series in sorted(histograms.items()):
+        buckets = _buckets.get(name, DEFAULT_BUCKETS)
+        rows = []
+        for key, hist in sorted(series.items()):
+            counts, total = hist[:-1], hist[-1]
+            n = sum(counts)
+            rows.append({
+                "labels": dict(key), "count": n, "sum": total, "mean": total / n if n else None,
+                "p50": _quantile(buckets, counts, 0.5), "p95": _quantile(buckets, counts, 0.95),
+                "p99": _quantile(buckets, counts, 0.99),
+                "buckets": dict(zip([str(b) for b in buckets] + ["+Inf"], counts)),
+            })
+        out["histograms"][PREFIX + name] = rows
+    return out
+
+
+def dump_json(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(to_dict(), f, indent=2)
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serve /metrics from a daemon thread; later calls are no-ops."""
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
+
+
+def configure_from_env():
+    """Apply the FNDP_METRICS* variables.
+
+    Pool and service workers inherit the environment and import this module
+    too; they only enable collection. The JSON dump and the HTTP exporter
+    belong to the parent, which would otherwise be overwritten or find its
+    port taken.
+    """
+    worker = multiprocessing.parent_process() is not None
+    if os.getenv("FNDP_METRICS", "").lower() in ("1", "true", "yes"):
+        enable()
+    if os.getenv("FNDP_METRICS_FILE"):
+        enable()
+        if not worker:
+            atexit.register(dump_json, os.environ["FNDP_METRICS_FILE"])
+    if os.getenv("FNDP_METRICS_PORT"):
+        enable()
+        if not worker:
+            try:
+                start_http_server(int(os.environ["FNDP_METRICS_PORT"]))
+            except OSError as e:  # e.g. another process already serves the port
+                print(f"metrics: not serving on port {os.environ['FNDP_METRICS_PORT']}: {e}", file=sys.stderr)
+
+
+configure_from_env()
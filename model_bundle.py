@@ -0,0 +1,344 @@
+# model_bundle.py
+"""Versioned, memory-mappable export of the TF-IDF + logistic regression model.
+
+A bundle is a directory of plain NumPy arrays plus a manifest:
+
+    models/bundle/CURRENT                 name of the live version
+    models/bundle/<version>/manifest.json vectorizer settings, intercept, array index
+    models/bundle/<version>/vocab.npy     terms as sorted fixed-width UTF-8 bytes
+    models/bundle/<version>/idf.npy       IDF weight per term (same order)
+    models/bundle/<version>/coef.npy      LR coefficient per term (same order)
+    models/bundle/<version>/weight.npy    idf * coef, folded for linear_scorer
+
+idf/coef/weight are float64 unless exported with `dtype="float16"` or
+`dtype="int8"`; int8 arrays carry a per-array scale in the manifest and are
+dequantized on load (they are small next to the vocabulary).
+
+Arrays are opened with mmap_mode="r", so every serving process maps the same
+page-cache pages instead of unpickling its own vocabulary dict. Terms are
+looked up with a vectorized binary search over the sorted vocabulary.
+BundleManager re-reads CURRENT and swaps in a newly exported version without a
+restart.
+
+    python model_bundle.py export     # from models/*.joblib
+    python model_bundle.py info
+"""
+import os
+import re
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import hashlib
+import threading
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+
+BUNDLE_DIR = "models/bundle"
+CURRENT_FILE = "CURRENT"
+FORMAT_VERSION = 2
+SUPPORTED_FORMATS = (1, 2)  # 2 added optional int8 scales
+WEIGHT_DTYPES = ("float64", "float16", "int8")
+KEEP_VERSIONS = 3  # versions left after an activating export (the active one included)
+
+
+# ---------------------------
+# Export
+# ---------------------------
+def quantize(array, dtype):
+    """(stored array, scale or None) for one float64 weight array."""
+    if dtype == "float64":
+        return array, None
+    if dtype == "float16":
+        return array.astype(np.float16), None
+    if dtype == "int8":
+        # Symmetric per-array scale: the largest magnitude maps to 127
+        scale = float(np.abs(array).max()) / 127 or 1.0
+        return np.round(array / scale).astype(np.int8), scale
+    raise ValueError(f"Unsupported weight dtype {dtype!r}; expected one of {WEIGHT_DTYPES}")
+
+
+def export_bundle(model, vectorizer, root=BUNDLE_DIR, activate=True, dtype="float64", keep=KEEP_VERSIONS):
+    """Write a new bundle version from a fitted TfidfVectorizer + binary LogisticRegression.
+
+    Returns the version name. With `activate`, CURRENT is switched atomically
+    and all but the newest `keep` versions are pruned (keep=None keeps all).
+    `dtype` sets how idf/coef/weight are stored (see WEIGHT_DTYPES). Names
+    carry a digest of the weights, so an identical export within the same
+    second reuses the existing version.
+    """
+    if not hasattr(vectorizer, "vocabulary_") or not hasattr(vectorizer, "idf_"):
+        raise ValueError("Only fitted TfidfVectorizer artifacts can be exported as a bundle "
+                         "(hashed streaming models have no vocabulary)")
+    if list(model.classes_) != [0, 1]:
+        raise ValueError(f"Expected binary classes [0, 1], got {list(model.classes_)}")
+    if vectorizer.analyzer != "word" or vectorizer.stop_words or vectorizer.strip_accents:
+        raise ValueError("Bundle export supports the default word analyzer only")
+
+    columns = np.array(sorted(vectorizer.vocabulary_.values()))
+    terms = [None] * len(columns)
+    for term, col in vectorizer.vocabulary_.items():
+        terms[col] = term.encode("utf-8")
+    width = max(len(t) for t in terms)
+    vocab = np.array(terms, dtype=f"S{width}")
+    order = np.argsort(vocab, kind="stable")
+
+    arrays = {
+        "vocab": vocab[order],
+        "idf": np.asarray(vectorizer.idf_, dtype=np.float64)[order],
+        "coef": np.asarray(model.coef_[0], dtype=np.float64)[order],
+    }
+    arrays["weight"] = arrays["idf"] * arrays["coef"]
+    scales = {}
+    for name in ("idf", "coef", "weight"):
+        arrays[name], scale = quantize(arrays[name], dtype)
+        if scale is not None:
+            scales[name] = scale
+    h = hashlib.sha1(repr(float(model.intercept_[0])).encode("utf-8"))
+    for array in arrays.values():
+        h.update(array.tobytes())
+    digest = h.hexdigest()[:8]
+    version = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{digest}"
+    manifest = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "n_features": int(len(vocab)),
+        "term_width": width,
+        "lowercase": bool(vectorizer.lowercase),
+        "token_pattern": vectorizer.token_pattern,
+        "ngram_range": list(vectorizer.ngram_range),
+        "norm": vectorizer.norm,
+        "sublinear_tf": bool(vectorizer.sublinear_tf),
+        "intercept": float(model.intercept_[0]),
+        "arrays": {name: f"{name}.npy" for name in arrays},
+        "dtype": dtype,
+        "scales": scales,
+    }
+
+    os.makedirs(root, exist_ok=True)
+    target = os.path.join(root, version)
+    if not os.path.isdir(target):
+        tmp_dir = tempfile.mkdtemp(dir=root, prefix=f".{version}.")
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.chmod(tmp_dir, 0o755)  # mkdtemp makes it 0700; services may run as another user
+        try:
+            os.rename(tmp_dir, target)  # a version directory is never seen half-written
+        except OSError:
+            if not os.path.isdir(target):
+                raise
+            shutil.rmtree(tmp_dir)  # the same weights were exported concurrently
+    if activate:
+        activate_version(version, root)
+        if keep:
+            prune_versions(root, keep)
+    return version
+
+
+def activate_version(version, root=BUNDLE_DIR):
+    tmp = os.path.join(root, CURRENT_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(root, CURRENT_FILE))
+
+
+def deactivate(root=BUNDLE_DIR):
+    """Remove CURRENT, so load_scorer() falls back to the joblib artifacts; returns the version it pointed at."""
+    version = current_version(root)
+    try:
+        os.remove(os.path.join(root, CURRENT_FILE))
+    except FileNotFoundError:
+        pass
+    return version
+
+
+def current_version(root=BUNDLE_DIR):
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def prune_versions(root=BUNDLE_DIR, keep=KEEP_VERSIONS):
+    """Delete all but the newest `keep` versions (never the active one)."""
+    active = current_version(root)
+    # Oldest first by write time; names only have second resolution
+    versions = sorted((d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)) and not d.startswith(".")),
+                      key=lambda d: (os.stat(os.path.join(root, d)).st_mtime_ns, d))
+    for version in versions[:-keep]:
+        if version != active:
+            shutil.rmtree(os.path.join(root, version))
+
+
+# ---------------------------
+# Serving
+# ---------------------------
+class Bundle:
+    """Read-only, mmap-backed model loaded from one bundle version directory."""
+
+    def __init__(self, path, mmap=True):
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest["format"] not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported bundle format {self.manifest['format']} in {path}")
+        self.path = path
+        self.version = self.manifest["version"]
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, file), mmap_mode=mode)
+                  for name, file in self.manifest["arrays"].items()}
+        for name, scale in self.manifest.get("scales", {}).items():
+            arrays[name] = arrays[name].astype(np.float64) * scale
+        self.vocab = arrays["vocab"]
+        self.idf = arrays["idf"]
+        self.coef = arrays["coef"]
+        if "weight" in arrays:
+            self.weight = arrays["weight"]
+        self.intercept = self.manifest["intercept"]
+        self.term_width = self.manifest["term_width"]
+        self._token_re = re.compile(self.manifest["token_pattern"])
+        self._ngram_range = tuple(self.manifest["ngram_range"])
+
+    def analyze(self, text):
+        """Same uni/bigram terms TfidfVectorizer's word analyzer produces."""
+        if self.manifest["lowercase"]:
+            text = text.lower()
+        tokens = self._token_re.findall(text)
+        lo, hi = self._ngram_range
+        terms = list(tokens) if lo == 1 else []
+        for n in range(max(lo, 2), hi + 1):
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def lookup(self, terms):
+        """Feature indices (sorted-vocabulary positions) of the terms present in the vocabulary."""
+        encoded = [t.encode("utf-8") for t in terms]
+        encoded = [t for t in encoded if len(t) <= self.term_width]  # longer terms cannot be in vocab
+        if not encoded:
+            return np.zeros(0, dtype=np.int64)
+        keys = np.array(encoded, dtype=self.vocab.dtype)
+        idx = np.searchsorted(self.vocab, keys)
+        idx[idx == len(self.vocab)] = 0
+        return idx[self.vocab[idx] == keys]
+
+    def doc_weights(self, text):
+        """(feature indices, tf-idf weights) for one document, L2 normalized like sklearn."""
+        counts = Counter(self.analyze(text))
+        idx = self.lookup(list(counts))
+        if not len(idx):
+            return idx, np.zeros(0)
+        # Counter keys are unique, so each matched vocabulary index appears once
+        terms = self.vocab[idx]
+        tf = np.array([counts[t.decode("utf-8")] for t in terms], dtype=np.float64)
+        if self.manifest["sublinear_tf"]:
+            tf = 1 + np.log(tf)
+        weights = tf * self.idf[idx]
+        if self.manifest["norm"] == "l2":
+            weights /= np.sqrt((weights ** 2).sum())
+        return idx, weights
+
+    def transform(self, texts):
+        from scipy.sparse import csr_matrix
+        indptr, indices, data = [0], [], []
+        for text in texts:
+            idx, weights = self.doc_weights(text)
+            indices.append(idx)
+            data.append(weights)
+            indptr.append(indptr[-1] + len(idx))
+        return csr_matrix(
+            (np.concatenate(data) if data else np.zeros(0), np.concatenate(indices) if indices else np.zeros(0, int), indptr),
+            shape=(len(texts), len(self.vocab)),
+        )
+
+    def predict_proba(self, X):
+        z = X @ self.coef + self.intercept
+        fake = 1 / (1 + np.exp(-z))
+        return np.column_stack([1 - fake, fake])
+
+
+def load_bundle(root=BUNDLE_DIR, version=None, mmap=True):
+    version = version or current_version(root)
+    if version is None:
+        raise FileNotFoundError(f"No active bundle in {root}; run `python model_bundle.py export`")
+    return Bundle(os.path.join(root, version), mmap=mmap)
+
+
+class BundleManager:
+    """Holds the live bundle and swaps in a new CURRENT version when one is exported.
+
+    `loader(root, version)` builds the served object (a Bundle by default,
+    e.g. LinearScorer.load for the folded scorer).
+
+    `current()` stats the CURRENT file at most every `check_interval` seconds;
+    callers keep using the bundle object they got, so a swap never changes the
+    model halfway through a batch.
+    """
+
+    def __init__(self, root=BUNDLE_DIR, check_interval=2.0, loader=None):
+        self.root = root
+        self.check_interval = check_interval
+        self.loader = loader or load_bundle
+        self._lock = threading.Lock()
+        self._bundle = self.loader(root)
+        self._next_check = time.monotonic() + check_interval
+        self.reloads = 0
+        self._deactivated = False
+
+    def current(self):
+        if time.monotonic() >= self._next_check:
+            with self._lock:
+                if time.monotonic() >= self._next_check:
+                    self._next_check = time.monotonic() + self.check_interval
+                    version = current_version(self.root)
+                    if version is None and not self._deactivated:
+                        # deactivate(): the saved model is not a bundle, only a restart can serve it
+                        print(f"Bundle CURRENT removed from {self.root}; serving {self._bundle.version} until restart")
+                    self._deactivated = version is None
+                    if version and version != self._bundle.version:
+                        self._bundle = self.loader(self.root, version)
+                        self.reloads += 1
+                        print(f"Swapped in model bundle {version}")
+        return self._bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or inspect model bundles")
+    parser.add_argument("--root", default=BUNDLE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export", help="export models/*.joblib as a new bundle version")
+    p.add_argument("--model", default="models/fake_news_model.joblib")
+    p.add_argument("--vectorizer", default="models/tfidf_vectorizer.joblib")
+    p.add_argument("--no-activate", action="store_true")
+    p.add_argument("--dtype", choices=WEIGHT_DTYPES, default="float64", help="storage type of idf/coef/weight")
+    p = sub.add_parser("activate", help="point CURRENT at an existing version")
+    p.add_argument("version")
+    sub.add_parser("info", help="show the active bundle")
+    p = sub.add_parser("prune", help="delete old versions")
+    p.add_argument("--keep", type=int, default=KEEP_VERSIONS)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        import joblib
+        version = export_bundle(joblib.load(args.model), joblib.load(args.vectorizer), args.root,
+                                activate=not args.no_activate, dtype=args.dtype)
+        print(f"Exported bundle {version} to {args.root}")
+    elif args.command == "activate":
+        activate_version(args.version, args.root)
+        print(f"Activated bundle {args.version}")
+    elif args.command == "info":
+        bundle = load_bundle(args.root)
+        size = sum(os.path.getsize(os.path.join(bundle.path, f)) for f in os.listdir(bundle.path))
+        print(f"Active bundle {bundle.version}: {bundle.manifest['n_features']} features, "
+              f"{bundle.manifest.get('dtype', 'float64')} weights, {size / 1024:.0f} KB on disk")
+    elif args.command == "prune":
+        prune_versions(args.root, args.keep)
+
+
+if __name__ == "__main__":
+    main()
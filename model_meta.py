@@ -0,0 +1,209 @@
+# model_meta.py
+"""What the saved model was trained on, so later updates can train on just the new rows.
+
+Next to the joblib artifacts:
+
+    models/model_meta.json   artifact fingerprint, dataset position, holdout accuracy, update history
+    models/.holdout.csv      fixed evaluation sample every later update is validated on
+    models/RETRAIN_REQUIRED  written when an incremental update is refused; removed by a full retrain
+
+The dataset position is the byte size of data/cleaned_news.csv (plus a hash of
+the bytes just before it, to notice a rewrite) or the corpus store version and
+its parts. `update_dataset.py --incremental` only appends, so the rows after
+that position are exactly the ones the model has not seen; a full rebuild
+rewrites the file and the position no longer matches.
+"""
+import io
+import os
+import json
+import hashlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import CorpusStore, is_store
+
+DATA_FILE = "data/cleaned_news.csv"
+META_FILE = "model_meta.json"
+HOLDOUT_FILE = ".holdout.csv"
+RETRAIN_MARKER = "RETRAIN_REQUIRED"
+RETRAIN_EXIT_CODE = 2  # update_model.py exit status when only a full retrain will do
+HOLDOUT_ROWS = 5000
+TAIL_BYTES = 64 * 1024
+FULL_READ_BYTES = 16 * 1024 * 1024  # CSV prefixes up to this size are sampled after reading them whole
+
+
+def _path(model_dir, name):
+    return os.path.join(model_dir or ".", name)
+
+
+def _write_json(path, payload):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+
+
+# ---------------------------
+# Dataset position
+# ---------------------------
+def _tail_sha1(path, end):
+    with open(path, "rb") as f:
+        f.seek(max(0, end - TAIL_BYTES))
+        return hashlib.sha1(f.read(end - f.tell())).hexdigest()
+
+
+def data_position(data_file):
+    if is_store(data_file):
+        version = CorpusStore(data_file).get_version()
+        return {"kind": "store", "path": data_file, "version": version["version"],
+                "parts": version["parts"], "rows": version["rows"]}
+    size = os.path.getsize(data_file)
+    return {"kind": "csv", "path": data_file, "bytes": size, "tail_sha1": _tail_sha1(data_file, size)}
+
+
+def read_since(data_file, position):
+    """Rows appended to `data_file` after `position`, or None if it was rewritten instead."""
+    if position.get("path") != data_file:
+        return None
+    if position["kind"] == "store":
+        if not is_store(data_file):
+            return None
+        store = CorpusStore(data_file)
+        parts = store.get_version()["parts"]
+        if parts[:len(position["parts"])] != position["parts"]:
+            return None  # replaced by a full rebuild
+        new = [os.path.join(store.parts_dir, p) for p in parts[len(position["parts"]):]]
+        return pd.concat([pd.read_parquet(p) for p in new], ignore_index=True) if new else pd.DataFrame(columns=["content", "label"])
+
+    if is_store(data_file) or os.path.getsize(data_file) < position["bytes"]:
+        return None
+    if _tail_sha1(data_file, position["bytes"]) != position["tail_sha1"]:
+        return None
+    with open(data_file, "rb") as f:
+        header = pd.read_csv(f, nrows=0).columns.tolist()
+        f.seek(position["bytes"])
+        if not f.read(1):
+            return pd.DataFrame(columns=header)
+        f.seek(position["bytes"])
+        return pd.read_csv(f, header=None, names=header)
+
+
+def sample_before(data_file, position, n, seed=42):
+    """About `n` random rows from before `position`, without reading the whole dataset.
+
+    A large CSV is sampled by seeking to random byte offsets and taking the
+    line that starts after each one (cleaned content is a single line of
+    letters and spaces), so longer rows are picked slightly more often. A
+    store is sampled by row: only the Parquet row groups holding the picked
+    rows are read.
+    """
+    rng = np.random.default_rng(seed)
+    if position["kind"] == "store":
+        return _sample_parts([os.path.join(CorpusStore(data_file).parts_dir, p) for p in position["parts"]], n, rng)
+
+    end = position["bytes"]
+    with open(data_file, "rb") as f:
+        header = f.readline()
+        start = f.tell()
+        if end - start <= FULL_READ_BYTES:
+            df = pd.read_csv(io.BytesIO(header + f.read(max(0, end - start))))
+            return df.sample(min(n, len(df)), random_state=seed)
+        lines = {}
+        # Oversampled: offsets landing in the same line pick it once
+        for offset in np.sort(rng.integers(start - 1, end - 1, size=int(n * 1.2) + 10)):
+            f.seek(offset)
+            f.readline()  # the rest of the line the offset fell into
+            if f.tell() < end and f.tell() not in lines:
+                lines[f.tell()] = f.readline()
+    rows = list(lines.values())
+    picked = rng.choice(len(rows), size=min(n, len(rows)), replace=False)
+    return pd.read_csv(io.BytesIO(header + b"".join(rows[i] for i in sorted(picked))), on_bad_lines="skip")
+
+
+def _sample_parts(paths, n, rng):
+    import pyarrow.parquet as pq
+    files = [pq.ParquetFile(p) for p in paths]
+    groups = [(f, g) for f in files for g in range(f.num_row_groups)]
+    sizes = np.array([f.metadata.row_group(g).num_rows for f, g in groups], dtype=np.int64)
+    total = int(sizes.sum())
+    picked = np.sort(rng.choice(total, size=min(n, total), replace=False))
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    frames = []
+    for i, (f, g) in enumerate(groups):
+        rows = picked[(picked >= bounds[i]) & (picked < bounds[i + 1])] - bounds[i]
+        if len(rows):
+            frames.append(f.read_row_group(g, columns=["content", "label"]).take(rows).to_pandas())
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["content", "label"])
+
+
+# ---------------------------
+# Metadata, holdout, retrain marker
+# ---------------------------
+def load_meta(model_dir):
+    try:
+        with open(_path(model_dir, META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_holdout(model_dir):
+    try:
+        return pd.read_csv(_path(model_dir, HOLDOUT_FILE))
+    except FileNotFoundError:
+        return None
+
+
+def record_training(model_dir, artifacts, data_file, train_rows, accuracy, holdout=None, parent=None, delta_rows=0):
+    """Write model_meta.json after saving artifacts; `holdout` (content/label) is only given by full retrains."""
+    full = parent is None
+    if holdout is not None:
+        if len(holdout) > HOLDOUT_ROWS:
+            holdout = holdout.sample(HOLDOUT_ROWS, random_state=42)
+        holdout[["content", "label"]].to_csv(_path(model_dir, HOLDOUT_FILE), index=False, encoding="utf-8")
+    meta = {
+        "artifacts": artifacts,
+        "kind": "full" if full else "incremental",
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "data": data_position(data_file),
+        "train_rows": train_rows if full else parent["train_rows"],
+        "holdout_accuracy": accuracy,
+        "rows_since_full": 0 if full else parent["rows_since_full"] + delta_rows,
+        "updates_since_full": 0 if full else parent["updates_since_full"] + 1,
+        "parent": None if full else parent["artifacts"],
+    }
+    _write_json(_path(model_dir, META_FILE), meta)
+    if full:
+        clear_retrain_marker(model_dir)
+    return meta
+
+
+def clear_meta(model_dir):
+    """Forget the metadata and holdout of the previous model, e.g. after training one update_model can't extend."""
+    for name in (META_FILE, HOLDOUT_FILE):
+        try:
+            os.remove(_path(model_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+def mark_retrain_required(model_dir, reason):
+    _write_json(_path(model_dir, RETRAIN_MARKER), {"reason": reason, "at": datetime.now().isoformat(timespec="seconds")})
+
+
+def retrain_required(model_dir):
+    """The reason a full retrain was requested, or None."""
+    try:
+        with open(_path(model_dir, RETRAIN_MARKER), encoding="utf-8") as f:
+            return json.load(f)["reason"]
+    except FileNotFoundError:
+        return None
+
+
+def clear_retrain_marker(model_dir):
+    try:
+        os.remove(_path(model_dir, RETRAIN_MARKER))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,202 @@
+# near_dup.py
+"""Near-duplicate detection with word shingles, MinHash and LSH banding.
+
+Syndicated stories that reappear across NewsAPI, GNews and RSS with small
+edits have almost the same set of 3-word shingles. Each document is reduced to
+a MinHash signature whose positions agree with probability equal to the
+Jaccard similarity of the shingle sets. Signatures are split into bands; two
+documents become candidates if any band matches exactly, and candidates are
+confirmed by comparing their full signatures against the threshold.
+
+Band tables are sorted NumPy arrays plus a small dict of recent additions that
+is merged in periodically, so the index can be saved, reloaded and extended
+in place and memory stays at a few hundred bytes per document.
+
+    index = NearDuplicateIndex(threshold=0.8)
+    keep = index.filter_new(texts)      # False for near-copies, adds the rest
+    index.save("data/.near_dup_index.npz")
+"""
+import os
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.8
+NUM_PERM = 64
+SHINGLE_SIZE = 3
+MERGE_EVERY = 50_000  # pending band entries before they are merged into the sorted arrays
+WORD_HASH_CACHE = 100_000  # distinct words whose hashes are remembered (about 20 MB when full)
+
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_MAX_HASH = np.uint32(0xFFFFFFFF)
+
+
+def _choose_bands(num_perm, threshold):
+    """(bands, rows) with bands * rows == num_perm whose LSH S-curve midpoint is nearest the threshold."""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+@lru_cache(maxsize=WORD_HASH_CACHE)
+def _word_hash(word):
+    # Bounded: a long-running fetcher sees an open-ended vocabulary of names and typos
+    return zlib.crc32(word.encode("utf-8")) or 1
+
+
+def shingle_hashes(text, shingle_size=SHINGLE_SIZE):
+    """uint64 hashes of the word k-grams of an already cleaned text."""
+    words = text.split()
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    hashes = np.fromiter(map(_word_hash, words), dtype=np.uint64, count=len(words))
+    if len(hashes) < shingle_size:
+        shingle_size = len(hashes)
+    shingles = hashes[:len(hashes) - shingle_size + 1].copy()
+    for i in range(1, shingle_size):
+        # Polynomial combination, wrapping in uint64, then folded to 32 bits for MinHash
+        shingles = shingles * np.uint64(1000003) + hashes[i:len(hashes) - shingle_size + 1 + i]
+    return np.unique((shingles ^ (shingles >> np.uint64(32))) & np.uint64(0xFFFFFFFF))
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.bands, self.rows = _choose_bands(num_perm, threshold)
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self._band_mult = rng.randint(1, 2 ** 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._new_signatures = []
+        self._sorted_keys = [np.zeros(0, dtype=np.uint64) for _ in range(self.bands)]
+        self._sorted_ids = [np.zeros(0, dtype=np.uint32) for _ in range(self.bands)]
+        self._pending = [{} for _ in range(self.bands)]
+        self._pending_count = 0
+
+    def __len__(self):
+        return len(self._signatures) + len(self._new_signatures)
+
+    # ---------------------------
+    # Signatures
+    # ---------------------------
+    def signature(self, text):
+        shingles = shingle_hashes(text, self.shingle_size)
+        if not len(shingles):
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        # (a * x + b) mod p for every permutation x shingle; x < 2**32 so nothing overflows uint64
+        permuted = (np.outer(self._a, shingles) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        bands = signature.astype(np.uint64).reshape(self.bands, self.rows)
+        return (bands * self._band_mult).sum(axis=1)  # wraps mod 2**64
+
+    def _get_signature(self, doc_id):
+        n = len(self._signatures)
+        return self._signatures[doc_id] if doc_id < n else self._new_signatures[doc_id - n]
+
+    # ---------------------------
+    # Query & insert
+    # ---------------------------
+    def query_signature(self, signature):
+        """[(doc_id, estimated_jaccard)] of indexed documents at or above the threshold."""
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            keys = self._sorted_keys[band]
+            lo = np.searchsorted(keys, key, side="left")
+            hi = np.searchsorted(keys, key, side="right")
+            candidates.update(self._sorted_ids[band][lo:hi].tolist())
+            candidates.update(self._pending[band].get(int(key), ()))
+        matches = []
+        for doc_id in candidates:
+            similarity = float(np.mean(self._get_signature(doc_id) == signature))
+            if similarity >= self.threshold:
+                matches.append((doc_id, similarity))
+        return sorted(matches, key=lambda m: -m[1])
+
+    def query(self, text):
+        return self.query_signature(self.signature(text))
+
+    def add_signature(self, signature):
+        doc_id = len(self)
+        self._new_signatures.append(signature)
+        for band, key in enumerate(self._band_keys(signature)):
+            self._pending[band].setdefault(int(key), []).append(doc_id)
+        self._pending_count += 1
+        if self._pending_count >= MERGE_EVERY:
+            self._merge()
+        return doc_id
+
+    def add(self, text):
+        return self.add_signature(self.signature(text))
+
+    def filter_new(self, texts):
+        """Boolean mask: True for texts that are not near-copies of the index or
+        of earlier texts in the batch. Kept texts are added to the index."""
+        keep = []
+        for text in texts:
+            signature = self.signature(text)
+            is_new = not self.query_signature(signature)
+            if is_new:
+                self.add_signature(signature)
+            keep.append(is_new)
+        return np.array(keep, dtype=bool)
+
+    def _merge(self):
+        if self._new_signatures:
+            self._signatures = np.vstack([self._signatures, np.array(self._new_signatures, dtype=np.uint32)])
+            self._new_signatures = []
+        for band in range(self.bands):
+            pending = self._pending[band]
+            if not pending:
+                continue
+            keys = np.fromiter((k for k, ids in pending.items() for _ in ids), dtype=np.uint64)
+            ids = np.fromiter((i for ids in pending.values() for i in ids), dtype=np.uint32)
+            keys = np.concatenate([self._sorted_keys[band], keys])
+            ids = np.concatenate([self._sorted_ids[band], ids])
+            order = np.argsort(keys, kind="stable")
+            self._sorted_keys[band] = keys[order]
+            self._sorted_ids[band] = ids[order]
+            self._pending[band] = {}
+        self._pending_count = 0
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def save(self, path):
+        self._merge()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            params=np.array([self.threshold, self.num_perm, self.shingle_size, self.seed], dtype=np.float64),
+            signatures=self._signatures,
+            keys=np.array(self._sorted_keys, dtype=np.uint64).reshape(self.bands, -1),
+            ids=np.array(self._sorted_ids, dtype=np.uint32).reshape(self.bands, -1),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, threshold=None):
+        """Load a saved index; `threshold` may differ from the one it was built with
+        as long as the banding stays the same."""
+        with np.load(path) as data:
+            saved_threshold, num_perm, shingle_size, seed = data["params"].tolist()
+            index = cls(saved_threshold, int(num_perm), int(shingle_size), int(seed))
+            index._signatures = data["signatures"]
+            index._sorted_keys = list(data["keys"])
+            index._sorted_ids = list(data["ids"])
+        if threshold is not None:
+            index.threshold = threshold
+        return index
+
+    @classmethod
+    def load_or_create(cls, path, threshold=DEFAULT_THRESHOLD):
+        if path and os.path.exists(path):
+            return cls.load(path, threshold)
+        return cls(threshold)
@@ -0,0 +1,129 @@
+# prediction_cache.py
+"""Bounded LRU + TTL cache for prediction results.
+
+Keys are a hash of the normalized text and the model artifact version, so a
+retrained model never sees scores produced by the previous one; binding a new
+version also drops every stale entry. Hit/miss/eviction counters are kept for
+monitoring and the cache can optionally be persisted across restarts.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_SIZE = 10_000
+DEFAULT_TTL = 24 * 3600  # seconds
+
+
+class PredictionCache:
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL, path=None, save_every=100):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.save_every = save_every
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        if path and os.path.exists(path):
+            self.load()
+
+    @staticmethod
+    def key(normalized_text, version):
+        return hashlib.sha256(f"{version}\0{normalized_text}".encode("utf-8")).hexdigest()
+
+    def bind_version(self, version):
+        """Switch to a new artifact version; everything cached for the old one is dropped."""
+        with self._lock:
+            if version == self.version:
+                return
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self.version = version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._unsaved += 1
+            should_save = self.path and self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            now = time.time()
+            payload = {
+                "version": self.version,
+                "entries": [[k, exp, v] for k, (exp, v) in self._entries.items() if exp >= now],
+            }
+            self._unsaved = 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, self.path)
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return  # a missing or corrupt cache file just means a cold start
+        now = time.time()
+        with self._lock:
+            self.version = payload.get("version")
+            self._entries = OrderedDict(
+                (k, (exp, v)) for k, exp, v in payload.get("entries", [])[-self.max_size:] if exp >= now
+            )
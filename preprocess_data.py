@@ -1,5 +1,5 @@
 import pandas as pd
-import re
+from text_cleaning import clean_series
 
 # Load datasets
 fake_df = pd.read_csv("data/Fake.csv")
@@ -12,16 +12,8 @@ real_df["label"] = 0
 # Combine into one dataframe
 df = pd.concat([fake_df, real_df], ignore_index=True)
 
-# Function to clean text
-def clean_text(text):
-    text = str(text).lower()  # lowercase
-    text = re.sub(r'http\S+', ' ', text)  # remove URLs
-    text = re.sub(r'[^a-z\s]', ' ', text)  # keep only letters
-    text = re.sub(r'\s+', ' ', text).strip()  # remove extra spaces
-    return text
-
 # Combine title + text into content
-df["content"] = (df["title"].fillna('') + " " + df["text"].fillna('')).apply(clean_text)
+df["content"] = clean_series(df["title"].fillna('') + " " + df["text"].fillna(''))
 
 # Drop unused columns
 df = df[["content", "label"]]
@@ -0,0 +1,249 @@
+# run_pipeline.py
+"""Refresh the dataset and model in one command: fetch → scrape → update → train.
+
+Each script is a stage with declared inputs and outputs. Stages of one group
+run in parallel (all fetchers and scrapers at once), groups run in order.
+A stage whose input files, code and command are unchanged since its last
+successful run, and whose outputs still exist, is skipped; fetchers read
+remote sources and always run, and their output files become the inputs of
+the dataset update. Everything runs headless: the training stage writes the
+confusion matrix to models/confusion_matrix.png.
+
+The train stage first tries update_model.py (warm start on the appended rows)
+and falls back to a full train_model.py run when no incremental update is
+possible (no model metadata, RETRAIN_REQUIRED, or update_model exits with 2).
+
+    python run_pipeline.py                       # nightly refresh
+    python run_pipeline.py --skip fetch          # offline: just update + train
+    python run_pipeline.py --dry-run             # show what would run
+    python run_pipeline.py --force train --metrics-out pipeline_metrics.json
+
+Stage logs go to data/.pipeline_logs/<stage>.log, hashes and timings of the
+last runs to data/.pipeline_state.json.
+"""
+import os
+import sys
+import json
+import glob
+import time
+import hashlib
+import argparse
+import subprocess
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import model_meta
+from model_meta import DATA_FILE, RETRAIN_EXIT_CODE
+from detector import MODEL_FILE, VECTORIZER_FILE
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = "data/.pipeline_state.json"
+LOG_DIR = "data/.pipeline_logs"
+PLOT_FILE = "models/confusion_matrix.png"
+LOG_TAIL_LINES = 20
+
+# Local modules train_model.py / update_model.py import: a change to any of them can change the model
+TRAIN_CODE = ["train_model.py", "update_model.py", "text_cleaning.py", "detector.py", "model_bundle.py",
+              "model_meta.py", "feature_cache.py", "similarity_index.py", "dataset_store.py", "linear_scorer.py"]
+
+# inputs are glob patterns resolved at run time; remote stages always run
+Stage = namedtuple("Stage", "name group command inputs outputs remote optional")
+
+
+def _script(path, *args):
+    return [sys.executable, path, *args]
+
+
+def _source_files():
+    """data/*.csv sources update_dataset.py merges (not the cleaned file or its backups)."""
+    return sorted(p for p in glob.glob("data/*.csv")
+                  if os.path.basename(p) != "cleaned_news.csv" and "backup" not in p.lower())
+
+
+STAGES = [
+    Stage("fetch_newsapi", "fetch", _script("scripts/fetch_newsapi.py"), [],
+          ["data/aggregated_indian_news.csv"], remote=True, optional=True),
+    Stage("fetch_rss", "fetch", _script("scripts/fetch_rss.py"), [],
+          ["data/new_real_rss.csv"], remote=True, optional=True),
+    Stage("scrape_fake_news", "fetch", _script("scripts/scrape_fake_news.py"), [],
+          ["data/fake_news.csv"], remote=True, optional=True),
+    Stage("scrape_real_news", "fetch", _script("scripts/scrape_real_news.py"), [],
+          ["data/real_news.csv"], remote=True, optional=True),
+    Stage("update_dataset", "update", _script("scripts/update_dataset.py", "--incremental"),
+          [_source_files, "scripts/update_dataset.py", "text_cleaning.py", "near_dup.py"],
+          [DATA_FILE], remote=False, optional=False),
+    Stage("train", "train", None,  # see train_command()
+          [DATA_FILE, *TRAIN_CODE],
+          [MODEL_FILE, VECTORIZER_FILE], remote=False, optional=False),
+]
+GROUPS = list(dict.fromkeys(stage.group for stage in STAGES))
+
+
+# ---------------------------
+# Input hashing
+# ---------------------------
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {"files": {}, "stages": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def file_digest(path, known):
+    """sha256 of a file; `known` (path -> size/mtime/sha256) avoids rehashing files that were not touched."""
+    st = os.stat(path)
+    entry = known.get(path)
+    if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+        return entry["sha256"]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    known[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": h.hexdigest()}
+    return known[path]["sha256"]
+
+
+def resolve_inputs(stage):
+    paths = []
+    for pattern in stage.inputs:
+        paths.extend(pattern() if callable(pattern) else sorted(glob.glob(pattern)))
+    return sorted(set(paths))
+
+
+def stage_digest(stage, known):
+    h = hashlib.sha256(json.dumps(stage.command or stage.name).encode("utf-8"))
+    for path in resolve_inputs(stage):
+        h.update(f"{path}\0{file_digest(path, known)}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def needs_run(stage, state, digest, force):
+    if force or stage.remote:
+        return True
+    last = state["stages"].get(stage.name)
+    if not last or last.get("status") != "ok" or last.get("digest") != digest:
+        return True
+    return not all(os.path.exists(p) for p in stage.outputs)
+
+
+# ---------------------------
+# Running stages
+# ---------------------------
+def run_logged(command, log):
+    log.write(f"$ {' '.join(command)}\n")
+    log.flush()
+    env = dict(os.environ, MPLBACKEND="Agg", PYTHONUNBUFFERED="1")
+    return subprocess.run(command, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT, env=env).returncode
+
+
+def train_command(log):
+    """Incremental update when possible, full retrain otherwise; returns the exit code."""
+    model_dir = os.path.dirname(MODEL_FILE)
+    reason = model_meta.retrain_required(model_dir)
+    if model_meta.load_meta(model_dir) is not None and reason is None:
+        code = run_logged(_script("update_model.py"), log)
+        if code != RETRAIN_EXIT_CODE:
+            return code
+    return run_logged(_script("train_model.py", "--plot-out", PLOT_FILE), log)
+
+
+def run_stage(stage):
+    """Run one stage with its output in LOG_DIR; returns (exit code, seconds)."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    start = time.perf_counter()
+    with open(os.path.join(LOG_DIR, f"{stage.name}.log"), "w", encoding="utf-8") as log, \
+            metrics.timer("pipeline_stage_seconds", stage=stage.name):
+        code = train_command(log) if stage.command is None else run_logged(stage.command, log)
+    return code, time.perf_counter() - start
+
+
+def log_tail(stage, lines=LOG_TAIL_LINES):
+    with open(os.path.join(LOG_DIR, f"{stage.name}.log"), encoding="utf-8", errors="replace") as f:
+        return "".join(f.readlines()[-lines:])
+
+
+def run_pipeline(skip=(), force=(), dry_run=False, workers=None):
+    """Run every group in order; returns [(stage, status, seconds)]."""
+    state = load_state()
+    summary = []
+    for group in GROUPS:
+        if group in skip:
+            summary.extend((s.name, "skipped (--skip)", 0.0) for s in STAGES if s.group == group)
+            continue
+        # Digests are taken when the group starts, after earlier groups wrote their outputs
+        digests, pending = {}, []
+        for stage in (s for s in STAGES if s.group == group and s.name not in skip):
+            digests[stage.name] = stage_digest(stage, state["files"])
+            if needs_run(stage, state, digests[stage.name], stage.name in force or group in force):
+                pending.append(stage)
+            else:
+                summary.append((stage.name, "unchanged", 0.0))
+                metrics.inc("pipeline_stages_total", stage=stage.name, status="unchanged")
+                print(f"[{stage.name}] inputs unchanged, skipped")
+        if dry_run:
+            summary.extend((s.name, "would run", 0.0) for s in pending)
+            continue
+
+        with ThreadPoolExecutor(max_workers=workers or max(len(pending), 1)) as pool:
+            results = list(zip(pending, pool.map(run_stage, pending)))
+        failed = False
+        for stage, (code, seconds) in results:
+            status = "ok" if code == 0 else f"failed ({code})"
+            metrics.inc("pipeline_stages_total", stage=stage.name, status="ok" if code == 0 else "failed")
+            summary.append((stage.name, status, seconds))
+            print(f"[{stage.name}] {status} in {seconds:.1f}s")
+            if code != 0:
+                print(log_tail(stage), end="")
+                failed = failed or not stage.optional
+            # Digest of the inputs this run actually used; a failed run is retried next time
+            state["stages"][stage.name] = {"digest": digests[stage.name], "status": "ok" if code == 0 else "failed",
+                                           "seconds": round(seconds, 2), "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        save_state(state)
+        if failed:
+            print(f"Stopping: a required stage in '{group}' failed")
+            break
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run fetch → scrape → update → train, skipping unchanged stages")
+    parser.add_argument("--skip", default="", help=f"comma-separated stages or groups to leave out ({', '.join(GROUPS)})")
+    parser.add_argument("--force", default="", help="comma-separated stages or groups to run even if unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages would run")
+    parser.add_argument("--workers", type=int, help="stages run at once within a group (default: all)")
+    parser.add_argument("--metrics-out", help="write per-stage timings and outcomes to this JSON file")
+    args = parser.parse_args()
+    metrics.enable()
+
+    def names(value):
+        return {n.strip() for n in value.split(",") if n.strip()}
+
+    skip = names(args.skip)
+    skip |= {s.name for s in STAGES if s.group in skip}
+    start = time.perf_counter()
+    summary = run_pipeline(skip, names(args.force), args.dry_run, args.workers)
+    total = time.perf_counter() - start
+
+    print(f"\n{'stage':<18} {'status':<18} {'seconds':>8}")
+    for name, status, seconds in summary:
+        print(f"{name:<18} {status:<18} {seconds:>8.1f}")
+    print(f"{'total':<18} {'':<18} {total:>8.1f}")
+    if args.metrics_out:
+        metrics.dump_json(args.metrics_out)
+        print(f"Metrics written to {args.metrics_out}")
+    if any(status.startswith("failed") for name, status, _ in summary
+           if not next(s for s in STAGES if s.name == name).optional):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
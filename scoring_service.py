@@ -0,0 +1,391 @@
+# scoring_service.py
+"""Headless JSON scoring endpoint with request micro-batching.
+
+Concurrent requests are collected into micro-batches so that one sparse
+`transform` + `predict_proba` call serves many callers.
+
+    python scoring_service.py --port 8000 --max-batch-size 64 --max-wait-ms 5
+    python scoring_service.py --bundle models/bundle   # mmap'd bundle, hot-reloaded
+    python scoring_service.py --workers 4              # 4 processes sharing one model copy
+
+    POST /predict        {"text": "..."}
+    POST /predict/batch  {"texts": ["...", "..."]}
+    GET  /health
+    GET  /metrics        Prometheus text (set FNDP_METRICS=1 or pass --metrics)
+
+A request not scored within FNDP_SCORING_TIMEOUT_S seconds (default 30), or
+arriving while the batcher shuts down, is answered with 503.
+
+With --workers N a supervisor builds the folded scorer once, places its
+arrays in shared memory (shared_model.py) and starts N worker processes that
+accept on the same listening socket and attach to those arrays. Workers that
+die are restarted. Metrics are collected per worker; a new bundle version is
+picked up by restarting the supervisor.
+"""
+import argparse
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import queue
+import signal
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import detector
+import metrics
+from model_bundle import BundleManager, export_bundle, load_bundle
+from linear_scorer import LinearScorer
+from shared_model import attach_scorer, share_scorer
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+MAX_BODY_BYTES = 10 * 1024 * 1024
+REQUEST_TIMEOUT_S = float(os.environ.get("FNDP_SCORING_TIMEOUT_S", 30))  # a request waits this long for its batch
+ROUTES = ("/predict", "/predict/batch", "/health", "/metrics")
+
+metrics.set_buckets("batch_size", (1, 2, 4, 8, 16, 32, 64, 128, 256))
+
+
+class BatcherClosed(RuntimeError):
+    """The MicroBatcher no longer scores: it was closed or its thread exited."""
+
+
+class MicroBatcher:
+    """Queue texts from many threads and score them together.
+
+    A background thread waits for the first queued text, then keeps pulling
+    until either `max_batch_size` texts are collected or `max_wait_ms` has
+    passed since the first one arrived, and scores the whole batch at once.
+
+    Once closed (or if the batch thread dies) pending and later submits fail
+    with BatcherClosed instead of waiting for a thread that is gone.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()  # orders submits against the shutdown drain
+        self.batches = 0
+        self.items = 0
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        future = Future()
+        with self._lock:
+            if self._stopped.is_set():
+                raise BatcherClosed("the batcher is closed")
+            self._queue.put((text, future))
+        return future
+
+    def submit_many(self, texts):
+        return [self.submit(t) for t in texts]
+
+    def predict(self, text, timeout=None):
+        return self.submit(text).result(timeout)
+
+    def predict_many(self, texts, timeout=None):
+        return [f.result(timeout) for f in self.submit_many(texts)]
+
+    def close(self):
+        with self._lock:
+            self._stopped.set()
+            self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._stopped.set()
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                batch = self._collect()
+                if batch:
+                    self._score(batch)
+        finally:
+            with self._lock:
+                self._stopped.set()
+            # Nothing is queued after this point; fail whatever is still waiting
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[1].set_exception(BatcherClosed("the batcher is closed"))
+
+    def _score(self, batch):
+        texts = [text for text, _ in batch]
+        metrics.observe("batch_size", len(batch))
+        try:
+            with metrics.timer("stage_seconds", stage="batch"):
+                results = self.predict_fn(texts)
+            if len(results) != len(batch):
+                raise RuntimeError(f"predict_fn returned {len(results)} results for {len(batch)} texts")
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+def score_results(texts, probas):
+    results = [detector.score_result(t, p) for t, p in zip(texts, probas)]
+    for result in results:
+        metrics.inc("predictions_total", outcome=result["label"])
+    return results
+
+
+def make_predict_fn(model, vectorizer):
+    def predict_fn(texts):
+        return score_results(texts, detector.predict_proba(model, vectorizer, texts))
+    return predict_fn
+
+
+def make_scorer_predict_fn(scorer):
+    def predict_fn(texts):
+        return score_results(texts, detector.score_texts(scorer, texts))
+    return predict_fn
+
+
+def make_bundle_predict_fn(manager):
+    """Score with the live bundle's folded scorer; new versions are picked up between batches."""
+    def predict_fn(texts):
+        return score_results(texts, detector.score_texts(manager.current(), texts))
+    return predict_fn
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    batcher = None  # set by make_server()
+    bundles = None  # BundleManager when serving from a bundle
+    model_version = None  # fixed version: a shared-memory worker's, or the joblib artifacts'
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _send(self, status, body, content_type):
+        route = self.path if self.path in ROUTES else "other"
+        metrics.inc("http_requests_total", route=route, status=status)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            raise ValueError("missing or oversized request body")
+        return json.loads(self.rfile.read(length))
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {
+                "status": "ok",
+                "batches": self.batcher.batches,
+                "items": self.batcher.items,
+                "model_version": self.bundles.current().version if self.bundles else self.model_version,
+                "pid": os.getpid(),
+            })
+        elif self.path == "/metrics":
+            self._send(200, metrics.render_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        try:
+            payload = self._read_json()
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        if self.path == "/predict":
+            text = payload.get("text") if isinstance(payload, dict) else None
+            if not isinstance(text, str) or not text.strip():
+                self._send_json(400, {"error": "'text' must be a non-empty string"})
+                return
+            self._send_scored(lambda: self.batcher.predict(text, REQUEST_TIMEOUT_S))
+        elif self.path == "/predict/batch":
+            texts = payload.get("texts") if isinstance(payload, dict) else None
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                self._send_json(400, {"error": "'texts' must be a list of strings"})
+                return
+            self._send_scored(lambda: {"results": self.batcher.predict_many(texts, REQUEST_TIMEOUT_S)})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _send_scored(self, score):
+        try:
+            result = score()
+        except FutureTimeout:
+            metrics.inc("scoring_errors_total", kind="timeout")
+            self._send_json(503, {"error": f"not scored within {REQUEST_TIMEOUT_S:g}s"})
+        except BatcherClosed as e:
+            metrics.inc("scoring_errors_total", kind="closed")
+            self._send_json(503, {"error": str(e)})
+        else:
+            self._send_json(200, result)
+
+    def log_message(self, format, *args):
+        pass  # keep the console quiet under load
+
+
+def make_server(batcher, host="127.0.0.1", port=8000, bundles=None, sock=None, model_version=None):
+    """HTTP server bound to host:port, or accepting on an already listening `sock`."""
+    handler = type("BoundScoringHandler", (ScoringHandler,),
+                   {"batcher": batcher, "bundles": bundles, "model_version": model_version})
+    if sock is None:
+        return ThreadingHTTPServer((host, port), handler)
+    server = ThreadingHTTPServer(sock.getsockname()[:2], handler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = sock
+    server.server_address = sock.getsockname()
+    return server
+
+
+# ---------------------------
+# Multi-process serving
+# ---------------------------
+def load_shareable_scorer(bundle_dir=None):
+    """LinearScorer from `bundle_dir`, the active bundle, or the joblib pair folded on the fly."""
+    if bundle_dir:
+        return LinearScorer.load(bundle_dir)
+    scorer = detector.load_scorer()
+    if isinstance(scorer, LinearScorer):
+        return scorer
+    with tempfile.TemporaryDirectory() as tmp:
+        export_bundle(scorer.steps[-1][1], scorer.steps[0][1], tmp)
+        return LinearScorer(load_bundle(tmp, mmap=False))
+
+
+def _worker_main(shm_name, layout, params, sock, max_batch_size, max_wait_ms, collect_metrics, ready):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is handled by the supervisor
+    scorer, shm = attach_scorer(shm_name, layout, params)  # shm stays mapped for the worker's lifetime
+    if collect_metrics:
+        metrics.enable()
+    batcher = MicroBatcher(make_scorer_predict_fn(scorer), max_batch_size, max_wait_ms)
+    server = make_server(batcher, sock=sock, model_version=scorer.version)
+    ready.put(os.getpid())
+    server.serve_forever()
+
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve_workers(args):
+    """Supervisor: share the model once, run `args.workers` processes and restart any that die."""
+    scorer = load_shareable_scorer(args.bundle)
+    version = scorer.version
+    shm, layout, params = share_scorer(scorer)
+    del scorer  # workers and the supervisor only need the shared copy
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    ctx = multiprocessing.get_context("spawn")  # workers attach to shared memory, nothing inherited
+    ready = ctx.Queue()
+    worker_args = (shm.name, layout, params, sock, args.max_batch_size, args.max_wait_ms, args.metrics, ready)
+
+    def start_worker():
+        process = ctx.Process(target=_worker_main, args=worker_args, name="scoring-worker", daemon=True)
+        process.start()
+        return process
+
+    workers = []
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    try:
+        workers = [start_worker() for _ in range(args.workers)]
+        pids = [ready.get(timeout=120) for _ in workers]
+        print(f"Scoring service: {len(pids)} workers listening on http://{args.host}:{args.port} "
+              f"(model {version}, {shm.size / 1024 ** 2:.1f} MB shared; pids {' '.join(map(str, pids))})")
+        while True:
+            by_sentinel = {w.sentinel: w for w in workers}
+            for sentinel in multiprocessing.connection.wait(list(by_sentinel)):
+                dead = by_sentinel[sentinel]
+                dead.join()
+                print(f"Worker {dead.pid} exited with code {dead.exitcode}; restarting")
+                time.sleep(1.0)  # no tight restart loop if workers keep crashing
+                workers[workers.index(dead)] = start_worker()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)  # a second SIGTERM must not cut cleanup short
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+        sock.close()
+        shm.close()
+        shm.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake news scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--metrics", action="store_true", help="collect stage timings and counters for /metrics")
+    parser.add_argument("--bundle", metavar="DIR",
+                        help="serve from a model bundle directory instead of the joblib files")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="serve from this many processes sharing one model copy (0: single process)")
+    args = parser.parse_args()
+    if args.workers > 0:
+        serve_workers(args)
+        return
+    if args.metrics:
+        metrics.enable()
+
+    bundles = None
+    if args.bundle:
+        bundles = BundleManager(args.bundle, loader=LinearScorer.load)
+        predict_fn = make_bundle_predict_fn(bundles)
+        print(f"Serving model bundle {bundles.current().version}")
+    else:
+        predict_fn = make_predict_fn(*detector.load_artifacts())
+    batcher = MicroBatcher(predict_fn, args.max_batch_size, args.max_wait_ms)
+    # /health reports the joblib artifacts' version when no bundle is served
+    server = make_server(batcher, args.host, args.port, bundles,
+                         model_version=None if bundles else detector.artifact_version())
+    print(f"Scoring service listening on http://{args.host}:{args.port} "
+          f"(max batch {args.max_batch_size}, max wait {args.max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,31 @@
 import os
+import sys
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
-import feedparser
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feed_cache import FeedCache, poll_feed
+from near_dup import NearDuplicateIndex, DEFAULT_THRESHOLD
+from text_cleaning import clean_text
+import metrics
+
 load_dotenv()
 
 NEWSAPI_KEY = os.getenv("NEWSAPI_KEY")
 GNEWS_KEY = os.getenv("GNEWS_KEY")  # get from https://gnews.io/
 OUT = "data/aggregated_indian_news.csv"
+FEED_CACHE = "data/.feed_cache_newsapi.json"
 
-os.makedirs(os.path.dirname(OUT), exist_ok=True)
+# Base URLs can be pointed at a local stand-in server (see benchmarks/stub_server.py)
+NEWSAPI_URL = os.getenv("NEWSAPI_URL", "https://newsapi.org/v2")
+GNEWS_URL = os.getenv("GNEWS_URL", "https://gnews.io/api/v4")
 
 INDIAN_SOURCES_NEWSAPI = "the-times-of-india,google-news-in,business-insider-uk,hindustan-times,ndtv"
 INDIAN_RSS_FEEDS = [
@@ -20,95 +35,172 @@ INDIAN_RSS_FEEDS = [
 
 CATEGORIES = ["business", "entertainment", "health", "science", "sports", "technology"]
 
-def fetch_newsapi_by_sources(sources, page_size=100):
+# ==== Fetch engine settings ====
+MAX_WORKERS = 8
+TIMEOUT = 15
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5  # seconds; doubles on every retry
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Requests allowed in flight at once per provider (keeps us inside API rate limits)
+PROVIDER_LIMITS = {"newsapi": 2, "gnews": 1, "rss": 4}
+MAX_PAGES = 5
+MAX_RESULTS = 300  # per endpoint; more than one page of 100, so pagination is used
+
+_sessions = {}
+_semaphores = {p: threading.BoundedSemaphore(n) for p, n in PROVIDER_LIMITS.items()}
+_sessions_lock = threading.Lock()
+
+
+def get_session(provider):
+    """One pooled keep-alive session per provider, shared by all worker threads."""
+    with _sessions_lock:
+        if provider not in _sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(PROVIDER_LIMITS.values()) * 2)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[provider] = session
+        return _sessions[provider]
+
+
+def http_get(provider, url, params=None, headers=None):
+    """GET with the provider's concurrency limit and retry + exponential backoff."""
+    session = get_session(provider)
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            metrics.inc("fetch_retries_total", source=provider)
+        try:
+            with _semaphores[provider], metrics.timer("fetch_seconds", source=provider):
+                r = session.get(url, params=params, headers=headers, timeout=TIMEOUT)
+            if r.status_code >= 400:
+                metrics.inc("fetch_errors_total", source=provider, kind=str(r.status_code))
+            if r.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                r.raise_for_status()
+                return r
+            retry_after = r.headers.get("Retry-After")
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else None
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.inc("fetch_errors_total", source=provider,
+                        kind="timeout" if isinstance(e, requests.Timeout) else "connection")
+            if attempt == MAX_RETRIES:
+                raise
+            delay = None
+        if delay is None:
+            delay = BACKOFF_BASE * 2 ** attempt * (1 + random.random() / 2)
+        time.sleep(delay)
+
+
+def fetch_paginated(provider, url, params, page_size_param, page_size, max_results, total_key):
+    """Follow `page=` until max_results, the reported total, or an empty page.
+
+    A failure on the first page raises; a later page failing (e.g. NewsAPI's
+    426 past the developer plan's first 100 results) ends pagination and the
+    pages already fetched are returned.
+    """
+    articles = []
+    page = 1
+    # The server offsets page N by (N - 1) * page size, so every request asks for the
+    # same size; the last page is trimmed here instead
+    page_size = min(page_size, max_results)
+    while len(articles) < max_results and page <= MAX_PAGES:
+        page_params = dict(params, page=page)
+        page_params[page_size_param] = page_size
+        try:
+            data = http_get(provider, url, params=page_params).json()
+        except (requests.RequestException, ValueError) as e:
+            if page == 1:
+                raise
+            metrics.inc("fetch_partial_total", source=provider)
+            print(f"{provider}: page {page} failed ({e}); keeping the {len(articles)} articles already fetched")
+            break
+        batch = data.get("articles", [])
+        articles.extend(batch)
+        if not batch or len(articles) >= int(data.get(total_key) or 0):
+            break
+        page += 1
+    return articles[:max_results]
+
+
+def fetch_newsapi_by_sources(sources, page_size=100, max_results=MAX_RESULTS):
     if not NEWSAPI_KEY:
         print("NEWSAPI_KEY missing, skipping NewsAPI sources fetch")
         return []
-    url = "https://newsapi.org/v2/top-headlines"
+    url = f"{NEWSAPI_URL}/top-headlines"
     params = {
         "apiKey": NEWSAPI_KEY,
-        "pageSize": page_size,
         "sources": sources,
     }
     try:
-        r = requests.get(url, params=params, timeout=15)
-        r.raise_for_status()
-        data = r.json()
-        articles = data.get("articles", [])
+        articles = fetch_paginated("newsapi", url, params, "pageSize", page_size, max_results, "totalResults")
         print(f"NewsAPI (sources): fetched {len(articles)} articles")
         return articles
     except Exception as e:
         print(f"NewsAPI error (sources): {e}")
         return []
 
-def fetch_newsapi_by_category(category, page_size=100):
+def fetch_newsapi_by_category(category, page_size=100, max_results=MAX_RESULTS):
     if not NEWSAPI_KEY:
         print("NEWSAPI_KEY missing, skipping NewsAPI category fetch")
         return []
-    url = "https://newsapi.org/v2/top-headlines"
+    url = f"{NEWSAPI_URL}/top-headlines"
     params = {
         "apiKey": NEWSAPI_KEY,
-        "pageSize": page_size,
         "category": category,
         # "country": "in",  # uncomment if you want country but beware free tier often returns zero
     }
     try:
-        r = requests.get(url, params=params, timeout=15)
-        r.raise_for_status()
-        data = r.json()
-        articles = data.get("articles", [])
+        articles = fetch_paginated("newsapi", url, params, "pageSize", page_size, max_results, "totalResults")
         print(f"NewsAPI (category={category}): fetched {len(articles)} articles")
         return articles
     except Exception as e:
         print(f"NewsAPI error (category={category}): {e}")
         return []
 
-def fetch_gnews(query="India", max_results=100):
+def fetch_gnews(query="India", max_results=MAX_RESULTS, page_size=100):
     if not GNEWS_KEY:
         print("GNEWS_KEY missing, skipping GNews")
         return []
-    url = "https://gnews.io/api/v4/search"
+    url = f"{GNEWS_URL}/search"
     params = {
         "q": query,
         "token": GNEWS_KEY,
         "lang": "en",
-        "max": max_results,
     }
     try:
-        r = requests.get(url, params=params, timeout=15)
-        r.raise_for_status()
-        data = r.json()
-        articles = data.get("articles", [])
+        articles = fetch_paginated("gnews", url, params, "max", page_size, max_results, "totalArticles")
         print(f"GNews: fetched {len(articles)} articles")
         return articles
     except Exception as e:
         print(f"GNews error: {e}")
         return []
 
-def fetch_rss_feeds(feed_urls):
+def fetch_rss_feed(url, cache=None):
+    """All current entries of a feed; unchanged feeds (304) are served from `cache`."""
+    cache = cache if cache is not None else FeedCache(path=None)
+    result = poll_feed(cache, url, lambda u, headers: http_get("rss", u, headers=headers))
+    if result.error:
+        print(f"RSS fetch error for {url}: {result.error}")
+        return []
+    articles = []
+    for entry in result.entries:
+        combined = f"{entry['title']} {entry['summary']}".strip()
+        if len(combined) < 10:
+            continue
+        articles.append({
+            "title": entry["title"],
+            "content": combined,
+            "source": entry["feed_title"],
+            "url": entry["link"],
+            "label": 0,
+        })
+    status = "unchanged, from cache" if result.not_modified else f"{len(result.new)} new"
+    print(f"RSS: fetched {len(articles)} articles from {url} ({status})")
+    return articles
+
+def fetch_rss_feeds(feed_urls, cache=None):
     articles = []
     for url in feed_urls:
-        try:
-            feed = feedparser.parse(url)
-            count = 0
-            for entry in feed.entries:
-                title = entry.get("title", "")
-                desc = entry.get("summary", "")
-                link = entry.get("link", "")
-                combined = f"{title} {desc}".strip()
-                if len(combined) < 10:
-                    continue
-                articles.append({
-                    "title": title,
-                    "content": combined,
-                    "source": feed.feed.get("title", "RSS Feed"),
-                    "url": link,
-                    "label": 0,
-                })
-                count += 1
-            print(f"RSS: fetched {count} articles from {url}")
-        except Exception as e:
-            print(f"RSS fetch error for {url}: {e}")
+        articles.extend(fetch_rss_feed(url, cache))
     return articles
 
 def unify_newsapi_articles(newsapi_articles):
@@ -163,40 +255,69 @@ def deduplicate_articles(articles):
             unique[url] = art
     return list(unique.values())
 
-def main():
-    all_articles = []
-
-    # 1) Fetch all Indian source news (no category)
-    print("Fetching all news from Indian sources (no category)...")
-    newsapi_source_articles = fetch_newsapi_by_sources(INDIAN_SOURCES_NEWSAPI)
-    all_articles.extend(unify_newsapi_articles(newsapi_source_articles))
-
-    # 2) Fetch category-wise global news (no sources param)
-    for cat in CATEGORIES:
-        print(f"\nFetching global category '{cat}' news (no sources)...")
-        cat_articles = fetch_newsapi_by_category(cat)
-        all_articles.extend(unify_newsapi_articles(cat_articles))
+def drop_near_duplicates(articles, threshold=DEFAULT_THRESHOLD):
+    """Drop syndicated near-copies that arrive via several providers in one run."""
+    if threshold <= 0:
+        return articles
+    index = NearDuplicateIndex(threshold)
+    keep = index.filter_new(clean_text(a["content"]) for a in articles)
+    return [a for a, k in zip(articles, keep) if k]
 
-    # 3) Fetch from GNews API with query "India"
-    print("\nFetching news from GNews API with query 'India'...")
-    gnews_articles = fetch_gnews(query="India", max_results=50)
-    all_articles.extend(unify_gnews_articles(gnews_articles))
+def fetch_all(workers=MAX_WORKERS, rss_feeds=INDIAN_RSS_FEEDS, feed_cache=None, max_results=MAX_RESULTS):
+    """Run every fetch concurrently; results keep the original source order."""
+    tasks = [
+        # 1) All Indian source news (no category)
+        (unify_newsapi_articles, fetch_newsapi_by_sources, (INDIAN_SOURCES_NEWSAPI, 100, max_results)),
+        # 2) Category-wise global news (no sources param)
+        *[(unify_newsapi_articles, fetch_newsapi_by_category, (cat, 100, max_results)) for cat in CATEGORIES],
+        # 3) GNews API with query "India"
+        (unify_gnews_articles, lambda: fetch_gnews(query="India", max_results=max_results), ()),
+        # 4) Indian RSS feeds (already unified)
+        *[(list, fetch_rss_feed, (url, feed_cache)) for url in rss_feeds],
+    ]
+    print(f"Fetching from {len(tasks)} endpoints with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(unify, pool.submit(fetch, *args)) for unify, fetch, args in tasks]
+        all_articles = []
+        for unify, future in futures:
+            all_articles.extend(unify(future.result()))
+    return all_articles
 
-    # 4) Fetch articles from Indian RSS feeds
-    print("\nFetching news from Indian RSS feeds...")
-    rss_articles = fetch_rss_feeds(INDIAN_RSS_FEEDS)
-    all_articles.extend(rss_articles)
+def main(workers=MAX_WORKERS, out=OUT, rss_feeds=INDIAN_RSS_FEEDS, feed_cache_file=FEED_CACHE,
+         near_dup_threshold=DEFAULT_THRESHOLD, max_results=MAX_RESULTS):
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    feed_cache = FeedCache(feed_cache_file)
+    all_articles = fetch_all(workers, rss_feeds, feed_cache, max_results)
+    feed_cache.save()
 
     print(f"\nTotal articles before deduplication: {len(all_articles)}")
     unique_articles = deduplicate_articles(all_articles)
     print(f"Total unique articles after deduplication: {len(unique_articles)}")
+    unique_articles = drop_near_duplicates(unique_articles, near_dup_threshold)
+    print(f"Total articles after near-duplicate removal: {len(unique_articles)}")
 
     if unique_articles:
         df = pd.DataFrame(unique_articles)
-        df.to_csv(OUT, index=False, encoding="utf-8")
-        print(f"Saved {len(unique_articles)} articles to {OUT}")
+        df.to_csv(out, index=False, encoding="utf-8")
+        print(f"Saved {len(unique_articles)} articles to {out}")
     else:
         print("No articles fetched from any source.")
+    return unique_articles
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Fetch news from NewsAPI, GNews and RSS feeds")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="concurrent fetches (per-provider limits still apply)")
+    parser.add_argument("--out", default=OUT)
+    parser.add_argument("--max-results", type=int, default=MAX_RESULTS,
+                        help=f"articles per API endpoint, fetched in pages (at most {MAX_PAGES})")
+    parser.add_argument("--near-dup-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="similarity above which syndicated copies are dropped (0 disables)")
+    parser.add_argument("--metrics-out", help="write per-source fetch latency and error counts to this JSON file")
+    args = parser.parse_args()
+    if args.metrics_out:
+        metrics.enable()
+    main(args.workers, args.out, near_dup_threshold=args.near_dup_threshold, max_results=args.max_results)
+    if args.metrics_out:
+        metrics.dump_json(args.metrics_out)
+        print(f"Metrics written to {args.metrics_out}")
@@ -1,6 +1,13 @@
-import feedparser
+import os
+import sys
+import argparse
+import requests
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feed_cache import FeedCache, CACHE_FILE, poll_feeds
+import metrics
+
 FEEDS = [
     "https://feeds.feedburner.com/ndtvnews-india-news",
     "https://www.thehindu.com/news/national/feeder/default.rss",
@@ -8,26 +15,70 @@ FEEDS = [
     # Add more feeds you trust
 ]
 OUT = "data/new_real_rss.csv"
-rows = []
+TIMEOUT = 15
+
+
+def make_getter():
+    session = requests.Session()
+
+    def get(url, headers=None):
+        r = session.get(url, headers=headers, timeout=TIMEOUT)
+        r.raise_for_status()
+        return r
+    return get
 
-print("Fetching articles from RSS feeds...")
 
-for url in FEEDS:
-    feed = feedparser.parse(url)
-    for entry in feed.entries:
-        title = getattr(entry, "title", "") or ""
-        summary = getattr(entry, "summary", "") or ""
-        content = " ".join([title, summary])
-        link = getattr(entry, "link", "") or ""
+def entry_rows(entries):
+    rows = []
+    for entry in entries:
+        title = entry["title"]
+        content = " ".join([title, entry["summary"]])
         if len(content) < 20:
             continue
         rows.append({
             "title": title,
             "content": content,
-            "url": link,
+            "url": entry["link"],
             "label": 0
         })
+    return rows
+
+
+def main(feeds=FEEDS, out=OUT, cache_file=CACHE_FILE, workers=8):
+    print("Fetching articles from RSS feeds...")
+    cache = FeedCache(cache_file)
+    rows = []
+    for result in poll_feeds(cache, feeds, make_getter(), workers):
+        if result.error:
+            print(f"RSS fetch error for {result.url}: {result.error}")
+        elif result.not_modified:
+            print(f"Unchanged (304): {result.url}")
+        else:
+            rows.extend(entry_rows(result.new))
+            print(f"{len(result.new)} new of {len(result.entries)} entries: {result.url}")
+
+    # Only entries never emitted before are appended; earlier rows stay in the file
+    if rows:
+        df = pd.DataFrame(rows).drop_duplicates(subset=["content"])
+        df.to_csv(out, mode="a", header=not os.path.exists(out), index=False, encoding="utf-8")
+        print(f"Appended {len(df)} new RSS articles to {out}")
+    else:
+        print(f"No new RSS articles; {out} left unchanged")
+    # Rows first, then the cache: a crash can repeat entries but never lose them
+    cache.save()
+    return rows
+
 
-df = pd.DataFrame(rows).drop_duplicates(subset=["content"])
-df.to_csv(OUT, index=False, encoding="utf-8")
-print(f"Saved {len(df)} RSS articles to {OUT}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch new RSS entries with conditional requests")
+    parser.add_argument("--out", default=OUT)
+    parser.add_argument("--cache", default=CACHE_FILE, help="feed cache file (ETags and seen GUIDs)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--metrics-out", help="write per-feed poll latency and status counts to this JSON file")
+    args = parser.parse_args()
+    if args.metrics_out:
+        metrics.enable()
+    main(FEEDS, args.out, args.cache, args.workers)
+    if args.metrics_out:
+        metrics.dump_json(args.metrics_out)
+        print(f"Metrics written to {args.metrics_out}")
@@ -1,82 +1,50 @@
+import os
 import sys
-import requests
-from bs4 import BeautifulSoup
-from newspaper import Article
-import pandas as pd
-from datetime import datetime
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from crawler import crawl, HTML_CACHE_DIR, WORKERS, PER_HOST_INTERVAL, MAX_ARTICLES_PER_SECTION
+import metrics
 
 # Force UTF-8 output so emojis don't crash on Windows
 sys.stdout.reconfigure(encoding='utf-8')
 
-# List of news URLs to scrape
+# List of news section pages to crawl
 NEWS_URLS = [
     "https://www.bbc.com/news/world",
     "https://www.thehindu.com/news/",
     "https://www.reuters.com/world/"
 ]
 
-# Headers to bypass 401 / bot blocking
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                  "AppleWebKit/537.36 (KHTML, like Gecko) "
-                  "Chrome/139.0.0.0 Safari/537.36",
-    "Accept-Language": "en-US,en;q=0.9"
-}
-
-OUTPUT_FILE = "real_news.csv"
-
-def scrape_with_newspaper(url):
-    try:
-        article = Article(url)
-        # newspaper3k will internally fetch using default requests; we need to patch manually
-        article.download(input_html=requests.get(url, headers=HEADERS, timeout=10).text)
-        article.parse()
-        return {
-            "title": article.title.strip(),
-            "text": article.text.strip(),
-            "url": url,
-            "published": article.publish_date if article.publish_date else datetime.now()
-        }
-    except Exception as e:
-        print(f"❌ [newspaper3k] Failed for {url}: {e}")
-        return None
-
-def scrape_with_bs4(url):
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        title = soup.title.string.strip() if soup.title else "No Title Found"
-        paragraphs = [p.get_text(strip=True) for p in soup.find_all("p")]
-        text = "\n".join(paragraphs)
-        return {
-            "title": title,
-            "text": text if text else "No content extracted",
-            "url": url,
-            "published": datetime.now()
-        }
-    except Exception as e:
-        print(f"❌ [BeautifulSoup] Failed for {url}: {e}")
-        return None
-
-def scrape_real_news():
-    articles = []
-    for url in NEWS_URLS:
-        print(f"🔍 Scraping: {url}")
-        article_data = scrape_with_newspaper(url)
-        if not article_data or not article_data["text"]:
-            print(f"⚠ Falling back to BeautifulSoup for {url}")
-            article_data = scrape_with_bs4(url)
-
-        if article_data and article_data["text"]:
-            articles.append(article_data)
-        else:
-            print(f"⚠ No content found for {url}")
+OUTPUT_FILE = "data/real_news.csv"
+CHECKPOINT_FILE = "data/.crawl_real_news.json"
+LABEL = 0
 
-    return articles
+def scrape_real_news(args):
+    return crawl(
+        NEWS_URLS, LABEL, args.out,
+        checkpoint_file=args.checkpoint,
+        cache_dir=args.cache_dir,
+        workers=args.workers,
+        per_host_interval=args.per_host_interval,
+        max_articles_per_section=args.max_per_section,
+    )
 
 if __name__ == "__main__":
-    articles = scrape_real_news()
-    df = pd.DataFrame(articles)
-    df.to_csv(OUTPUT_FILE, index=False, encoding="utf-8")
-    print(f"✅ Saved {len(df)} articles to {OUTPUT_FILE}")
+    parser = argparse.ArgumentParser(description="Crawl real news sections into real_news.csv")
+    parser.add_argument("--out", default=OUTPUT_FILE)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--cache-dir", default=HTML_CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--per-host-interval", type=float, default=PER_HOST_INTERVAL)
+    parser.add_argument("--max-per-section", type=int, default=MAX_ARTICLES_PER_SECTION)
+    parser.add_argument("--metrics-out", help="write per-host fetch latency and error counts to this JSON file")
+    args = parser.parse_args()
+    if args.metrics_out:
+        metrics.enable()
+
+    count = scrape_real_news(args)
+    print(f"✅ Saved {count} articles to {args.out}")
+    if args.metrics_out:
+        metrics.dump_json(args.metrics_out)
+        print(f"📈 Metrics written to {args.metrics_out}")
@@ -1,9 +1,19 @@
 import sys
 import os
+import json
+import hashlib
+import argparse
+import numpy as np
 import pandas as pd
-import re
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from text_cleaning import clean_series
+from dataset_store import CorpusStore, STORE_DIR
+from near_dup import NearDuplicateIndex, DEFAULT_THRESHOLD
+from similarity_index import rebuild_index, refresh_index
+import metrics
+
 # Force UTF-8 for Windows console output
 sys.stdout.reconfigure(encoding='utf-8')
 
@@ -12,76 +22,285 @@ EXISTING = os.path.join(DATA_DIR, "cleaned_news.csv")
 OUT = EXISTING
 BACKUP = os.path.join(DATA_DIR, f"cleaned_news_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
 
-def clean_text(text):
-    """Lowercase, remove URLs, keep only letters/spaces, normalize spaces."""
-    text = str(text).lower()
-    text = re.sub(r'http\S+', ' ', text)
-    text = re.sub(r'[^a-z\s]', ' ', text)  # keep only letters and spaces
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
-
-# Load existing cleaned dataset or create empty DataFrame
-if os.path.exists(EXISTING):
-    df_existing = pd.read_csv(EXISTING, on_bad_lines="skip")
-else:
-    df_existing = pd.DataFrame(columns=["content", "label"])
-
-# Gather all CSV files except backups & cleaned file
-all_csv_files = [
-    os.path.join(DATA_DIR, f)
-    for f in os.listdir(DATA_DIR)
-    if f.endswith(".csv")
-    and "backup" not in f.lower()
-    and f != "cleaned_news.csv"
-]
-
-dfs = [df_existing]
-
-for file in all_csv_files:
-    try:
-        df = pd.read_csv(file, on_bad_lines="skip")
-
-        # Combine title + content if content missing
-        if "content" not in df.columns:
-            if "title" in df.columns:
-                df["content"] = df["title"].fillna('') + " " + df.get("text", "").fillna('')
-            elif "text" in df.columns:
-                df["content"] = df["text"].fillna('')
-            else:
-                print(f"Skipping {file} — no content, title, or text column.")
-                continue
+# Incremental mode state
+MANIFEST = os.path.join(DATA_DIR, ".ingest_manifest.json")
+CONTENT_INDEX = os.path.join(DATA_DIR, ".content_index.bin")
+DIGEST_SIZE = 8  # bytes of blake2b per cleaned row
+NEAR_DUP_INDEX = os.path.join(DATA_DIR, ".near_dup_index.npz")
 
-        # Assign default label if missing
-        if "label" not in df.columns:
-            df["label"] = 1 if "fake" in file.lower() else 0
+MIN_CONTENT_LENGTH = 20
 
-        dfs.append(df[["content", "label"]])
-        print(f"Loaded {len(df)} rows from {os.path.basename(file)}")
 
+def list_source_files():
+    """All CSV files in data/ except backups & the cleaned file."""
+    return sorted(
+        os.path.join(DATA_DIR, f)
+        for f in os.listdir(DATA_DIR)
+        if f.endswith(".csv")
+        and "backup" not in f.lower()
+        and f != "cleaned_news.csv"
+    )
+
+
+def load_source(file):
+    """Read one source CSV as a content/label frame, or None if unusable."""
+    name = os.path.basename(file)
+    try:
+        with metrics.timer("ingest_file_seconds", file=name):
+            df = pd.read_csv(file, on_bad_lines="skip")
     except Exception as e:
-        print(f"Error reading {os.path.basename(file)}: {e}")
+        metrics.inc("ingest_file_errors_total", file=name)
+        print(f"Error reading {name}: {e}")
+        return None
+
+    # Combine title + content if content missing
+    if "content" not in df.columns:
+        if "title" in df.columns:
+            text = df["text"] if "text" in df.columns else ""
+            df["content"] = df["title"].fillna('') + " " + pd.Series(text, index=df.index).fillna('')
+        elif "text" in df.columns:
+            df["content"] = df["text"].fillna('')
+        else:
+            print(f"Skipping {file} — no content, title, or text column.")
+            return None
+
+    # Assign default label if missing
+    if "label" not in df.columns:
+        df["label"] = 1 if "fake" in file.lower() else 0
+
+    print(f"Loaded {len(df)} rows from {name}")
+    metrics.inc("ingest_source_rows_total", len(df), file=name)
+    return df[["content", "label"]]
+
+
+def clean_frame(df):
+    """Clean text and remove very short entries."""
+    with metrics.timer("ingest_stage_seconds", stage="clean"):
+        df = df.copy()
+        df["content"] = clean_series(df["content"])
+        kept = df[df["content"].str.len() > MIN_CONTENT_LENGTH]
+    metrics.inc("ingest_rows_total", len(df), stage="loaded")
+    metrics.inc("ingest_rows_total", len(df) - len(kept), stage="dropped_short")
+    return kept
+
+
+# ---------------------------
+# Manifest & content-hash index
+# ---------------------------
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_entry(path, sha256=None):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime": st.st_mtime, "sha256": sha256 or file_sha256(path)}
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST):
+        return {}
+    with open(MANIFEST, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    tmp = MANIFEST + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, MANIFEST)
+
+
+def content_digests(contents):
+    return [hashlib.blake2b(c.encode("utf-8"), digest_size=DIGEST_SIZE).digest() for c in contents]
+
 
-# Combine all datasets
-combined = pd.concat(dfs, ignore_index=True)
+def load_content_index():
+    if not os.path.exists(CONTENT_INDEX):
+        return set()
+    raw = np.fromfile(CONTENT_INDEX, dtype=f"S{DIGEST_SIZE}")
+    return set(raw.tolist())
 
-# Clean text
-combined["content"] = combined["content"].fillna("").map(clean_text)
 
-# Remove very short entries
-combined = combined[combined["content"].str.len() > 20].copy()
+def write_content_index(digests, append=False):
+    with open(CONTENT_INDEX, "ab" if append else "wb") as f:
+        f.write(b"".join(digests))
+
+
+# ---------------------------
+# Output backends
+# ---------------------------
+def load_existing(store):
+    """Current cleaned dataset from the CSV or the columnar store."""
+    if store is not None and store.exists():
+        return store.load(["content", "label"])
+    if store is None and os.path.exists(EXISTING):
+        return pd.read_csv(EXISTING, on_bad_lines="skip")
+    return pd.DataFrame(columns=["content", "label"])
+
+
+# ---------------------------
+# Full rebuild (original behaviour)
+# ---------------------------
+def drop_near_duplicates(df, index):
+    """Drop rows that are near-copies of the index or of each other; kept rows join the index."""
+    if index is None or df.empty:
+        return df
+    with metrics.timer("ingest_stage_seconds", stage="near_dedupe"):
+        keep = index.filter_new(df["content"])
+    metrics.inc("ingest_rows_total", int((~keep).sum()), stage="dropped_near_duplicate")
+    print(f"Near-duplicate filter (threshold {index.threshold}): dropped {int((~keep).sum())} rows")
+    return df[keep]
+
+
+def full_update(store=None, near_dup_threshold=DEFAULT_THRESHOLD):
+    # Load existing cleaned dataset or create empty DataFrame
+    df_existing = load_existing(store)
+
+    source_files = list_source_files()
+    dfs = [df_existing] + [df for df in map(load_source, source_files) if df is not None]
+
+    # Combine, clean and remove very short entries
+    combined = clean_frame(pd.concat(dfs, ignore_index=True))
+
+    # Remove duplicates
+    before = len(combined)
+    with metrics.timer("ingest_stage_seconds", stage="dedupe"):
+        combined = combined.drop_duplicates(subset=["content"])
+    metrics.inc("ingest_rows_total", before - len(combined), stage="dropped_duplicate")
+    near_dup = NearDuplicateIndex(near_dup_threshold) if near_dup_threshold > 0 else None
+    combined = drop_near_duplicates(combined, near_dup)
+    after = len(combined)
+    metrics.inc("ingest_rows_total", after, stage="written")
+
+    with metrics.timer("ingest_stage_seconds", stage="write"):
+        if store is not None:
+            # Previous versions stay readable from the store, no CSV backup needed
+            entry = store.replace(combined, note="full rebuild")
+            print(f"Updated cleaned dataset saved to {store.path} as version {entry['version']} "
+                  f"({before} → {after} after dedupe)")
+        else:
+            # Backup old cleaned file
+            if os.path.exists(EXISTING):
+                os.rename(EXISTING, BACKUP)
+                print(f"Backed up old cleaned file to {os.path.basename(BACKUP)}")
+
+            # Save cleaned dataset
+            combined.to_csv(OUT, index=False, encoding="utf-8")
+            print(f"Updated cleaned dataset saved to {os.path.basename(OUT)} ({before} → {after} after dedupe)")
+
+    # Reset incremental state so a later --incremental run starts from here
+    write_content_index(content_digests(combined["content"]))
+    save_manifest({f: file_entry(f) for f in source_files})
+    if near_dup is not None:
+        near_dup.save(NEAR_DUP_INDEX)
+    rebuild_index(store.path if store is not None else OUT)
+
+    print("Label counts:")
+    print(combined["label"].value_counts())
+
+
+# ---------------------------
+# Incremental update
+# ---------------------------
+def changed_sources(manifest):
+    """Yield (path, entry) for source files that are new or whose bytes changed."""
+    for file in list_source_files():
+        st = os.stat(file)
+        known = manifest.get(file)
+        if known and known["size"] == st.st_size and known["mtime"] == st.st_mtime:
+            continue  # unchanged: not even hashed
+        sha256 = file_sha256(file)
+        if known and known["sha256"] == sha256:
+            manifest[file] = file_entry(file, sha256)  # touched but identical
+            continue
+        yield file, file_entry(file, sha256)
+
+
+def incremental_update(store=None, near_dup_threshold=DEFAULT_THRESHOLD):
+    manifest = load_manifest()
+    index = load_content_index()
+    near_dup = None
+    if near_dup_threshold > 0:
+        near_dup = NearDuplicateIndex.load_or_create(NEAR_DUP_INDEX, near_dup_threshold)
+    if not index or (near_dup is not None and len(near_dup) == 0):
+        existing = load_existing(store)
+        if len(existing):
+            contents = existing["content"].fillna("").astype(str)
+            if not index:
+                print("Building content index from existing cleaned dataset (one-time)...")
+                digests = content_digests(contents)
+                write_content_index(digests)
+                index = set(digests)
+            if near_dup is not None and len(near_dup) == 0:
+                print("Building near-duplicate index from existing cleaned dataset (one-time)...")
+                for content in contents:
+                    near_dup.add(content)
+
+    deltas, new_digests, seen_files = [], [], {}
+    for file, entry in changed_sources(manifest):
+        seen_files[file] = entry
+        df = load_source(file)
+        if df is None:
+            continue
+        df = clean_frame(df)
+        keep = []
+        with metrics.timer("ingest_stage_seconds", stage="dedupe"):
+            for digest in content_digests(df["content"]):
+                is_new = digest not in index
+                keep.append(is_new)
+                if is_new:
+                    index.add(digest)  # also dedupes within and across the new files
+                    new_digests.append(digest)
+        metrics.inc("ingest_rows_total", len(keep) - sum(keep), stage="dropped_duplicate")
+        deltas.append(df[keep])
+        print(f"  {os.path.basename(file)}: {len(df)} cleaned rows, {sum(keep)} new")
+
+    delta = pd.concat(deltas, ignore_index=True) if deltas else pd.DataFrame(columns=["content", "label"])
+    delta = drop_near_duplicates(delta, near_dup)
+    metrics.inc("ingest_rows_total", len(delta), stage="written")
+    if len(delta):
+        with metrics.timer("ingest_stage_seconds", stage="write"):
+            if store is not None:
+                entry = store.append(delta, note=f"incremental: {len(seen_files)} file(s)")
+                print(f"Stored delta as version {entry['version']} in {store.path}")
+            else:
+                write_header = not os.path.exists(OUT)
+                delta.to_csv(OUT, mode="a", header=write_header, index=False, encoding="utf-8")
+    # Near-copies count as seen too, so they are not re-evaluated on the next run
+    write_content_index(new_digests, append=True)
+    manifest.update(seen_files)
+    save_manifest(manifest)
+    if near_dup is not None:
+        near_dup.save(NEAR_DUP_INDEX)
+    if len(delta):
+        refresh_index(delta)
+
+    print(f"Incremental update appended {len(delta)} rows "
+          f"(index now holds {len(index)} rows)")
 
-# Remove duplicates
-before = len(combined)
-combined = combined.drop_duplicates(subset=["content"])
-after = len(combined)
 
-# Backup old cleaned file
-if os.path.exists(EXISTING):
-    os.rename(EXISTING, BACKUP)
-    print(f"Backed up old cleaned file to {os.path.basename(BACKUP)}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge data/*.csv into the cleaned training dataset")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only ingest new/changed source files and append unseen rows")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help=f"'parquet' writes versioned columnar data to {STORE_DIR} instead of {OUT}")
+    parser.add_argument("--near-dup-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="drop rows whose estimated Jaccard similarity to a kept row is at least this (0 disables)")
+    parser.add_argument("--metrics-out", help="write per-stage timings and row counters to this JSON file")
+    args = parser.parse_args()
+    if args.metrics_out:
+        metrics.enable()
 
-# Save cleaned dataset
-combined.to_csv(OUT, index=False, encoding="utf-8")
-print(f"Updated cleaned dataset saved to {os.path.basename(OUT)} ({before} → {after} after dedupe)")
-print("Label counts:")
-print(combined["label"].value_counts())
+    store = CorpusStore() if args.format == "parquet" else None
+    if args.incremental:
+        incremental_update(store, args.near_dup_threshold)
+    else:
+        full_update(store, args.near_dup_threshold)
+    if args.metrics_out:
+        metrics.dump_json(args.metrics_out)
+        print(f"Metrics written to {args.metrics_out}")
@@ -0,0 +1,58 @@
+# shared_model.py
+"""The folded scorer's arrays in one shared memory block, for multi-process serving.
+
+The supervisor builds a LinearScorer once (vocabulary keys, hash table, folded
+weights), copies its arrays into a single `multiprocessing.shared_memory`
+block and hands workers the block name plus a small layout. Workers map the
+block and wrap read-only NumPy views around it, so N workers hold one copy of
+the model instead of N unpickled vocabularies, and none of them imports
+sklearn or rebuilds the hash table.
+
+    shm, layout, params = share_scorer(scorer)       # supervisor
+    scorer, shm = attach_scorer(shm.name, layout, params)  # worker
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from linear_scorer import LinearScorer
+
+ALIGN = 64  # cache-line aligned array starts
+
+
+def share_arrays(arrays):
+    """Copy arrays into a new shared memory block; returns (block, layout)."""
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGN) * ALIGN
+        layout[name] = (array.dtype.str, array.shape, offset)
+        offset += array.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, array in arrays.items():
+        dtype, shape, start = layout[name]
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[...] = array
+    return shm, layout
+
+
+def attach_arrays(name, layout):
+    """Map an existing block; returns (block, {name: read-only view})."""
+    shm = shared_memory.SharedMemory(name=name)
+    arrays = {}
+    for key, (dtype, shape, offset) in layout.items():
+        view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        view.flags.writeable = False
+        arrays[key] = view
+    return shm, arrays
+
+
+def share_scorer(scorer):
+    """(block, layout, params) for a LinearScorer; the caller unlinks the block when done."""
+    arrays, params = scorer.export_state()
+    shm, layout = share_arrays(arrays)
+    return shm, layout, params
+
+
+def attach_scorer(name, layout, params):
+    """(LinearScorer over the shared arrays, block); keep the block referenced while scoring."""
+    shm, arrays = attach_arrays(name, layout)
+    return LinearScorer.from_state(arrays, params), shm
@@ -0,0 +1,399 @@
+# similarity_index.py
+"""Nearest known stories for an input, from the training corpus's TF-IDF vectors.
+
+Every corpus document is reduced to its DOC_TERMS strongest TF-IDF terms
+(re-normalized, so cosine similarity of two sketches stays in [0, 1]) and
+stored twice: row-wise for exact rescoring and as an inverted index whose
+posting lists are sorted by weight. A query walks its own strongest terms
+first and reads at most MAX_POSTINGS postings per term, i.e. only the
+documents where that term carries the most weight; the best RESCORE
+candidates are then scored exactly. The walk stops early when the latency
+budget runs out, so a query never costs more than the budget plus a rescore.
+
+Appended documents go to a delta segment with its own, small posting lists,
+so an append costs O(delta log delta); the delta is merged into the main
+postings once it exceeds COMPACT_FRACTION of the index.
+
+Feature ids come from the trained vectorizer, so the index is tied to it by a
+vocabulary fingerprint: train_model.py rebuilds it from the training split
+(the held-out rows stay unknown), update_dataset.py appends the rows it adds
+with the served scorer (or rebuilds the training split after a full rebuild),
+compress_model.py --activate rebuilds it for the pruned vocabulary, and a
+scorer with another vocabulary gets no index.
+
+    python similarity_index.py build --data data/cleaned_news.csv
+    python similarity_index.py query "text of a story"
+"""
+import os
+import time
+import hashlib
+import argparse
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+INDEX_NAME = "similarity_index.npz"
+INDEX_FILE = os.path.join("models", INDEX_NAME)
+VECTORIZER_FILE = "models/tfidf_vectorizer.joblib"
+
+DOC_TERMS = 64        # strongest TF-IDF terms kept per document (and per query)
+MAX_POSTINGS = 5000   # postings read per query term, highest weights first
+RESCORE = 64          # candidates scored exactly after the inverted-index walk
+COMPACT_FRACTION = 0.1  # delta segment share of the index that triggers a full postings rebuild
+SNIPPET_CHARS = 200
+TOP_K = 5
+MATCH_THRESHOLD = float(os.environ.get("FNDP_SIMILARITY_MATCH", 0.9))  # answer with the known label
+SHOW_THRESHOLD = 0.5                                                   # list as a similar story
+QUERY_BUDGET_MS = float(os.environ.get("FNDP_SIMILARITY_BUDGET_MS", 20))
+
+LABELS = ("real", "fake")
+
+CSRRows = namedtuple("CSRRows", "indptr indices data shape")  # what add() reads of a scipy CSR matrix
+
+
+def vocabulary_fingerprint(terms):
+    """Short hash of the feature names (str, or UTF-8 bytes as in a bundle) in feature-index order."""
+    encoded = (t if isinstance(t, bytes) else t.encode("utf-8") for t in terms)
+    return hashlib.sha1(b"\n".join(encoded)).hexdigest()[:16]
+
+
+def scorer_fingerprint(scorer):
+    """vocabulary_fingerprint() of a detector.load_scorer() scorer or a fitted TfidfVectorizer."""
+    if hasattr(scorer, "steps"):
+        scorer = scorer.steps[0][1]
+    if hasattr(scorer, "get_feature_names_out"):
+        return vocabulary_fingerprint(scorer.get_feature_names_out())
+    return vocabulary_fingerprint(scorer.vocab)
+
+
+def query_vector(scorer, cleaned):
+    """(features, weights) of one cleaned text's TF-IDF vector, from either kind of scorer."""
+    if hasattr(scorer, "steps"):
+        scorer = scorer.steps[0][1]
+    if hasattr(scorer, "transform"):
+        row = scorer.transform([cleaned])
+        return row.indices, row.data
+    _, features, values = scorer.tfidf([cleaned])
+    return features, values
+
+
+def sketch(indptr, indices, data, doc_terms=DOC_TERMS):
+    """Keep the `doc_terms` largest entries of each CSR row and L2-normalize them again."""
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    order = np.lexsort((-data, rows))
+    rank = np.arange(len(order)) - indptr[rows]  # rows are already sorted
+    keep = order[rank < doc_terms]
+    rows, indices, data = rows[keep], indices[keep], data[keep].astype(np.float32)
+    norms = np.sqrt(np.bincount(rows, weights=data.astype(np.float64) ** 2, minlength=len(indptr) - 1))
+    data = (data / norms[rows]).astype(np.float32)
+    new_indptr = np.zeros(len(indptr), dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(indptr) - 1), out=new_indptr[1:])
+    return new_indptr, indices.astype(np.int32), data
+
+
+class SimilarityIndex:
+    def __init__(self, fingerprint, n_features):
+        self.fingerprint = fingerprint
+        self.n_features = n_features
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.data = np.zeros(0, dtype=np.float32)
+        self.labels = np.zeros(0, dtype=np.int8)
+        self._snippets = np.zeros(0, dtype=np.uint8)  # UTF-8 bytes of all snippets
+        self._snippet_ptr = np.zeros(1, dtype=np.int64)
+        self._build_postings()
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @classmethod
+    def build(cls, vectorizer, texts, labels):
+        matrix = document_matrix(vectorizer, texts)
+        index = cls(scorer_fingerprint(vectorizer), matrix.shape[1])
+        index.add(matrix, labels, texts)
+        return index
+
+    def add(self, matrix, labels, texts):
+        """Append documents: their TF-IDF rows (CSR), 0/1 labels and cleaned texts."""
+        if matrix.shape[1] != self.n_features:
+            raise ValueError(f"{matrix.shape[1]} features, index was built with {self.n_features}")
+        indptr, indices, data = sketch(matrix.indptr, matrix.indices, matrix.data)
+        self.indptr = np.concatenate([self.indptr, indptr[1:] + self.indptr[-1]])
+        self.indices = np.concatenate([self.indices, indices])
+        self.data = np.concatenate([self.data, data])
+        self.labels = np.concatenate([self.labels, np.asarray(labels, dtype=np.int8)])
+        snippets = [str(t)[:SNIPPET_CHARS].encode("utf-8") for t in texts]
+        self._snippets = np.concatenate([self._snippets, np.frombuffer(b"".join(snippets), dtype=np.uint8)])
+        self._snippet_ptr = np.concatenate([self._snippet_ptr, self._snippet_ptr[-1] + np.cumsum([len(s) for s in snippets])])
+        if len(self) - self._main_rows > COMPACT_FRACTION * len(self):
+            self._build_postings()
+        else:
+            self._build_delta()
+
+    def _postings(self, first_row):
+        """(docs, weights, ptr) posting lists of rows `first_row`.. in feature-major, weight-descending order.
+
+        The head of each posting list holds the documents where the term matters most.
+        """
+        start = self.indptr[first_row]
+        indices, data = self.indices[start:], self.data[start:]
+        rows = np.repeat(np.arange(first_row, len(self), dtype=np.int32), np.diff(self.indptr[first_row:]))
+        order = np.lexsort((-data, indices))
+        ptr = np.zeros(self.n_features + 1, dtype=np.int64)
+        np.cumsum(np.bincount(indices, minlength=self.n_features), out=ptr[1:])
+        return rows[order], data[order], ptr
+
+    def _build_postings(self):
+        self._post_docs, self._post_weights, self._post_ptr = self._postings(0)
+        self._main_rows = len(self)
+        self._build_delta()
+
+    def _build_delta(self):
+        self._delta_docs, self._delta_weights, self._delta_ptr = self._postings(self._main_rows)
+
+    def snippet(self, row):
+        return bytes(self._snippets[self._snippet_ptr[row]:self._snippet_ptr[row + 1]]).decode("utf-8", "replace")
+
+    # ---------------------------
+    # Query
+    # ---------------------------
+    def query(self, features, weights, k=TOP_K, budget_ms=QUERY_BUDGET_MS):
+        """(matches, complete): up to k {"row", "label", "similarity", "snippet"}, most similar first.
+
+        `complete` is False when the latency budget cut the posting walk short;
+        the matches are then the best among the documents reached so far.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000
+        features, weights = np.asarray(features), np.asarray(weights, dtype=np.float64)
+        if not len(self) or not len(features):
+            return [], True
+        top = np.argsort(-weights)[:DOC_TERMS]
+        features, weights = features[top], weights[top] / np.sqrt(np.sum(weights[top] ** 2))
+
+        # Scores are kept for the touched documents only, never a corpus-sized array
+        docs, contributions = [], []
+        complete = True
+        segments = ((self._post_docs, self._post_weights, self._post_ptr),
+                    (self._delta_docs, self._delta_weights, self._delta_ptr))
+        for feature, weight in zip(features.tolist(), weights.tolist()):
+            for post_docs, post_weights, post_ptr in segments:
+                lo = post_ptr[feature]
+                hi = min(post_ptr[feature + 1], lo + MAX_POSTINGS)
+                if hi > lo:
+                    docs.append(post_docs[lo:hi])
+                    contributions.append(weight * post_weights[lo:hi])
+            if time.perf_counter() > deadline:
+                complete = False
+                break
+        if not docs:
+            return [], complete
+
+        # Hash-based grouping: O(postings read), independent of the corpus size
+        owner, touched = pd.factorize(np.concatenate(docs))
+        scores = np.bincount(owner, weights=np.concatenate(contributions), minlength=len(touched))
+        n_candidates = min(RESCORE, len(touched))
+        best = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+        candidates = touched[best[scores[best] > 0]]
+        if not len(candidates):
+            return [], complete
+
+        # Exact sketch cosine for the candidates, from their rows
+        dense = np.zeros(self.n_features, dtype=np.float32)
+        dense[features] = weights
+        starts = self.indptr[candidates]
+        lengths = self.indptr[candidates + 1] - starts
+        owner = np.repeat(np.arange(len(candidates)), lengths)
+        positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(starts, lengths)
+        similarity = np.bincount(owner, weights=self.data[positions] * dense[self.indices[positions]],
+                                 minlength=len(candidates))
+        best = np.argsort(-similarity)[:k]
+        return [{
+            "row": int(candidates[i]),
+            "label": LABELS[self.labels[candidates[i]]],
+            "similarity": round(min(float(similarity[i]), 1.0), 4),
+            "snippet": self.snippet(candidates[i]),
+        } for i in best if similarity[i] > 0], complete
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def save(self, path=INDEX_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            fingerprint=np.array(self.fingerprint),
+            n_features=np.array(self.n_features),
+            indptr=self.indptr, indices=self.indices, data=self.data, labels=self.labels,
+            snippets=self._snippets, snippet_ptr=self._snippet_ptr,
+            post_docs=self._post_docs, post_weights=self._post_weights, post_ptr=self._post_ptr,
+            main_rows=np.array(self._main_rows),
+            delta_docs=self._delta_docs, delta_weights=self._delta_weights, delta_ptr=self._delta_ptr,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        with np.load(path) as data:
+            index = cls.__new__(cls)
+            index.fingerprint = str(data["fingerprint"])
+            index.n_features = int(data["n_features"])
+            for name in ("indptr", "indices", "data", "labels"):
+                setattr(index, name, data[name])
+            for name in ("snippets", "snippet_ptr", "post_docs", "post_weights", "post_ptr"):
+                setattr(index, "_" + name, data[name])
+            if "main_rows" in data:
+                index._main_rows = int(data["main_rows"])
+                for name in ("delta_docs", "delta_weights", "delta_ptr"):
+                    setattr(index, "_" + name, data[name])
+            else:  # saved before delta segments existed: everything is in the main postings
+                index._main_rows = len(index)
+                index._build_delta()
+        return index
+
+
+def index_version(path=INDEX_FILE):
+    """Changes whenever the index file is rewritten; None if there is no index."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def load_for(scorer, path=INDEX_FILE):
+    """The saved index if it was built with `scorer`'s vocabulary, else None."""
+    if index_version(path) is None:
+        return None
+    try:
+        fingerprint = scorer_fingerprint(scorer)
+    except AttributeError:  # hashed streaming model: no vocabulary to match
+        return None
+    index = SimilarityIndex.load(path)
+    if index.fingerprint != fingerprint:
+        print(f"Similarity index {path} was built for another vocabulary; "
+              f"it is rebuilt by the next train_model.py run")
+        return None
+    return index
+
+
+# ---------------------------
+# Build & incremental refresh
+# ---------------------------
+def document_matrix(scorer, texts):
+    """TF-IDF rows of cleaned texts as CSR (indptr, indices, data, shape), from either kind of scorer."""
+    if hasattr(scorer, "steps"):
+        scorer = scorer.steps[0][1]
+    if hasattr(scorer, "transform"):
+        return scorer.transform(texts)
+    docs, features, values = scorer.tfidf(texts)  # sorted by doc
+    indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(docs, minlength=len(texts)), out=indptr[1:])
+    return CSRRows(indptr, features, values, (len(texts), len(scorer.vocab)))
+
+
+def train_rows(df):
+    """Labelled rows of a cleaned dataset that train_model.py trains on (the held-out split removed)."""
+    from train_model import normalize_labels
+    from feature_cache import split_rows
+    df = normalize_labels(df)
+    return df.iloc[np.sort(split_rows(df)[0])]
+
+
+def build_index(data_file, vectorizer, path=INDEX_FILE, exclude_test=True):
+    """Index the dataset's rows; with `exclude_test`, only the training split train_model.py uses.
+
+    `vectorizer` is a fitted TfidfVectorizer or a detector.load_scorer() scorer.
+    """
+    from train_model import normalize_labels, read_dataset
+    df = read_dataset(data_file)
+    # Held-out rows must stay unseen, or evaluation would just find them in the index
+    df = train_rows(df) if exclude_test else normalize_labels(df)
+    start = time.perf_counter()
+    index = SimilarityIndex.build(vectorizer, df["content"].astype(str).tolist(), df["label"].to_numpy())
+    index.save(path)
+    print(f"Similarity index of {len(index)} documents saved to {path} ({time.perf_counter() - start:.1f}s, "
+          f"{os.path.getsize(path) / 1024 ** 2:.1f} MB)")
+    return index
+
+
+def _served_scorer(path):
+    """The scorer detector serves, if the index at `path` was built for its vocabulary, else None."""
+    if index_version(path) is None:
+        return None
+    import detector
+    scorer = detector.load_scorer()
+    try:
+        fingerprint = scorer_fingerprint(scorer)
+    except AttributeError:  # hashed streaming model: no vocabulary to match
+        return None
+    if SimilarityIndex.load(path).fingerprint != fingerprint:
+        print(f"Similarity index {path} is out of date with the served model; run train_model.py to rebuild it")
+        return None
+    return scorer
+
+
+def refresh_index(df, path=INDEX_FILE):
+    """Add the cleaned rows `update_dataset.py` appended to an existing index.
+
+    Rows are vectorized by the served scorer (the active bundle, e.g. a
+    compress_model.py one, or the joblib artifacts), the one queries use.
+    """
+    scorer = _served_scorer(path)
+    if scorer is None:
+        return
+    from train_model import normalize_labels
+    index = SimilarityIndex.load(path)
+    df = normalize_labels(df)
+    texts = df["content"].astype(str).tolist()
+    if texts:
+        index.add(document_matrix(scorer, texts), df["label"].to_numpy(), texts)
+    index.save(path)
+    print(f"Similarity index: added {len(texts)} rows ({len(index)} total)")
+
+
+def rebuild_index(data_file, path=INDEX_FILE):
+    """Rebuild an existing index from the training split of `data_file` after a full dataset rebuild."""
+    scorer = _served_scorer(path)
+    if scorer is not None:
+        build_index(data_file, scorer, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the similarity index of known stories")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="index the training split of the cleaned dataset")
+    build.add_argument("--data", default="data/cleaned_news.csv")
+    build.add_argument("--include-test", action="store_true", help="also index the held-out rows")
+    build.add_argument("--vectorizer", default=VECTORIZER_FILE)
+    build.add_argument("--out", default=INDEX_FILE)
+    query = sub.add_parser("query", help="print the nearest indexed stories for a text")
+    query.add_argument("text")
+    query.add_argument("--index", default=INDEX_FILE)
+    query.add_argument("-k", type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    import warnings
+    import joblib
+    warnings.filterwarnings("ignore", message="Trying to unpickle estimator")
+    if args.command == "build":
+        build_index(args.data, joblib.load(args.vectorizer), args.out, exclude_test=not args.include_test)
+        return
+
+    from text_cleaning import clean_text
+    import detector
+    scorer = detector.load_scorer()
+    index = load_for(scorer, args.index)
+    if index is None:
+        raise SystemExit(f"No usable similarity index at {args.index}; run `python similarity_index.py build`")
+    start = time.perf_counter()
+    matches, complete = index.query(*query_vector(scorer, clean_text(args.text)), k=args.k)
+    print(f"{len(matches)} matches in {(time.perf_counter() - start) * 1000:.1f} ms"
+          + ("" if complete else " (latency budget reached)"))
+    for m in matches:
+        print(f"{m['similarity']:.3f}  {m['label']:<4}  row {m['row']}: {m['snippet'][:100]}")
+
+
+if __name__ == "__main__":
+    main()
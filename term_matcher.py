@@ -0,0 +1,57 @@
+# term_matcher.py
+"""One-pass, whole-word matcher for large term lists.
+
+Terms (single words or phrases) are indexed once by their first word. A text
+is tokenized a single time; single-word terms are found with one set
+intersection and phrases are only checked at positions whose word starts
+some phrase. Lookup cost therefore depends on the length of the text, not on
+how many terms are configured, and "queen" no longer fires on "queensland"
+nor "dies" on "studies".
+"""
+import json
+import re
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return _WORD_RE.findall(text.lower())
+
+
+class TermMatcher:
+    def __init__(self, terms):
+        self.single = {}   # word -> original term
+        self.phrases = {}  # first word -> [(tuple of words, original term)]
+        for term in terms:
+            words = tuple(tokenize(term))
+            if not words:
+                continue
+            if len(words) == 1:
+                self.single[words[0]] = term
+            else:
+                self.phrases.setdefault(words[0], []).append((words, term))
+
+    def __len__(self):
+        return len(self.single) + sum(len(p) for p in self.phrases.values())
+
+    @classmethod
+    def from_file(cls, path, groups=None):
+        """Build from a JSON file mapping group name -> list of terms."""
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        groups = groups or list(config)
+        return cls(term for group in groups for term in config.get(group, []))
+
+    def find(self, text):
+        """Sorted list of configured terms that occur as whole words in `text`."""
+        words = tokenize(text)
+        matched = {self.single[w] for w in set(words) if w in self.single}
+        if self.phrases:
+            for i, word in enumerate(words):
+                for phrase, term in self.phrases.get(word, ()):
+                    if tuple(words[i:i + len(phrase)]) == phrase:
+                        matched.add(term)
+        return sorted(matched)
+
+    def matches(self, text):
+        return bool(self.find(text))
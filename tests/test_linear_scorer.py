@@ -0,0 +1,48 @@
+"""The folded bundle scorer must give the probabilities of the sklearn pipeline it was exported from."""
+import random
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from linear_scorer import LinearScorer
+from model_bundle import export_bundle
+from text_cleaning import clean_texts
+
+REAL_WORDS = ("government minister election court report officials market economy budget "
+              "health hospital study research cricket match film award").split()
+FAKE_WORDS = ("shocking secret revealed truth exposed hoax miracle cure viral share deleted "
+              "leaked insider conspiracy banned censored").split()
+
+
+def make_corpus(n, seed):
+    """(cleaned texts, labels): word salad drawn mostly from the label's vocabulary."""
+    rng = random.Random(seed)
+    texts, labels = [], []
+    for i in range(n):
+        label = i % 2
+        own, other = (FAKE_WORDS, REAL_WORDS) if label else (REAL_WORDS, FAKE_WORDS)
+        words = [rng.choice(own if rng.random() < 0.7 else other) for _ in range(rng.randint(5, 60))]
+        texts.append(" ".join(words) + f" Story #{i}, see https://example.com/{i}")
+        labels.append(label)
+    return clean_texts(texts), np.array(labels)
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"ngram_range": (1, 2), "sublinear_tf": True},
+    {"max_features": 20, "norm": None},
+])
+def test_predict_proba_matches_sklearn(tmp_path, params):
+    train_texts, train_labels = make_corpus(400, seed=1)
+    held_out, _ = make_corpus(200, seed=2)
+    held_out = [f"{text} unseen words" for text in held_out]  # terms outside the vocabulary are skipped
+    vectorizer = TfidfVectorizer(**params)
+    model = LogisticRegression(max_iter=1000).fit(vectorizer.fit_transform(train_texts), train_labels)
+
+    export_bundle(model, vectorizer, str(tmp_path))
+    scorer = LinearScorer.load(str(tmp_path))
+
+    expected = model.predict_proba(vectorizer.transform(held_out))
+    np.testing.assert_allclose(scorer.predict_proba(held_out), expected, rtol=0, atol=1e-9)
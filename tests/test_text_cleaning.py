@@ -0,0 +1,53 @@
+"""Training and serving must turn the same text into the same tokens."""
+import re
+
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import detector
+from text_cleaning import clean_series, clean_text, clean_texts
+
+PARITY_CASES = [
+    "Breaking: PM Modi's speech at 10am — watch https://t.co/xyz123 now!!!",
+    "Café owner says 'naïve' policy costs ₹5,000 crore",
+    "  multiple\tspaces\nand\r\nnewlines  ",
+    "ALL CAPS HEADLINE WITH NUMBERS 2024/25",
+    "hyphen-ated words and under_scores",
+    "",
+    "ﬁnance İstanbul ß straße",
+    "see http://example.com/a?b=1 and https://x.y/z, then more",
+    "emoji 🚀 rocket, tabs\tand non\u00a0breaking\u00a0spaces",
+]
+
+
+def legacy_clean_text(text):
+    """The three-pass regex version training used before text_cleaning.py."""
+    text = str(text).lower()
+    text = re.sub(r'http\S+', ' ', text)
+    text = re.sub(r'[^a-z\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def training_tokens():
+    # preprocess_data.py / update_dataset.py clean whole columns
+    return clean_series(pd.Series(PARITY_CASES)).tolist()
+
+
+def test_serving_matches_training():
+    serving = [detector.clean_text(t) for t in PARITY_CASES]  # app.py / scoring_service.py
+    assert serving == training_tokens()
+    assert clean_texts(PARITY_CASES) == training_tokens()
+
+
+@pytest.mark.parametrize("text", PARITY_CASES)
+def test_matches_regex_reference(text):
+    assert clean_text(text) == legacy_clean_text(text)
+
+
+def test_analyzer_sees_identical_tokens():
+    training = training_tokens()
+    serving = [detector.clean_text(t) for t in PARITY_CASES]
+    analyzer = TfidfVectorizer(ngram_range=(1, 2)).fit(training).build_analyzer()
+    assert [analyzer(t) for t in serving] == [analyzer(t) for t in training]
@@ -0,0 +1,47 @@
+"""Shared text normalization used for training, dataset updates and serving.
+
+Lowercase, drop URLs, turn everything that is not a-z into a space and
+collapse runs of whitespace. Training and serving must produce identical
+tokens, so every caller goes through this module.
+"""
+import re
+
+_URL_RE = re.compile(r'http\S+')
+
+
+class _LettersOnly(dict):
+    """str.translate table: keep a-z, map every other code point to a space.
+
+    Entries are filled lazily so the table only ever holds the characters
+    actually seen in the corpus.
+    """
+
+    def __missing__(self, codepoint):
+        value = codepoint if 97 <= codepoint <= 122 else 32
+        self[codepoint] = value
+        return value
+
+
+_TABLE = _LettersOnly()
+
+
+def clean_text(text):
+    """Lowercase, remove URLs, keep only letters/spaces, normalize spaces."""
+    text = str(text).lower()
+    if "http" in text:
+        text = _URL_RE.sub(' ', text)
+    return " ".join(text.translate(_TABLE).split())
+
+
+def clean_texts(texts):
+    """Batch API: clean an iterable of documents into a list."""
+    return [clean_text(t) for t in texts]
+
+
+def clean_series(series):
+    """Clean a whole pandas Series of documents (NaN becomes "").
+
+    The translate-table path beats chained `.str.replace(regex=True)` calls,
+    so the column is mapped through `clean_text` rather than pandas regexes.
+    """
+    return series.fillna("").map(clean_text)
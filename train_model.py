@@ -1,88 +1,505 @@
 # train_model.py
 import os
+import sys
+import json
+import time
+import zlib
+import pickle
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report, confusion_matrix
-import seaborn as sns
-import matplotlib.pyplot as plt
+from sklearn.model_selection import train_test_split, StratifiedKFold, ParameterGrid
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, f1_score
+from sklearn.pipeline import make_pipeline
 import joblib
 
-# ==== File paths ====
-DATA_FILE = "data/cleaned_news.csv"
-MODEL_FILE = "models/fake_news_model.joblib"
-VECTORIZER_FILE = "models/tfidf_vectorizer.joblib"
-
-# ==== 1. Load dataset ====
-if not os.path.exists(DATA_FILE):
-    raise SystemExit(f"Dataset not found: {DATA_FILE}. Run scripts/update_dataset.py first.")
+from dataset_store import CorpusStore, is_store
+from model_bundle import BUNDLE_DIR, deactivate, export_bundle
+import detector
+from detector import artifact_version
+import metrics
+import model_meta
+import feature_cache
+from similarity_index import INDEX_NAME, build_index
 
-print(f"Loading dataset from {DATA_FILE}")
-df = pd.read_csv(DATA_FILE)
+# ==== File paths ====
+# Defined in model_meta / detector so run_pipeline.py can read them without importing sklearn
+DATA_FILE = model_meta.DATA_FILE
+MODEL_FILE = detector.MODEL_FILE
+VECTORIZER_FILE = detector.VECTORIZER_FILE
 
-# ==== 2. Clean & normalize labels ====
-df = df.dropna(subset=["content", "label"])
-df["label"] = df["label"].astype(str).str.strip().str.lower()
+# ==== Streaming mode settings ====
+CHUNK_SIZE = 10_000
+N_HASH_FEATURES = 2 ** 20
+STREAMING_EPOCHS = 2
+TEST_BUCKETS = 5  # 1 in 5 rows is held out, i.e. test_size=0.2
 
 # Map textual labels to numeric
-label_map = {
+LABEL_MAP = {
     "real": 0,
     "fake": 1,
     "0": 0,
     "1": 1
 }
-df["label"] = df["label"].map(label_map)
-
-# Drop rows with unmapped labels
-df = df.dropna(subset=["label"])
-df["label"] = df["label"].astype(int)
-
-print(f"Dataset cleaned. Shape: {df.shape}")
-print(f"Label counts:\n{df['label'].value_counts()}")
-
-# ==== 3. Features and labels ====
-X = df["content"]
-y = df["label"]
-
-# ==== 4. Train-test split ====
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
-
-# ==== 5. TF-IDF Vectorization ====
-print("Vectorizing text...")
-vectorizer = TfidfVectorizer(max_features=20000, ngram_range=(1, 2))
-X_train_tfidf = vectorizer.fit_transform(X_train)
-X_test_tfidf = vectorizer.transform(X_test)
-
-# ==== 6. Train Logistic Regression ====
-print("Training model...")
-model = LogisticRegression(
-    max_iter=1000,
-    class_weight="balanced",  # helps with imbalance
-    solver="liblinear"
-)
-model.fit(X_train_tfidf, y_train)
-
-# ==== 7. Predictions ====
-y_pred = model.predict(X_test_tfidf)
-
-# ==== 8. Evaluation ====
-print("\nClassification Report:\n", classification_report(y_test, y_pred, target_names=["Real", "Fake"]))
-
-cm = confusion_matrix(y_test, y_pred)
-sns.heatmap(cm, annot=True, fmt="d", cmap="Blues",
-            xticklabels=["Real", "Fake"],
-            yticklabels=["Real", "Fake"])
-plt.xlabel("Predicted")
-plt.ylabel("Actual")
-plt.title("Confusion Matrix")
-plt.show()
-
-# ==== 9. Save model & vectorizer ====
-os.makedirs("models", exist_ok=True)
-joblib.dump(model, MODEL_FILE)
-joblib.dump(vectorizer, VECTORIZER_FILE)
-print(f"Model saved to {MODEL_FILE}")
-print(f"Vectorizer saved to {VECTORIZER_FILE}")
+
+
+def normalize_labels(df):
+    """Drop rows without content/label and map labels to 0 (real) / 1 (fake)."""
+    df = df.dropna(subset=["content", "label"])
+    df = df.assign(label=df["label"].astype(str).str.strip().str.lower().map(LABEL_MAP))
+    # Drop rows with unmapped labels
+    df = df.dropna(subset=["label"])
+    return df.assign(label=df["label"].astype(int))
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def split_info(X_train, X_test, y_test):
+    """Training size and held-out rows, recorded in model_meta.json for incremental updates."""
+    return {"train_rows": len(X_train), "holdout": pd.DataFrame({"content": X_test, "label": y_test})}
+
+
+def report(y_test, y_pred, plot_out=None):
+    """Print the classification report and show the confusion matrix, or save it to `plot_out` headless."""
+    # Plotting libraries are only needed here; update_model.py imports this module without them
+    import matplotlib
+    if plot_out:
+        matplotlib.use("Agg")  # before seaborn/pyplot pick an interactive backend
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
+    print("\nClassification Report:\n", classification_report(y_test, y_pred, labels=[0, 1], target_names=["Real", "Fake"]))
+
+    cm = confusion_matrix(y_test, y_pred)
+    sns.heatmap(cm, annot=True, fmt="d", cmap="Blues",
+                xticklabels=["Real", "Fake"],
+                yticklabels=["Real", "Fake"])
+    plt.xlabel("Predicted")
+    plt.ylabel("Actual")
+    plt.title("Confusion Matrix")
+    if plot_out:
+        os.makedirs(os.path.dirname(plot_out) or ".", exist_ok=True)
+        plt.savefig(plot_out, dpi=120, bbox_inches="tight")
+        plt.close()
+        print(f"Confusion matrix saved to {plot_out}")
+    else:
+        plt.show()
+
+
+def save_artifacts(model, vectorizer, model_file, vectorizer_file):
+    os.makedirs(os.path.dirname(model_file) or ".", exist_ok=True)
+    os.makedirs(os.path.dirname(vectorizer_file) or ".", exist_ok=True)
+    joblib.dump(model, model_file)
+    joblib.dump(vectorizer, vectorizer_file)
+    print(f"Model saved to {model_file}")
+    print(f"Vectorizer saved to {vectorizer_file}")
+
+
+def read_dataset(data_file):
+    """Load content/label from a cleaned CSV or a columnar corpus store directory."""
+    if is_store(data_file):
+        return CorpusStore(data_file).load(["content", "label"])
+    return pd.read_csv(data_file)
+
+
+# ==== In-memory training (default) ====
+def train_in_memory(data_file, feature_cache_dir=feature_cache.CACHE_DIR):
+    print(f"Loading dataset from {data_file}")
+    df = normalize_labels(read_dataset(data_file))
+
+    print(f"Dataset cleaned. Shape: {df.shape}")
+    print(f"Label counts:\n{df['label'].value_counts()}")
+
+    print("Vectorizing text...")
+    vectorizer = TfidfVectorizer(max_features=20000, ngram_range=(1, 2))
+    # Stratified 80/20 split; the matrices come from the feature cache when data and settings are unchanged
+    X_train_tfidf, X_test_tfidf, train_idx, test_idx, vectorizer = feature_cache.split_features(
+        df, data_file, vectorizer, test_size=0.2, random_state=42, cache_dir=feature_cache_dir
+    )
+    X_train, X_test = df["content"].iloc[train_idx], df["content"].iloc[test_idx]
+    y_train, y_test = df["label"].iloc[train_idx], df["label"].iloc[test_idx]
+
+    print("Training model...")
+    model = LogisticRegression(
+        max_iter=1000,
+        class_weight="balanced",  # helps with imbalance
+        solver="liblinear"
+    )
+    model.fit(X_train_tfidf, y_train)
+
+    y_pred = model.predict(X_test_tfidf)
+    return model, vectorizer, y_test, y_pred, split_info(X_train, X_test, y_test)
+
+
+# ==== Out-of-core streaming training ====
+def iter_chunks(data_file, chunksize):
+    """Yield (content, label, is_test) per chunk; the split is a stable hash of the text."""
+    if is_store(data_file):
+        chunks = CorpusStore(data_file).iter_batches(["content", "label"], chunksize)
+    else:
+        chunks = pd.read_csv(data_file, chunksize=chunksize, usecols=["content", "label"])
+    for chunk in chunks:
+        chunk = normalize_labels(chunk)
+        content = chunk["content"].astype(str)
+        is_test = np.fromiter(
+            (zlib.crc32(c.encode("utf-8")) % TEST_BUCKETS == 0 for c in content),
+            dtype=bool, count=len(content),
+        )
+        yield content, chunk["label"].to_numpy(), is_test
+
+
+def train_streaming(data_file, chunksize=CHUNK_SIZE, n_features=N_HASH_FEATURES, epochs=STREAMING_EPOCHS):
+    """Fit hashed TF-IDF + logistic regression in bounded memory.
+
+    Pass 1 counts document frequencies and class sizes, later passes call
+    partial_fit one chunk at a time, and a final pass scores the held-out rows.
+    Peak memory depends on `chunksize` and `n_features`, not the corpus size.
+    """
+    hasher = HashingVectorizer(n_features=n_features, ngram_range=(1, 2),
+                               alternate_sign=False, norm=None)
+
+    print(f"Pass 1: document frequencies from {data_file} (chunks of {chunksize})")
+    doc_freq = np.zeros(n_features, dtype=np.int64)
+    class_counts = np.zeros(2, dtype=np.int64)
+    for content, labels, is_test in iter_chunks(data_file, chunksize):
+        counts = hasher.transform(content[~is_test])
+        doc_freq += np.bincount(counts.indices, minlength=n_features)
+        class_counts += np.bincount(labels[~is_test], minlength=2)
+
+    n_docs = int(class_counts.sum())
+    if n_docs == 0 or class_counts.min() == 0:
+        raise SystemExit("Streaming mode needs training rows from both classes.")
+    print(f"Training rows: {n_docs} (real={class_counts[0]}, fake={class_counts[1]})")
+
+    # Same smoothed IDF TfidfVectorizer uses
+    tfidf = TfidfTransformer()
+    tfidf.fit(hasher.transform(["placeholder"]))
+    tfidf.idf_ = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+    vectorizer = make_pipeline(hasher, tfidf)
+
+    # Equivalent of class_weight="balanced", which partial_fit cannot compute itself
+    class_weight = {c: n_docs / (2 * class_counts[c]) for c in (0, 1)}
+    model = SGDClassifier(loss="log_loss", alpha=1e-6, class_weight=class_weight, random_state=42)
+
+    for epoch in range(epochs):
+        print(f"Pass {epoch + 2}: partial_fit epoch {epoch + 1}/{epochs}")
+        for content, labels, is_test in iter_chunks(data_file, chunksize):
+            if (~is_test).any():
+                model.partial_fit(vectorizer.transform(content[~is_test]), labels[~is_test], classes=[0, 1])
+
+    print("Scoring held-out rows...")
+    y_test, y_pred = [], []
+    for content, labels, is_test in iter_chunks(data_file, chunksize):
+        if is_test.any():
+            y_test.append(labels[is_test])
+            y_pred.append(model.predict(vectorizer.transform(content[is_test])))
+    y_test = np.concatenate(y_test) if y_test else np.array([], dtype=int)
+    y_pred = np.concatenate(y_pred) if y_pred else np.array([], dtype=int)
+    return model, vectorizer, y_test, y_pred, None
+
+
+# ==== Hyperparameter search ====
+# Each dict is expanded with ParameterGrid; every combination is one candidate
+SEARCH_GRID = [
+    {"max_features": [5000, 20000, 50000], "ngram_range": [[1, 1], [1, 2]],
+     "classifier": ["logreg"], "C": [1.0, 4.0]},
+    {"max_features": [5000, 20000, 50000], "ngram_range": [[1, 1], [1, 2]],
+     "classifier": ["sgd"], "alpha": [1e-5, 1e-6]},
+]
+SEARCH_FOLDS = 3
+SEARCH_TRIALS_FILE = "data/.search_trials.jsonl"
+LATENCY_DOCS = 100  # single-document predictions timed per trial
+
+_search_data = None  # (texts, labels), set once per worker process
+
+
+def build_candidate(config):
+    vectorizer = TfidfVectorizer(max_features=config["max_features"], ngram_range=tuple(config["ngram_range"]))
+    if config["classifier"] == "logreg":
+        model = LogisticRegression(C=config["C"], max_iter=1000, class_weight="balanced", solver="liblinear")
+    elif config["classifier"] == "sgd":
+        model = SGDClassifier(loss="log_loss", alpha=config["alpha"], class_weight="balanced", random_state=42)
+    else:
+        raise ValueError(f"Unknown classifier {config['classifier']!r}")
+    return vectorizer, model
+
+
+def config_name(config):
+    return " ".join(f"{k}={v}" for k, v in sorted(config.items()))
+
+
+def trial_id(config, fold, data_version):
+    key = json.dumps([config, fold, data_version], sort_keys=True)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _init_search_worker(texts, labels, collect_metrics=False):
+    # With the fork start method these arrays are inherited, not pickled per task
+    global _search_data
+    _search_data = (texts, labels)
+    if collect_metrics:
+        metrics.enable()
+
+
+def _run_trial_in_worker(config, fold, train_idx, val_idx):
+    """run_trial in a pool process, with the metrics it recorded for the parent to merge."""
+    with metrics.timer("search_trial_seconds", classifier=config["classifier"]):
+        trial = run_trial(config, fold, train_idx, val_idx)
+    return trial, metrics.drain()
+
+
+def run_trial(config, fold, train_idx, val_idx):
+    """Fit one candidate on one fold; returns its metrics."""
+    texts, labels = _search_data
+    vectorizer, model = build_candidate(config)
+    start = time.perf_counter()
+    model.fit(vectorizer.fit_transform(texts[train_idx]), labels[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    y_pred = model.predict(vectorizer.transform(texts[val_idx]))
+    sample = texts[val_idx[:LATENCY_DOCS]]
+    timings = []
+    for _ in range(3):  # best of 3, since other trials compete for the CPU
+        start = time.perf_counter()
+        for text in sample:
+            model.predict_proba(vectorizer.transform([text]))
+        timings.append(time.perf_counter() - start)
+    latency_us = min(timings) / max(len(sample), 1) * 1e6
+
+    return {
+        "config": config,
+        "fold": fold,
+        "accuracy": float(accuracy_score(labels[val_idx], y_pred)),
+        "f1_fake": float(f1_score(labels[val_idx], y_pred, pos_label=1, zero_division=0)),
+        "latency_us": latency_us,
+        "size_bytes": len(pickle.dumps((vectorizer, model), protocol=pickle.HIGHEST_PROTOCOL)),
+        "fit_seconds": fit_seconds,
+    }
+
+
+def load_trials(path):
+    trials = {}
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    trial = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interrupted run
+                trials[trial["trial_id"]] = trial
+    return trials
+
+
+def summarize_trials(trials):
+    """One row per candidate, fold metrics averaged, best accuracy first."""
+    df = pd.DataFrame(trials)
+    df["candidate"] = df["config"].map(config_name)
+    summary = df.groupby("candidate").agg(
+        accuracy=("accuracy", "mean"), accuracy_std=("accuracy", "std"), f1_fake=("f1_fake", "mean"),
+        latency_us=("latency_us", "median"), size_kb=("size_bytes", lambda b: b.mean() / 1024),
+        fit_seconds=("fit_seconds", "mean"), folds=("fold", "count"), config=("config", "first"),
+    )
+    return summary.sort_values("accuracy", ascending=False)
+
+
+def search(data_file, grid=SEARCH_GRID, folds=SEARCH_FOLDS, workers=None, trials_file=SEARCH_TRIALS_FILE):
+    """Cross-validate every grid candidate on the training split across a process pool.
+
+    Finished trials are appended to `trials_file` as they complete, so an
+    interrupted search skips them when rerun. Returns the per-candidate summary.
+    """
+    df = normalize_labels(read_dataset(data_file))
+    X_train, _, y_train, _ = train_test_split(
+        df["content"], df["label"], test_size=0.2, random_state=42, stratify=df["label"]
+    )
+    texts = X_train.astype(str).to_numpy()
+    labels = y_train.to_numpy()
+    # Same version the feature cache keys on: a CSV content hash or the store's version id
+    data_version = feature_cache.dataset_version(data_file)
+
+    configs = list(ParameterGrid(grid))
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=42).split(texts, labels))
+    done = load_trials(trials_file)
+    wanted = {trial_id(config, fold, data_version): (config, fold) for config in configs for fold in range(folds)}
+    pending = [config_fold for tid, config_fold in wanted.items() if tid not in done]
+    print(f"Search: {len(configs)} candidates x {folds} folds on {len(texts)} rows, "
+          f"{len(pending)} trials to run ({len(configs) * folds - len(pending)} already done)")
+
+    # Only this grid's trials: the file also holds other grids' and fold counts' checkpoints
+    results = [done[tid] for tid in wanted if tid in done]
+    if pending:
+        os.makedirs(os.path.dirname(trials_file) or ".", exist_ok=True)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker,
+                                 initargs=(texts, labels, metrics.enabled())) as pool, \
+                open(trials_file, "a", encoding="utf-8") as out:
+            futures = {pool.submit(_run_trial_in_worker, config, fold, *splits[fold]): (config, fold)
+                       for config, fold in pending}
+            for i, future in enumerate(as_completed(futures), 1):
+                config, fold = futures[future]
+                trial, worker_metrics = future.result()
+                metrics.merge(worker_metrics)
+                metrics.inc("search_trials_total", classifier=config["classifier"])
+                trial = dict(trial, trial_id=trial_id(config, fold, data_version), data_version=data_version)
+                out.write(json.dumps(trial) + "\n")
+                out.flush()
+                results.append(trial)
+                print(f"[{i}/{len(pending)}] {config_name(config)} fold {fold}: accuracy {trial['accuracy']:.4f}")
+
+    summary = summarize_trials(results)
+    with pd.option_context("display.width", 200, "display.max_colwidth", 80, "display.float_format", "{:.4f}".format):
+        print("\nCandidates (accuracy vs single-document latency and pickled size):")
+        print(summary.drop(columns="config").to_string())
+    return summary
+
+
+def pick_candidate(summary, min_accuracy=None):
+    """Config of the fastest candidate meeting `min_accuracy`, or of the most accurate one without a bar."""
+    if min_accuracy is None:
+        return summary["config"].iloc[0]
+    qualifying = summary[summary["accuracy"] >= min_accuracy]
+    if qualifying.empty:
+        print(f"No candidate reaches accuracy {min_accuracy}; using the most accurate one")
+        return summary["config"].iloc[0]
+    return qualifying.sort_values("latency_us")["config"].iloc[0]
+
+
+def train_candidate(data_file, config, feature_cache_dir=feature_cache.CACHE_DIR):
+    """Refit one search candidate on the full training split and score the held-out split."""
+    df = normalize_labels(read_dataset(data_file))
+    vectorizer, model = build_candidate(config)
+    X_train_tfidf, X_test_tfidf, train_idx, test_idx, vectorizer = feature_cache.split_features(
+        df, data_file, vectorizer, test_size=0.2, random_state=42, cache_dir=feature_cache_dir
+    )
+    X_train, X_test = df["content"].iloc[train_idx], df["content"].iloc[test_idx]
+    y_test = df["label"].iloc[test_idx]
+    model.fit(X_train_tfidf, df["label"].iloc[train_idx])
+    return model, vectorizer, y_test, model.predict(X_test_tfidf), split_info(X_train, X_test, y_test)
+
+
+# ==== Evaluation of saved artifacts ====
+def evaluate(data_file, model_file, vectorizer_file, feature_cache_dir=feature_cache.CACHE_DIR):
+    """Score the saved model on the held-out split without training anything."""
+    model, vectorizer = joblib.load(model_file), joblib.load(vectorizer_file)
+    df = normalize_labels(read_dataset(data_file))
+    X_test_tfidf, test_idx = feature_cache.test_features(df, data_file, vectorizer, cache_dir=feature_cache_dir)
+    y_test = df["label"].iloc[test_idx]
+    y_pred = model.predict(X_test_tfidf)
+    print(f"Accuracy of {model_file} on {len(y_test)} held-out rows: {accuracy_score(y_test, y_pred):.4f}")
+    return y_test, y_pred
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the fake news classifier")
+    parser.add_argument("--data", default=DATA_FILE,
+                        help="cleaned CSV or columnar corpus store directory (e.g. data/corpus)")
+    parser.add_argument("--mode", choices=["memory", "streaming", "search", "evaluate"], default="memory",
+                        help="'streaming' reads the CSV in chunks and keeps memory bounded; "
+                             "'search' cross-validates the SEARCH_GRID candidates; "
+                             "'evaluate' scores the saved model on the held-out split")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--n-features", type=int, default=N_HASH_FEATURES,
+                        help="hash space size for streaming mode")
+    parser.add_argument("--epochs", type=int, default=STREAMING_EPOCHS)
+    parser.add_argument("--model-out", default=MODEL_FILE)
+    parser.add_argument("--vectorizer-out", default=VECTORIZER_FILE)
+    parser.add_argument("--bundle-dir", default=BUNDLE_DIR,
+                        help="where the memory-mappable serving bundle is exported")
+    parser.add_argument("--no-bundle", action="store_true", help="skip the bundle export")
+    parser.add_argument("--plot-out", metavar="PNG",
+                        help="save the confusion matrix to this file instead of opening a window")
+    parser.add_argument("--feature-cache-dir", default=feature_cache.CACHE_DIR,
+                        help="where train/test TF-IDF matrices are cached between runs")
+    parser.add_argument("--no-feature-cache", action="store_true", help="always re-vectorize the corpus")
+    parser.add_argument("--no-similarity-index", action="store_true",
+                        help=f"skip rebuilding {INDEX_NAME} next to the model")
+    search_args = parser.add_argument_group("search mode")
+    search_args.add_argument("--grid", help="JSON file with a list of parameter grids (default: SEARCH_GRID)")
+    search_args.add_argument("--folds", type=int, default=SEARCH_FOLDS)
+    search_args.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    search_args.add_argument("--trials-file", default=SEARCH_TRIALS_FILE,
+                             help="finished trials are appended here and skipped on rerun")
+    search_args.add_argument("--min-accuracy", type=float,
+                             help="pick the lowest-latency candidate at or above this CV accuracy")
+    search_args.add_argument("--save-best", action="store_true",
+                             help="refit the picked candidate and save it like a normal training run")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        raise SystemExit(f"Dataset not found: {args.data}. Run scripts/update_dataset.py first.")
+    cache_dir = None if args.no_feature_cache else args.feature_cache_dir
+
+    if args.mode == "evaluate":
+        report(*evaluate(args.data, args.model_out, args.vectorizer_out, cache_dir), plot_out=args.plot_out)
+        return
+
+    if args.mode == "search":
+        grid = SEARCH_GRID
+        if args.grid:
+            with open(args.grid, encoding="utf-8") as f:
+                grid = json.load(f)
+        summary = search(args.data, grid, args.folds, args.workers, args.trials_file)
+        config = pick_candidate(summary, args.min_accuracy)
+        print(f"\nPicked: {config_name(config)}")
+        if not args.save_best:
+            return
+
+    start = time.perf_counter()
+    if args.mode == "search":
+        model, vectorizer, y_test, y_pred, info = train_candidate(args.data, config, cache_dir)
+    elif args.mode == "streaming":
+        model, vectorizer, y_test, y_pred, info = train_streaming(args.data, args.chunksize, args.n_features, args.epochs)
+    else:
+        model, vectorizer, y_test, y_pred, info = train_in_memory(args.data, cache_dir)
+    elapsed = time.perf_counter() - start
+
+    peak = peak_rss_mb()
+    peak_str = f"{peak:.1f} MB" if peak is not None else "n/a"
+    print(f"\n[{args.mode}] wall time: {elapsed:.2f}s, peak RSS: {peak_str}")
+
+    report(y_test, y_pred, args.plot_out)
+    save_artifacts(model, vectorizer, args.model_out, args.vectorizer_out)
+    model_dir = os.path.dirname(args.model_out)
+    index_file = os.path.join(model_dir, INDEX_NAME)
+    if info is not None:
+        model_meta.record_training(model_dir, artifact_version(args.model_out, args.vectorizer_out),
+                                   args.data, info["train_rows"], accuracy_score(y_test, y_pred), holdout=info["holdout"])
+    else:
+        # Hashed streaming models can't be updated incrementally; the next update retrains in full
+        model_meta.clear_meta(model_dir)
+    if args.mode != "streaming" and not args.no_similarity_index:
+        # Feature ids changed with the new vectorizer, so the index is rebuilt rather than extended
+        build_index(args.data, vectorizer, index_file)
+    elif args.mode == "streaming" and os.path.exists(index_file):
+        os.remove(index_file)
+        print(f"Removed {index_file}: hashed streaming models have no vocabulary to index")
+
+    version = None
+    if args.mode == "streaming":
+        print("Bundle export skipped: hashed streaming models have no vocabulary to export")
+    elif not args.no_bundle:
+        version = export_bundle(model, vectorizer, args.bundle_dir)
+        print(f"Model bundle {version} exported to {args.bundle_dir}")
+    # A bundle next to the saved model is served in its place, so an old one must not stay active
+    serves_model = os.path.abspath(os.path.dirname(args.bundle_dir)) == os.path.abspath(model_dir)
+    if version is None and serves_model and (stale := deactivate(args.bundle_dir)):
+        print(f"Deactivated model bundle {stale}: {args.model_out} is served until a bundle is exported again")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# update_model.py
+"""Update the trained model with the rows added since it was trained.
+
+After `scripts/update_dataset.py --incremental` appends a few hundred rows,
+this trains on just those rows plus a replay sample of older ones instead of
+rerunning train_model.py on the whole corpus:
+
+  1. read the rows appended after the position recorded in models/model_meta.json
+  2. warm-start the logistic regression from the current coefficients (lbfgs)
+     on delta + replay, with the vectorizer (vocabulary and IDF) kept as is
+  3. score current and updated model on the fixed holdout saved by the last
+     full retrain
+  4. promote (joblib pair, bundle, metadata) if holdout accuracy holds,
+     otherwise write models/RETRAIN_REQUIRED and exit with status 2
+
+A full retrain is also requested when the dataset was rewritten (a full
+update_dataset run), too many rows arrived since the last full retrain, or
+the new rows use many terms outside the vocabulary.
+
+    python scripts/update_dataset.py --incremental && python update_model.py
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import warnings
+
+import pandas as pd
+import joblib
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+
+import model_meta
+from detector import artifact_version
+from model_bundle import BUNDLE_DIR, export_bundle
+from train_model import DATA_FILE, MODEL_FILE, VECTORIZER_FILE, normalize_labels
+
+MAX_ACCURACY_DROP = 0.005      # holdout accuracy may fall at most this much
+MAX_DELTA_FRACTION = 0.2       # rows since the last full retrain, relative to its training rows
+MAX_OOV_INCREASE = 0.1         # out-of-vocabulary term rate of new rows vs the holdout
+REPLAY_RATIO = 10              # older rows replayed per new row
+MIN_REPLAY_ROWS = 5000
+WARM_START_ITER = 100
+
+RETRAIN_EXIT_CODE = model_meta.RETRAIN_EXIT_CODE
+
+
+class RetrainRequired(Exception):
+    pass
+
+
+def oov_rate(vectorizer, texts):
+    """Share of the vectorizer's uni/bigram terms in `texts` that are not in its vocabulary."""
+    analyze = vectorizer.build_analyzer()
+    total = known = 0
+    for text in texts:
+        terms = analyze(text)
+        total += len(terms)
+        known += sum(t in vectorizer.vocabulary_ for t in terms)
+    return 1 - known / total if total else 0.0
+
+
+def replay_sample(data_file, position, holdout, delta, seed=42):
+    """Older rows mixed into the update so the model does not drift toward the delta alone.
+
+    Sampled from the rows before `position` (what the current model was
+    trained on) without reading the whole corpus.
+    """
+    n = max(MIN_REPLAY_ROWS, REPLAY_RATIO * len(delta))
+    exclude = set(holdout["content"]) | set(delta["content"])
+    # Oversampled by the rows that may be dropped as holdout/delta copies
+    df = normalize_labels(model_meta.sample_before(data_file, position, n + len(exclude), seed))
+    return df[~df["content"].isin(exclude)].head(n)
+
+
+def warm_start_fit(model, X, y, corpus_rows):
+    """Continue from the current coefficients; liblinear cannot warm start, lbfgs can.
+
+    C is scaled up so delta + replay weigh as much against the L2 penalty as
+    the `corpus_rows` they stand in for; otherwise the small sample shrinks
+    every coefficient.
+    """
+    C = model.C * max(1.0, corpus_rows / X.shape[0])
+    updated = clone(model).set_params(solver="lbfgs", warm_start=True, max_iter=WARM_START_ITER, C=C)
+    updated.classes_ = model.classes_
+    updated.coef_ = model.coef_.copy()
+    updated.intercept_ = model.intercept_.copy()
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message=".*failed to converge.*")  # starts near the optimum; capped iterations are fine
+        updated.fit(X, y)
+    return updated
+
+
+def save_atomic(obj, path):
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or ".", suffix=".tmp", delete=False) as f:
+        tmp = f.name
+    joblib.dump(obj, tmp)
+    os.chmod(tmp, 0o644)  # NamedTemporaryFile creates it 0600; the served artifact must stay readable
+    os.replace(tmp, path)  # serving never loads a half-written artifact
+
+
+def update(data_file=DATA_FILE, model_file=MODEL_FILE, vectorizer_file=VECTORIZER_FILE,
+           bundle_dir=BUNDLE_DIR, max_drop=MAX_ACCURACY_DROP, export=True):
+    """Incrementally update the model; returns "promoted" or "unchanged", raises RetrainRequired."""
+    timings = {}
+    start = time.perf_counter()
+    model_dir = os.path.dirname(model_file)
+    meta = model_meta.load_meta(model_dir)
+    if meta is None or meta["artifacts"] != artifact_version(model_file, vectorizer_file):
+        raise RetrainRequired("no metadata for the current model files (trained before metadata existed or copied in)")
+    holdout = model_meta.load_holdout(model_dir)
+    if holdout is None:
+        raise RetrainRequired(f"fixed holdout {model_meta.HOLDOUT_FILE} is missing")
+
+    delta = model_meta.read_since(data_file, meta["data"])
+    if delta is None:
+        raise RetrainRequired(f"{data_file} was rewritten since the model was trained, not appended to")
+    delta = normalize_labels(delta)
+    if delta.empty:
+        print(f"No new rows in {data_file} since the model was trained")
+        return "unchanged"
+    rows_since_full = meta["rows_since_full"] + len(delta)
+    if rows_since_full > MAX_DELTA_FRACTION * meta["train_rows"]:
+        raise RetrainRequired(f"{rows_since_full} rows added since the last full retrain "
+                              f"(limit {MAX_DELTA_FRACTION:.0%} of {meta['train_rows']})")
+    timings["read delta"] = time.perf_counter() - start
+
+    warnings.filterwarnings("ignore", message="Trying to unpickle estimator")
+    model, vectorizer = joblib.load(model_file), joblib.load(vectorizer_file)
+    if not isinstance(model, LogisticRegression):
+        # e.g. an SGDClassifier saved by `train_model.py --mode search --save-best`
+        raise RetrainRequired(f"{type(model).__name__} models are not warm-started; only LogisticRegression is")
+    delta_oov, holdout_oov = oov_rate(vectorizer, delta["content"]), oov_rate(vectorizer, holdout["content"])
+    if delta_oov > holdout_oov + MAX_OOV_INCREASE:
+        raise RetrainRequired(f"new rows are {delta_oov:.0%} out-of-vocabulary terms vs {holdout_oov:.0%} "
+                              f"on the holdout; the vocabulary needs refitting")
+
+    t = time.perf_counter()
+    replay = replay_sample(data_file, meta["data"], holdout, delta)
+    train = pd.concat([delta, replay], ignore_index=True)
+    timings["replay sample"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    updated = warm_start_fit(model, vectorizer.transform(train["content"]), train["label"],
+                             meta["train_rows"] + rows_since_full)
+    timings["warm start"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    X_holdout = vectorizer.transform(holdout["content"])
+    before = accuracy_score(holdout["label"], model.predict(X_holdout))
+    after = accuracy_score(holdout["label"], updated.predict(X_holdout))
+    timings["validate"] = time.perf_counter() - t
+    print(f"Trained on {len(delta)} new + {len(replay)} replayed rows; "
+          f"holdout accuracy {before:.4f} -> {after:.4f} ({len(holdout)} rows)")
+    if after < before - max_drop:
+        raise RetrainRequired(f"holdout accuracy would drop from {before:.4f} to {after:.4f}")
+
+    t = time.perf_counter()
+    save_atomic(updated, model_file)
+    meta = model_meta.record_training(model_dir, artifact_version(model_file, vectorizer_file), data_file,
+                                      meta["train_rows"], after, parent=meta, delta_rows=len(delta))
+    if export:
+        version = export_bundle(updated, vectorizer, bundle_dir)
+        print(f"Model bundle {version} exported to {bundle_dir}")
+    timings["promote"] = time.perf_counter() - t
+
+    print(f"Promoted incremental update {meta['updates_since_full']} since the last full retrain "
+          f"({meta['rows_since_full']} rows)")
+    print("Timings: " + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items())
+          + f"; refresh-to-deploy {time.perf_counter() - start:.2f}s")
+    return "promoted"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the model with rows added since it was trained")
+    parser.add_argument("--data", default=DATA_FILE, help="cleaned CSV or corpus store directory")
+    parser.add_argument("--model", default=MODEL_FILE)
+    parser.add_argument("--vectorizer", default=VECTORIZER_FILE)
+    parser.add_argument("--bundle-dir", default=BUNDLE_DIR)
+    parser.add_argument("--no-bundle", action="store_true", help="skip the bundle export")
+    parser.add_argument("--max-drop", type=float, default=MAX_ACCURACY_DROP,
+                        help="largest holdout accuracy drop still promoted")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        raise SystemExit(f"Dataset not found: {args.data}. Run scripts/update_dataset.py first.")
+    model_dir = os.path.dirname(args.model)
+    try:
+        update(args.data, args.model, args.vectorizer, args.bundle_dir, args.max_drop, not args.no_bundle)
+    except RetrainRequired as e:
+        model_meta.mark_retrain_required(model_dir, str(e))
+        print(f"Full retrain required: {e}\nWrote {os.path.join(model_dir, model_meta.RETRAIN_MARKER)}; "
+              f"run `python train_model.py --data {args.data}`")
+        sys.exit(RETRAIN_EXIT_CODE)
+
+
+if __name__ == "__main__":
+    main()